@@ -12,6 +12,8 @@ const BackgroundItemScene = preload("res://BackgroundItem.tscn")
 const ZOOM_INCREMENT = 0.2 
 const EMULATOR_CONFIG_PATH = "user://emulator_paths.cfg"
 const MENU_DATA_PATH = "res://menu_data.json"
+# Sharded library (scripts/library_store.py); used instead of menu_data.json when it exists
+const LIBRARY_DIR = "res://library"
 const APP_CONFIG_PATH = "user://app_settings.cfg"
 
 enum { XMB, SETTINGS } 
@@ -43,6 +45,39 @@ var master_volume_db: float = 0.0
 var is_game_running = false
 var is_window_focused = true
 
+# Resident launcher (scripts/launcher_supervisor.py). Games are launched through it while it is reachable.
+const LAUNCHER_PORT = 47601
+# Proves to the supervisor that a connection comes from this launcher; created once, kept across sessions
+const LAUNCHER_TOKEN_PATH = "user://launcher_token"
+var launcher_token = ""
+var is_launcher_authenticated = false
+var launcher_peer = StreamPeerTCP.new()
+var launcher_buffer = ""
+var launcher_request_id = 0
+var is_launch_supervised = false
+# Start of each emulator's window title; once a supervised launch has started, scripts/focus_window.py
+# waits for that window and brings it to the front
+const EMULATOR_WINDOW_TITLES = { "Switch": "yuzu", "Wii": "Dolphin", "Playstation 3": "RPCS3" }
+const FOCUS_WAIT_SECONDS = 20
+
+# Resident scanner (scripts/scanner_daemon.py); refreshes go through it instead of a fresh interpreter per scan
+var scanner_daemon = {}
+var scanner_request_id = 0
+
+# Scans queue missing artwork; this worker downloads it afterwards (see scripts/artwork_backfill.py)
+var artwork_backfill_pid = -1
+# What the user is looking at, so artwork for it is fetched first (see scripts/artwork_priority.py)
+const ARTWORK_PRIORITY_PATH = "res://scripts/config/artwork_priority.json"
+const PRIORITY_ITEMS_BEFORE = 2 # Items above the selection counted as on screen
+const PRIORITY_ITEMS_AFTER = 6 # Items below it
+# Rescans a platform when its games or config change while the launcher runs (see scripts/scan_watch.py)
+const SCAN_OUTPUT_NAMES = { "Switch": "gamedir_contents_switch.json", "Wii": "gamedir_contents_wii.json", "Playstation 3": "gamedir_contents_ps3.json" }
+var scan_watch_pid = -1
+var library_modified_time = 0
+const RECENT_GAMES_MAX = 10
+var recent_games = []
+var is_artwork_priority_dirty = true
+
 # Node References 
 @onready var camera_origin = $CameraOrigin 
 @onready var selection_label = $SelectionInfo/CurrentSelectionLabel 
@@ -82,6 +117,8 @@ func _ready():
 	load_menu_data() 
 	load_emulator_paths()
 	load_app_settings()
+	start_launcher_supervisor()
+	start_scan_watch()
 
 	# Default Shader Behaivor
 	default_shader_time_speed = background_shader_rect.material.get_shader_parameter("time_speed")
@@ -127,10 +164,26 @@ func _unhandled_input(event):
 		XMB: handle_xmb_input(event) 
 		SETTINGS: handle_settings_input(event) 
 
+func _exit_tree():
+	# Running games keep running; only the supervisor goes away
+	if launcher_peer.get_status() == StreamPeerTCP.STATUS_CONNECTED:
+		send_launcher_request("shutdown", {})
+	stop_scan_watch()
+	stop_scanner_daemon()
+
 func _on_process_check_timeout():
+	poll_launcher_messages()
+	poll_artwork_backfill()
+	poll_library_changes()
+	if is_artwork_priority_dirty:
+		write_artwork_priority_hint()
+
 	# If no game has been launched, there's nothing to check.
 	if last_launched_game_coords == Vector2i(-1, -1):
 		return
+	# The supervisor reports the exit itself
+	if is_launch_supervised:
+		return
 
 	# 1. Get the category and executable path for the *specific game* that was launched.
 	var category_index = last_launched_game_coords.x
@@ -150,11 +203,247 @@ func _on_process_check_timeout():
 
 	# 5. If the process is NOT running anymore, it means the user closed the game.
 	if not is_running:
-		is_game_running = false
-		# Reset the coordinates to their default "no game launched" state.
-		last_launched_game_coords = Vector2i(-1, -1)
-		# Call the existing update function, which will now hide the icon.
-		update_play_icons()
+		on_game_exited()
+
+func on_game_exited():
+	is_game_running = false
+	is_launch_supervised = false
+	# Reset the coordinates to their default "no game launched" state.
+	last_launched_game_coords = Vector2i(-1, -1)
+	# Call the existing update function, which will now hide the icon.
+	update_play_icons()
+
+# Downloads the artwork the last scan queued, in the background; the menu is reloaded once it finishes.
+func start_artwork_backfill():
+	if artwork_backfill_pid != -1 and OS.is_process_running(artwork_backfill_pid):
+		return
+	var python_executable = emulator_paths.get("python_executable_path", "python")
+	var script_path = ProjectSettings.globalize_path("res://scripts/artwork_backfill.py")
+	if not FileAccess.file_exists(script_path):
+		return
+	write_artwork_priority_hint()
+	var library_abs_path = get_library_path()
+	artwork_backfill_pid = OS.create_process(python_executable, [script_path, "--library", library_abs_path])
+
+# Tells the artwork fetchers which platform is focused, which games are on screen and which were played last.
+func write_artwork_priority_hint():
+	is_artwork_priority_dirty = false
+	if categories.is_empty():
+		return
+	var category_key = categories[current_selection.x]
+	var visible_games = []
+	if category_key != "Settings" and MENU_DATA.has(category_key):
+		var items = MENU_DATA[category_key].get("items", [])
+		var first = max(current_selection.y - 1 - PRIORITY_ITEMS_BEFORE, 0)
+		var last = min(current_selection.y - 1 + PRIORITY_ITEMS_AFTER, items.size() - 1)
+		for i in range(first, last + 1):
+			visible_games.append({"name": items[i].get("name", ""), "path": items[i].get("path", "")})
+	var hint = {"platform": category_key, "visible": visible_games, "recent": recent_games}
+	var file = FileAccess.open(ProjectSettings.globalize_path(ARTWORK_PRIORITY_PATH), FileAccess.WRITE)
+	if file:
+		file.store_string(JSON.stringify(hint))
+		file.close()
+
+func remember_recent_game(game_name: String, game_path: String):
+	for i in range(recent_games.size() - 1, -1, -1):
+		if recent_games[i].get("path", "") == game_path:
+			recent_games.remove_at(i)
+	recent_games.push_front({"name": game_name, "path": game_path})
+	recent_games.resize(min(recent_games.size(), RECENT_GAMES_MAX))
+	is_artwork_priority_dirty = true
+	save_app_settings()
+
+func poll_artwork_backfill():
+	if artwork_backfill_pid == -1 or OS.is_process_running(artwork_backfill_pid):
+		return
+	artwork_backfill_pid = -1
+	# Leave the menu alone while an animation is playing; the icons show up on the next rebuild
+	if is_animating:
+		return
+	load_menu_data()
+	rebuild_xmb_menu()
+
+# (Re)starts the watcher for every platform that has a game directory set.
+func start_scan_watch():
+	stop_scan_watch()
+	var script_path = ProjectSettings.globalize_path("res://scripts/scan_watch.py")
+	if not FileAccess.file_exists(script_path):
+		return
+	var args = [script_path]
+	for platform in SCAN_OUTPUT_NAMES:
+		if emulator_paths.has(platform):
+			var output_path = ProjectSettings.globalize_path("res://scripts/config/").path_join(SCAN_OUTPUT_NAMES[platform])
+			args.append_array(["--platform", platform, emulator_paths[platform], output_path])
+	if args.size() == 1:
+		return
+	args.append_array(["--library", get_library_path(), "--defer-artwork"])
+	var python_executable = emulator_paths.get("python_executable_path", "python")
+	scan_watch_pid = OS.create_process(python_executable, args)
+
+func stop_scan_watch():
+	if scan_watch_pid != -1 and OS.is_process_running(scan_watch_pid):
+		OS.kill(scan_watch_pid)
+	scan_watch_pid = -1
+
+func get_library_modified_time() -> int:
+	var index_path = LIBRARY_DIR.path_join("index.json")
+	if FileAccess.file_exists(index_path):
+		return FileAccess.get_modified_time(index_path)
+	return FileAccess.get_modified_time(MENU_DATA_PATH) if FileAccess.file_exists(MENU_DATA_PATH) else 0
+
+# The watcher merges its rescans into the library; pick them up, and the artwork they queued.
+func poll_library_changes():
+	if is_animating or get_library_modified_time() == library_modified_time:
+		return
+	load_menu_data()
+	rebuild_xmb_menu()
+	start_artwork_backfill()
+
+# Starts the scanner daemon unless it is already running. Returns false if it can't be started.
+func start_scanner_daemon() -> bool:
+	if not scanner_daemon.is_empty() and OS.is_process_running(scanner_daemon["pid"]):
+		return true
+	scanner_daemon = {}
+	var script_path = ProjectSettings.globalize_path("res://scripts/scanner_daemon.py")
+	if not FileAccess.file_exists(script_path):
+		return false
+	var python_executable = emulator_paths.get("python_executable_path", "python")
+	scanner_daemon = OS.execute_with_pipe(python_executable, [script_path])
+	return not scanner_daemon.is_empty()
+
+func stop_scanner_daemon():
+	if scanner_daemon.is_empty():
+		return
+	if OS.is_process_running(scanner_daemon["pid"]):
+		scanner_daemon["stdio"].store_line(JSON.stringify({"jsonrpc": "2.0", "method": "shutdown"}))
+		scanner_daemon["stdio"].flush()
+	scanner_daemon = {}
+
+# Sends one scan to the scanner daemon and waits for the answer. Returns the JSON-RPC response,
+# or {} if the daemon could not be started or went away (the caller then runs the scanner itself).
+func request_daemon_scan(params: Dictionary) -> Dictionary:
+	if not start_scanner_daemon():
+		return {}
+	scanner_request_id += 1
+	var stdio: FileAccess = scanner_daemon["stdio"]
+	stdio.store_line(JSON.stringify({"jsonrpc": "2.0", "id": scanner_request_id, "method": "scan", "params": params}))
+	stdio.flush()
+	while true:
+		var line = stdio.get_line()
+		if line.is_empty() and stdio.get_error() != OK:
+			break
+		var message = JSON.parse_string(line)
+		if typeof(message) == TYPE_DICTIONARY and typeof(message.get("id")) == TYPE_FLOAT and int(message["id"]) == scanner_request_id:
+			return message
+	print("Scanner daemon exited unexpectedly.")
+	scanner_daemon = {}
+	return {}
+
+# Starts the launcher supervisor (a no-op if one is already listening) and connects to it.
+func start_launcher_supervisor():
+	load_launcher_token()
+	var python_executable = emulator_paths.get("python_executable_path", "python")
+	var script_path = ProjectSettings.globalize_path("res://scripts/launcher_supervisor.py")
+	if FileAccess.file_exists(script_path):
+		OS.create_process(python_executable, [script_path, "--port", str(LAUNCHER_PORT),
+			"--token-file", ProjectSettings.globalize_path(LAUNCHER_TOKEN_PATH),
+			"--emulator-config", ProjectSettings.globalize_path(EMULATOR_CONFIG_PATH)])
+	is_launcher_authenticated = false
+	launcher_peer.connect_to_host("127.0.0.1", LAUNCHER_PORT)
+
+func load_launcher_token():
+	if FileAccess.file_exists(LAUNCHER_TOKEN_PATH):
+		launcher_token = FileAccess.get_file_as_string(LAUNCHER_TOKEN_PATH).strip_edges()
+	if launcher_token.is_empty():
+		launcher_token = Crypto.new().generate_random_bytes(32).hex_encode()
+		var file = FileAccess.open(LAUNCHER_TOKEN_PATH, FileAccess.WRITE)
+		if file:
+			file.store_string(launcher_token)
+			file.close()
+
+func is_launcher_connected() -> bool:
+	launcher_peer.poll()
+	var status = launcher_peer.get_status()
+	if status == StreamPeerTCP.STATUS_ERROR or status == StreamPeerTCP.STATUS_NONE:
+		# The supervisor may still have been starting up; try again on the next check
+		launcher_peer.disconnect_from_host()
+		is_launcher_authenticated = false
+		launcher_peer.connect_to_host("127.0.0.1", LAUNCHER_PORT)
+		return false
+	if status != StreamPeerTCP.STATUS_CONNECTED:
+		return false
+	if not is_launcher_authenticated:
+		# The supervisor drops connections whose first request isn't this
+		send_launcher_request("auth", {"token": launcher_token})
+		is_launcher_authenticated = true
+	return true
+
+func send_launcher_request(method: String, params: Dictionary):
+	launcher_request_id += 1
+	var message = {"jsonrpc": "2.0", "id": launcher_request_id, "method": method, "params": params}
+	launcher_peer.put_data((JSON.stringify(message) + "\n").to_utf8_buffer())
+
+# Reads whatever the supervisor sent since the last check, one JSON-RPC message per line.
+func poll_launcher_messages():
+	if not is_launcher_connected():
+		return
+	var available = launcher_peer.get_available_bytes()
+	if available > 0:
+		var chunk = launcher_peer.get_data(available)
+		if chunk[0] == OK:
+			launcher_buffer += chunk[1].get_string_from_utf8()
+	while launcher_buffer.contains("\n"):
+		var newline = launcher_buffer.find("\n")
+		var message = JSON.parse_string(launcher_buffer.substr(0, newline))
+		launcher_buffer = launcher_buffer.substr(newline + 1)
+		if typeof(message) == TYPE_DICTIONARY:
+			handle_launcher_message(message)
+
+func handle_launcher_message(message: Dictionary):
+	var params = message.get("params", {})
+	match message.get("method", ""):
+		"launch.started":
+			print("Launcher: started pid %d in %s ms" % [int(params["pid"]), params["start_ms"]])
+			focus_emulator_window(params.get("platform", ""))
+		"launch.exited":
+			print("Launcher: pid %d exited with code %d after %ss" % [int(params["pid"]), int(params["exit_code"]), params["runtime_s"]])
+			if is_launch_supervised:
+				on_game_exited()
+	if message.has("error"):
+		print("Launcher error: ", message["error"].get("message", ""))
+		if is_launch_supervised:
+			on_game_exited()
+
+# Waits in the background for the emulator's window to show up and focuses it.
+func focus_emulator_window(category_key: String):
+	if not EMULATOR_WINDOW_TITLES.has(category_key):
+		return
+	var python_executable = emulator_paths.get("python_executable_path", "python")
+	var script_path = ProjectSettings.globalize_path("res://scripts/focus_window.py")
+	OS.create_process(python_executable, [script_path, EMULATOR_WINDOW_TITLES[category_key], "--wait", str(FOCUS_WAIT_SECONDS)])
+
+# Sends the launch to the supervisor, which picks the emulator flags from its template table.
+func request_supervised_launch(category_key: String, game_path: String, game_id: String) -> int:
+	var emulator_exec_key = category_key + "_EXEC"
+	if not emulator_paths.has(emulator_exec_key):
+		print("Error: %s emulator executable path is not set in Settings." % category_key)
+		return FAILED
+	if category_key == "Playstation 3" and game_id.is_empty():
+		print("Error: Game ID not found for the selected PS3 game. Cannot launch.")
+		return FAILED
+
+	print("--- Godot: Launching %s Game via the launcher supervisor ---" % category_key)
+	# The supervisor looks the emulator up in emulator_paths.cfg itself
+	var params = {
+		"platform": category_key,
+		"game_path": game_path,
+		"requested_at": Time.get_unix_time_from_system()
+	}
+	if not game_id.is_empty():
+		params["game_id"] = game_id
+	send_launcher_request("launch", params)
+	is_launch_supervised = true
+	return OK
 
 
 # Helper function that checks if a process is running on Windows.
@@ -198,7 +487,9 @@ func load_menu_data():
 	}
 
 	var game_data = {}
-	if not FileAccess.file_exists(MENU_DATA_PATH):
+	if FileAccess.file_exists(LIBRARY_DIR.path_join("index.json")):
+		game_data = load_library_index()
+	elif not FileAccess.file_exists(MENU_DATA_PATH):
 		print("menu_data.json not found, creating a default one.")
 		game_data = {
 			"Switch": { "icon_path": "res://src/icons/platform/icon_switch.svg", "items": [] },
@@ -228,6 +519,85 @@ func load_menu_data():
 	
 	MENU_DATA = game_data
 	MENU_DATA["Settings"] = settings_data
+	# With the sharded library only the platform being browsed is read
+	var category_keys = MENU_DATA.keys()
+	ensure_category_loaded(category_keys[clamp(current_selection.x, 0, category_keys.size() - 1)])
+	library_modified_time = get_library_modified_time()
+
+# Where the scanners merge their results: the sharded library if there is one, else menu_data.json.
+func get_library_path() -> String:
+	if FileAccess.file_exists(LIBRARY_DIR.path_join("index.json")):
+		return ProjectSettings.globalize_path(LIBRARY_DIR)
+	return ProjectSettings.globalize_path(MENU_DATA_PATH)
+
+# Reads the sharded library's index; a platform's games are loaded when it is first browsed.
+func load_library_index() -> Dictionary:
+	var game_data = {}
+	var index = JSON.parse_string(FileAccess.get_file_as_string(LIBRARY_DIR.path_join("index.json")))
+	if typeof(index) != TYPE_DICTIONARY:
+		print("Error parsing the library index in ", LIBRARY_DIR)
+		return game_data
+	var platforms = index.get("platforms", {})
+	for platform in platforms:
+		var section = platforms[platform].get("section", {}).duplicate()
+		section["items"] = []
+		section["shards"] = platforms[platform].get("shards", [])
+		section["runs"] = platforms[platform].get("runs", [])
+		game_data[platform] = section
+	return game_data
+
+# Loads a platform's shards if that hasn't happened yet. Returns true if it did.
+func ensure_category_loaded(category_key: String) -> bool:
+	var section = MENU_DATA.get(category_key)
+	if typeof(section) != TYPE_DICTIONARY or not section.has("shards"):
+		return false
+	var shard_items = []
+	for shard_info in section["shards"]:
+		shard_items.append(load_library_shard(LIBRARY_DIR.path_join(shard_info.get("file", ""))))
+	# "runs" says how the shards interleave in library order, [shard number, count] at a time
+	var cursors = []
+	cursors.resize(shard_items.size())
+	cursors.fill(0)
+	var items = []
+	for run in section["runs"]:
+		if typeof(run) != TYPE_ARRAY or run.size() < 2:
+			continue
+		var number = int(run[0])
+		if number < 0 or number >= shard_items.size():
+			continue
+		var taken = shard_items[number].slice(cursors[number], cursors[number] + int(run[1]))
+		items.append_array(taken)
+		cursors[number] += taken.size()
+	for number in shard_items.size():
+		items.append_array(shard_items[number].slice(cursors[number]))
+	section["items"] = items
+	section.erase("shards")
+	section.erase("runs")
+	return true
+
+# One shard's items with their shared game directory and icon directory put back in front.
+# Icons kept in the shard's icon_dir are stored as "icon_file"; version 1 shards used a relative icon_path.
+func load_library_shard(shard_path: String) -> Array:
+	var shard = JSON.parse_string(FileAccess.get_file_as_string(shard_path))
+	if typeof(shard) != TYPE_DICTIONARY:
+		print("Error reading library shard ", shard_path)
+		return []
+	var root = shard.get("root", "")
+	var icon_dir = shard.get("icon_dir", "")
+	var legacy = int(shard.get("version", 1)) < 2
+	var items = []
+	for entry in shard.get("items", []):
+		var item = entry.duplicate()
+		if typeof(entry.get("path")) == TYPE_STRING:
+			item["path"] = root + entry["path"]
+		var icon = entry.get("icon_path")
+		if entry.has("icon_file"):
+			item["icon_path"] = icon_dir + str(item["icon_file"])
+			item.erase("icon_file")
+		elif legacy and icon_dir != "" and typeof(icon) == TYPE_STRING and icon.is_relative_path():
+			item["icon_path"] = icon_dir + icon
+		items.append(item)
+	return items
 
 func save_emulator_paths():
 	var config = ConfigFile.new()
@@ -261,6 +631,8 @@ func save_app_settings():
 	# Display
 	config.set_value("display", "mode", DisplayServer.window_get_mode())
 	config.set_value("display", "borderless", DisplayServer.window_get_flag(DisplayServer.WINDOW_FLAG_BORDERLESS))
+	# Library
+	config.set_value("library", "recent_games", recent_games)
 	config.save(APP_CONFIG_PATH)
 
 func load_app_settings():
@@ -284,6 +656,8 @@ func load_app_settings():
 	master_volume_db = config.get_value("audio", "master_volume_db", 0.0)
 	# Apply the loaded volume to the master audio bus (bus 0)
 	AudioServer.set_bus_volume_db(0, master_volume_db)
+	
+	recent_games = config.get_value("library", "recent_games", [])
 
 # --- 4. INPUT & NAVIGATION --- 
 
@@ -326,6 +700,8 @@ func move_selection(direction: Vector2i):
 	if direction.x != 0: new_selection.y = 0 
 	
 	var category_key = categories[new_selection.x] 
+	if ensure_category_loaded(category_key):
+		rebuild_xmb_menu()
 	var item_count = main_settings_items.size() if category_key == "Settings" else MENU_DATA[category_key]["items"].size() 
 	new_selection.y = clamp(new_selection.y, 0, item_count) 
 	
@@ -335,6 +711,7 @@ func move_selection(direction: Vector2i):
 		animate_to_selection() 
 		update_item_visibility() 
 		update_selection_highlight() 
+		is_artwork_priority_dirty = true
 
 func move_settings_selection(direction: Vector2i): 
 	var container 
@@ -583,6 +960,9 @@ func _on_python_path_selected(path: String):
 	emulator_paths["python_executable_path"] = path
 	save_emulator_paths()
 	print("Python executable path saved: ", path)
+	if not is_launcher_connected():
+		start_launcher_supervisor()
+	start_scan_watch()
 
 func apply_background_settings(image_path: String = ""): 
 	if image_path: 
@@ -616,6 +996,7 @@ func _on_emulator_dir_selected(path: String):
 	# IMPORTANT: Only trigger the game scan for game directories, not executables.
 	if current_emulator_selection == "Switch" or current_emulator_selection == "Wii" or current_emulator_selection == "Playstation 3":
 		generate_game_list_for_emulator(current_emulator_selection, path)
+		start_scan_watch()
 	
 func update_selection_highlight():
 	# Stop and clear any existing glow animation to prevent conflicts
@@ -779,6 +1160,9 @@ func _execute_game_launch(category_key: String, game_path: String) -> int:
 		print("Error: Could not find the selected game node.")
 		return FAILED
 
+	if is_launcher_connected():
+		return request_supervised_launch(category_key, game_path, game_node.get_meta("game_id", ""))
+
 	match category_key:
 		"Switch":
 			var python_executable = emulator_paths.get("python_executable_path", "python")
@@ -904,6 +1288,7 @@ func play_launch_animation_and_run_game(node: Control, category_key: String):
 	var original_icon: TextureRect = node.get_node("Icon")
 	var original_label: Label = node.get_node("Label")
 	var game_path = node.get_meta("game_path")
+	remember_recent_game(original_label.text, game_path)
 
 	# 3. Setup the animation overlay
 	animated_icon.texture = original_icon.texture
@@ -1108,114 +1493,37 @@ func generate_game_list_for_emulator(emulator_name: String, emu_path: String):
 
 	var output_json_abs_path = ProjectSettings.globalize_path("res://scripts/config/").path_join(output_json_name)
 	# For PS3, the script needs the directory containing games.yml. For others, it's the game directory.
-	var command_to_run = '"%s" "%s" "%s" "%s"' % [python_executable, script_abs_path, emu_path, output_json_abs_path]
-	var cmd_args = ["/c", command_to_run]
-	
-	var output = []
-	var exit_code = OS.execute("cmd.exe", cmd_args, output, true)
-	
-	if exit_code != 0:
-		print("Error: Python script for %s failed with exit code %s." % [emulator_name, exit_code])
-		print("Executed command: ", command_to_run)
-		print("Python output: ", "\n".join(output))
-		return
-	
-	print("Python script executed successfully.")
-	
-	if not FileAccess.file_exists(output_json_abs_path):
-		print("Error: Python script finished, but the output JSON was not found at %s" % output_json_abs_path)
+	# The scanner merges its result into menu_data.json itself (see scripts/library_merge.py)
+	var library_abs_path = get_library_path()
+	# Missing artwork is queued instead of downloaded, so the menu comes back right away
+	var response = request_daemon_scan({
+		"platform": emulator_name,
+		"config_dir": emu_path,
+		"output_file": output_json_abs_path,
+		"library": library_abs_path,
+		"defer_artwork": true
+	})
+	if response.has("error"):
+		print("Error: Scan for %s failed: %s" % [emulator_name, response["error"].get("message", "")])
 		return
+	if response.is_empty():
+		# No daemon; run the scanner on its own like before
+		var command_to_run = '"%s" "%s" "%s" "%s" --library "%s" --defer-artwork' % [python_executable, script_abs_path, emu_path, output_json_abs_path, library_abs_path]
+		var cmd_args = ["/c", command_to_run]
 		
-	var file = FileAccess.open(output_json_abs_path, FileAccess.READ)
-	var content = file.get_as_text()
-	file.close()
-	
-	var json = JSON.new()
-	var error = json.parse(content)
-	
-	if error != OK:
-		print("Error: Could not parse the JSON file created by the Python script.")
-		return
+		var output = []
+		var exit_code = OS.execute("cmd.exe", cmd_args, output, true)
 		
-	var json_data = json.data
-	var game_items = []
-
-	if typeof(json_data) == TYPE_DICTIONARY:
-		for base_path in json_data.keys():
-			var file_list = json_data[base_path]
-			if typeof(file_list) == TYPE_ARRAY:
-				for game_object in file_list:
-					if typeof(game_object) == TYPE_DICTIONARY:
-						var game_dict = {}
-						# --- START: UPDATED PARSING LOGIC ---
-						# Handle PS3 format from read_config_ps3.py
-						if game_object.has("name") and game_object.has("path"):
-							game_dict = {
-								"name": game_object["name"],
-								"path": game_object["path"],
-								"icon_path": game_object.get("icon_path", "res://icon.svg"),
-								"id": game_object.get("id", "") # Get the game ID
-							}
-						# Handle existing Switch/Wii format
-						elif game_object.has("filename"):
-							var filename = game_object["filename"]
-							game_dict = {
-								"name": filename,
-								"path": base_path.path_join(filename),
-								"icon_path": game_object.get("icon_path", "res://icon.svg"),
-								"id": "" # No ID for these
-							}
-						# --- END: UPDATED PARSING LOGIC ---
-						
-						if not game_dict.is_empty():
-							game_items.append(game_dict)
-	else:
-		print("Error: The JSON from the Python script is not a dictionary as expected.")
-		return
-
-	print("Found %d games for %s from script output." % [game_items.size(), emulator_name])
-	
-	# --- THIS LOGIC REMAINS THE SAME ---
-	var category_icon_path = MENU_DATA.get(emulator_name, {}).get("icon_path", "res://icon.svg")
-
-	if not MENU_DATA.has(emulator_name):
-		MENU_DATA[emulator_name] = {}
-		
-	MENU_DATA[emulator_name]["icon_path"] = category_icon_path
-	MENU_DATA[emulator_name]["items"] = game_items
-	
-	var data_to_save = MENU_DATA.duplicate()
-	data_to_save.erase("Settings")
-	save_game_data_to_json(data_to_save)
-	
-	rebuild_xmb_menu()
-	
-	# The redundant block that was causing the issue has been removed.
-	
-	# --- END: NEW AND CORRECTED LOGIC ---
-	
-	var game_data = {}
-	if FileAccess.file_exists(MENU_DATA_PATH):
-		var game_file = FileAccess.open(MENU_DATA_PATH, FileAccess.READ)
-		var game_content = game_file.get_as_text().strip_edges()
-		if not game_content.is_empty():
-			var game_json = JSON.new()
-			if game_json.parse(game_content) == OK:
-				game_data = game_json.data
+		if exit_code != 0:
+			print("Error: Python script for %s failed with exit code %s." % [emulator_name, exit_code])
+			print("Executed command: ", command_to_run)
+			print("Python output: ", "\n".join(output))
+			return
 	
-	var icon = "res://icon.svg"
-	if emulator_name == "Switch":
-		icon = "res://src/icons/platform/icon_switch.svg"
-	elif emulator_name == "Wii":
-		icon = "res://src/icons/platform/icon_wii.svg"
-	elif emulator_name == "Playstation 3":
-		icon = "res://src/icons/platform/icon_ps3.svg"
-		
-	game_data[emulator_name] = {
-		"icon_path": icon,
-		"items": game_items
-	}
-	save_game_data_to_json(game_data)
+	print("Python script executed successfully.")
 	
+	# menu_data.json now holds the merged library; only the menu needs rebuilding
 	load_menu_data()
+	print("Loaded %d games for %s." % [MENU_DATA.get(emulator_name, {}).get("items", []).size(), emulator_name])
 	rebuild_xmb_menu()
+	start_artwork_backfill()
@@ -0,0 +1,424 @@
+# In res://scripts/artwork.py
+
+# requests, dotenv and the SQLite cache are imported on first use, so scans
+# that never need artwork (missing config, nothing found) start fast.
+
+import os
+import re
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from urllib.parse import quote
+
+import scan_metrics
+
+# Can point at a local stub server for testing and benchmarks
+STEAMGRIDDB_API_URL = os.getenv("XMB_STEAMGRIDDB_API_URL", "https://www.steamgriddb.com/api/v2")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+ICON_SAVE_DIR = os.path.join(MEDIA_DIR, 'icon')
+
+# Number of games resolved at the same time. Every worker does its own
+# search -> icon list -> download chain, so keep this small enough to be
+# polite to SteamGridDB.
+ARTWORK_WORKERS = int(os.getenv("XMB_ARTWORK_WORKERS", "8"))
+
+_session = None
+_api_key = None
+_api_key_lock = threading.Lock()
+
+
+def get_api_key():
+    """Loads the SteamGridDB API key from the environment or .env the first time it is needed."""
+    global _api_key
+    with _api_key_lock:
+        if _api_key is None:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _api_key = os.getenv("STEAMGRIDDB_API_KEY") or ""
+            if _api_key:
+                logging.info("API key loaded successfully!")
+            else:
+                logging.warning("Could not load SteamGridDB API key. Make sure it's set in your .env file.")
+    return _api_key
+
+
+def has_api_key():
+    """True if a SteamGridDB API key (other than the .env template's placeholder) is configured."""
+    api_key = get_api_key()
+    return bool(api_key) and api_key != "YOUR_API_KEY_HERE"
+
+
+def get_session(pool_size=ARTWORK_WORKERS):
+    """Returns the shared keep-alive session used for all artwork requests."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+
+def clean_search_name(game_filename):
+    """Strips [tags], (regions) and the extension to get a search term."""
+    return re.sub(r'\[.*?\]|\(.*?\)|\..*$', '', game_filename).strip()
+
+
+def default_icon_name(game_filename):
+    """Icons of Switch/Wii games are named after the file, without folders and extension."""
+    return os.path.splitext(os.path.basename(game_filename))[0]
+
+
+def icon_path_for(icon_name):
+    safe_filename = re.sub(r'[<>:"/\\|?*]', '_', icon_name)
+    return os.path.join(ICON_SAVE_DIR, f"{safe_filename}.png")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_intact(path, download):
+    """True if path still holds exactly what was downloaded (same size and SHA-256)."""
+    try:
+        return os.path.getsize(path) == download["size"] and _file_sha256(path) == download["sha256"]
+    except OSError:
+        return False
+
+
+def atomic_copy(source, target):
+    """Copies source to target through a temporary file, so target is never half written."""
+    target_dir = os.path.dirname(target) or '.'
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=target_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f, open(source, 'rb') as src:
+            shutil.copyfileobj(src, f)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _download_icon(session, icon_url, local_icon_path, cache=None):
+    """
+    Downloads icon_url to local_icon_path and returns the path for Godot.
+
+    If the file was downloaded from the same URL before and is still intact, the
+    request carries If-None-Match / If-Modified-Since and a 304 keeps the file as it
+    is. A new body is written to a temporary file, checked against Content-Length,
+    and only then renamed over the icon, so a failed download never leaves a
+    truncated icon behind.
+    """
+    import requests
+
+    headers = {}
+    known = cache.download_info(local_icon_path) if cache is not None else None
+    if known and known["url"] == icon_url and _is_intact(local_icon_path, known):
+        if known["etag"]:
+            headers['If-None-Match'] = known["etag"]
+        if known["last_modified"]:
+            headers['If-Modified-Since'] = known["last_modified"]
+
+    with session.get(icon_url, stream=True, headers=headers) as image_res:
+        if image_res.status_code == 304 and headers:
+            scan_metrics.count("artwork.not_modified")
+            logging.info(f"  -> Icon unchanged on the server: {local_icon_path}")
+            return local_icon_path.replace('\\', '/')
+        image_res.raise_for_status()
+
+        os.makedirs(ICON_SAVE_DIR, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=ICON_SAVE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in image_res.iter_content(chunk_size=8192):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            expected_size = image_res.headers.get('Content-Length')
+            if expected_size and not image_res.headers.get('Content-Encoding') and int(expected_size) != size:
+                raise requests.exceptions.ContentDecodingError(
+                    f"Icon download ended after {size} of {expected_size} bytes"
+                )
+            os.replace(tmp_path, local_icon_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    scan_metrics.count("artwork.downloads")
+    scan_metrics.count("artwork.bytes_downloaded", size)
+    if cache is not None:
+        cache.store_download(local_icon_path, icon_url, image_res.headers.get('ETag'),
+                             image_res.headers.get('Last-Modified'), digest.hexdigest(), size)
+    logging.info(f"  -> Icon saved to: {local_icon_path}")
+    # The local path is returned with forward slashes for Godot
+    return local_icon_path.replace('\\', '/')
+
+
+def _icon_from_cache(cached, local_icon_path, cache=None):
+    """Reuses a previously downloaded icon without touching the network."""
+    cached_path = cached.get("icon_path")
+    if not cached_path or not os.path.isfile(cached_path):
+        return None
+    download = cache.download_info(cached_path) if cache is not None else None
+    if download is not None and not _is_intact(cached_path, download):
+        # Damaged or changed since it was downloaded, fetch it again
+        return None
+
+    if os.path.normcase(os.path.abspath(cached_path)) != os.path.normcase(os.path.abspath(local_icon_path)):
+        # Another file with the same search name already has this icon,
+        # copy it so the game still gets its own '<icon_name>.png'.
+        if not os.path.isfile(local_icon_path):
+            atomic_copy(cached_path, local_icon_path)
+
+    return local_icon_path.replace('\\', '/')
+
+
+def _best_match(results, search_term):
+    """Prefers a result whose name matches the search term exactly over the first hit."""
+    wanted = search_term.casefold()
+    for result in results:
+        if str(result.get('name', '')).casefold() == wanted:
+            return result
+    return results[0]
+
+
+def artwork_cache_key(game_filename, identity=None):
+    """
+    Returns (search term, artwork cache key) for a game: the identity's title and
+    stable key when there is one, else the cleaned-up filename for both.
+    """
+    # Games found in sub-folders come as 'USA/Game.iso', only the file name is searched for
+    clean_name = clean_search_name(os.path.basename(game_filename))
+    if identity and identity.get("title"):
+        clean_name = identity["title"]
+    return clean_name, identity["key"] if identity else clean_name
+
+
+def get_game_artwork(game_filename, icon_name=None, session=None, cache=None, identity=None, offline=False):
+    """
+    Searches SteamGridDB for a game's icon, downloads it, and returns the local path.
+    The icon is saved as '<icon_name>.png', which defaults to the filename without extension.
+    Results (including misses) are remembered in the artwork cache, so a rescan
+    of an unchanged library makes no API calls.
+
+    With an identity from game_id.py the cache is keyed on its stable key and the
+    internal title is searched for instead of the cleaned-up filename. session is a
+    RequestScheduler (one is made if not given), so requests are rate limited and retried.
+    A game the offline title database (title_db.py) knows the SteamGridDB id of skips
+    the search request. With offline=True only the cache is consulted.
+    """
+    game_filename = os.path.basename(game_filename)
+    filename_term = clean_search_name(game_filename)
+    clean_name, cache_key = artwork_cache_key(game_filename, identity)
+    if not clean_name:
+        return None
+
+    if icon_name is None:
+        icon_name = os.path.splitext(game_filename)[0]
+    if cache is None:
+        from artwork_cache import get_cache
+        cache = get_cache()
+    local_icon_path = icon_path_for(icon_name)
+
+    cached = cache.lookup(cache_key)
+    if cached is None and filename_term and cache_key != filename_term:
+        # Entries from before games were identified are keyed by the cleaned filename
+        cached = cache.lookup(filename_term)
+    if cached is not None:
+        if not cached["found"]:
+            scan_metrics.count("cache.negative_hits")
+            logging.info(f"  -> Cached miss for '{clean_name}', skipping search.")
+            return None
+        icon_path = _icon_from_cache(cached, local_icon_path, cache)
+        if icon_path:
+            scan_metrics.count("cache.hits")
+            return icon_path
+    scan_metrics.count("cache.misses")
+    if offline:
+        return None
+
+    if not has_api_key():
+        logging.warning("SteamGridDB API Key is not set. Skipping icon search.")
+        return None
+    api_key = get_api_key()
+
+    import requests
+    from request_scheduler import RequestScheduler, BudgetExceeded
+
+    if session is None:
+        session = RequestScheduler(get_session())
+    headers = {'Authorization': f'Bearer {api_key}'}
+    from title_db import get_title_db
+    titles = get_title_db()
+
+    try:
+        if cached is not None and cached["icon_url"]:
+            # The icon file went missing or is damaged, but we still know where it lives.
+            logging.info(f"  -> Re-downloading cached artwork for '{clean_name}'...")
+            icon_path = _download_icon(session, cached["icon_url"], local_icon_path, cache)
+            cache.store_hit(cache_key, cached["game_id"], cached["icon_url"], icon_path)
+            return icon_path
+
+        known = titles.resolve(identity, clean_name)
+        if known and known["sgdb_id"]:
+            scan_metrics.count("titles.hits")
+            game_id = known["sgdb_id"]
+            logging.info(f"  -> '{known['name'] or clean_name}' is in the title database, fetching its icons...")
+        else:
+            if known and known["name"]:
+                # The canonical name finds the right game more often than a header or file name
+                clean_name = known["name"]
+            logging.info(f"  -> Searching artwork for '{clean_name}'...")
+            search_res = session.get(f"{STEAMGRIDDB_API_URL}/search/autocomplete/{quote(clean_name, safe='')}",
+                                     headers=headers)
+            search_res.raise_for_status()
+            search_data = search_res.json()
+
+            if not (search_data.get('success') and search_data.get('data')):
+                logging.warning(f"  -> No results found in API for '{clean_name}'.")
+                cache.store_miss(cache_key)
+                return None
+
+            game_id = _best_match(search_data['data'], clean_name)['id']
+            if identity:
+                # Only a header title is a canonical name; for a game known by its file name just the id is kept
+                titles.remember_sgdb_id(identity, identity.get("title"), game_id)
+
+        icon_res = session.get(f"{STEAMGRIDDB_API_URL}/icons/game/{game_id}", headers=headers)
+        icon_res.raise_for_status()
+        icon_data = icon_res.json()
+
+        if not (icon_data.get('success') and icon_data.get('data')):
+            logging.warning(f"  -> No icons found in API for '{clean_name}'.")
+            cache.store_miss(cache_key, game_id)
+            return None
+
+        icon_url = icon_data['data'][0]['url']
+        icon_path = _download_icon(session, icon_url, local_icon_path, cache)
+        cache.store_hit(cache_key, game_id, icon_url, icon_path)
+        return icon_path
+
+    except BudgetExceeded:
+        # Logged once by the scheduler; the game is tried again by the next scan
+        scan_metrics.count("artwork.budget_skipped")
+    except requests.exceptions.RequestException as e:
+        # Network trouble is not cached, the next scan simply tries again.
+        scan_metrics.count("artwork.errors")
+        logging.error(f"  -> API request or download failed for '{clean_name}': {e}")
+    except (IndexError, KeyError):
+        logging.warning(f"  -> No results found in API for '{clean_name}'.")
+        cache.store_miss(cache_key)
+
+    return None
+
+
+def fetch_artwork_batch(game_filenames, icon_name_for=None, max_workers=ARTWORK_WORKERS, on_result=None,
+                        identities=None, platform=None, hints=None):
+    """
+    Resolves artwork for a whole list of games at once on a bounded set of worker threads.
+    Returns a dict mapping each game filename to its local icon path (or None).
+    If given, on_result(game_filename, icon_path) is called from the calling thread
+    as soon as each game's artwork is resolved. identities maps game filenames to
+    what game_id.py found out about them.
+
+    Games are handed to the workers in the order the launcher's priority hint asks
+    for (see artwork_priority.py; platform is the platform they belong to), and a
+    hint that changes while the batch runs reorders the games still waiting.
+
+    Games that would be saved under the same icon name (e.g. 'Game.nsp' and
+    'Game.xci') are only looked up once, so two workers never write the same file.
+    """
+    if icon_name_for is None:
+        icon_name_for = default_icon_name
+    if identities is None:
+        identities = {}
+
+    jobs = {}
+    for game_filename in game_filenames:
+        jobs.setdefault(icon_name_for(game_filename), []).append(game_filename)
+
+    if not jobs:
+        return {}
+
+    import queue
+    from artwork_cache import get_cache
+    from artwork_priority import ArtworkWorkQueue
+
+    from request_scheduler import RequestScheduler
+
+    # One scheduler per batch: the rate limit is shared process-wide, the request budget is per scan
+    session = RequestScheduler(get_session(max_workers))
+    cache = get_cache()
+    work = ArtworkWorkQueue({icon_name: (platform, [icon_name] + names) for icon_name, names in jobs.items()}, hints)
+    scan_metrics.count("artwork.prioritized", work.prioritized())
+    done = queue.Queue()
+    results = {}
+    logging.info(f"Fetching artwork for {len(jobs)} games with {max_workers} workers...")
+
+    def worker():
+        # Every game taken posts a result and every worker posts None when it stops,
+        # so the loop below can't wait for something that never comes
+        try:
+            while True:
+                icon_name = work.pop()
+                if icon_name is None:
+                    return
+                icon_path = None
+                try:
+                    names = jobs[icon_name]
+                    icon_path = get_game_artwork(names[0], icon_name, session, cache, identities.get(names[0]))
+                except Exception as e:
+                    logging.error(f"  -> Artwork worker failed for '{icon_name}': {e}")
+                finally:
+                    done.put((icon_name, icon_path))
+        except Exception as e:
+            logging.error(f"  -> Artwork worker stopped: {e}")
+        finally:
+            done.put(None)
+
+    workers = [threading.Thread(target=scan_metrics.bind(worker), daemon=True)
+               for _ in range(max(min(max_workers, len(jobs)), 1))]
+    for thread in workers:
+        thread.start()
+    remaining, running = len(jobs), len(workers)
+    while remaining and running:
+        item = done.get()
+        if item is None:
+            running -= 1
+            continue
+        icon_name, icon_path = item
+        remaining -= 1
+        for game_filename in jobs[icon_name]:
+            results[game_filename] = icon_path
+            if on_result is not None:
+                on_result(game_filename, icon_path)
+    for thread in workers:
+        thread.join()
+    for game_filename in game_filenames:
+        results.setdefault(game_filename, None)
+
+    logging.info(f"Artwork batch done: {session.sent} requests, {session.retried} retries.")
+    if session.refused:
+        skipped = sum(1 for icon_path in results.values() if icon_path is None)
+        logging.warning(f"Artwork request budget of {session.budget} ran out: up to {skipped} games were left "
+                        f"without artwork and are looked up on the next scan "
+                        f"(raise XMB_ARTWORK_BUDGET to do more per scan).")
+    return results
\ No newline at end of file
@@ -0,0 +1,188 @@
+# In res://scripts/artwork_backfill.py
+#
+# Drains the deferred artwork queue (see artwork_queue.py). Jobs are claimed in
+# small batches, games the launcher is showing first (see artwork_priority.py),
+# and looked up on SteamGridDB with at most --workers requests in flight; every
+# icon found is written back into the scan output the job came from (and, with
+# --library, merged into menu_data.json).
+#
+# Without an API key or a connection to SteamGridDB nothing is claimed and the
+# jobs stay queued for the next run. A job whose lookup fails on the network is
+# retried later with a growing delay, a limited number of times (see
+# artwork_queue.py); a game SteamGridDB has nothing for is dropped.
+# The queue lives on disk, so a backfill that is stopped half-way resumes
+# where it left off.
+#
+# Usage: python artwork_backfill.py [--workers 4] [--limit N] [--library MENU_DATA]
+
+import os
+import json
+import socket
+import logging
+import argparse
+from urllib.parse import urlsplit
+
+from artwork import STEAMGRIDDB_API_URL, fetch_artwork_batch, has_api_key
+from artwork_queue import ArtworkQueue, known_miss
+from artwork_priority import PriorityHints
+from icon_pipeline import add_tile_paths
+from file_lock import locked, temp_path_for
+from library_merge import merge_into_library
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Small, so a new priority hint takes effect soon
+BATCH_SIZE = 16
+PROBE_TIMEOUT = 3.0
+
+
+def setup_logging():
+    """Configures logging to write to a file."""
+    log_file_path = os.path.join(SCRIPT_DIR, 'python_scanner.log')
+    logging.basicConfig(
+        filename=log_file_path,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
+
+def api_reachable(api_url=STEAMGRIDDB_API_URL, timeout=PROBE_TIMEOUT):
+    """A cheap check that the SteamGridDB host accepts connections at all."""
+    url = urlsplit(api_url)
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        with socket.create_connection((url.hostname, port), timeout=timeout):
+            return True
+    except OSError as e:
+        logging.info(f"SteamGridDB at {url.hostname}:{port} is not reachable: {e}")
+        return False
+
+
+def _records_to_update(data, match_field):
+    """Every game record in a full ({root: [records]}) or delta ({"added": {root: [...]}, ...}) scan output."""
+    if isinstance(data, dict) and set(data) == {"added", "changed", "removed"}:
+        sections = [data["added"], data["changed"]]
+    else:
+        sections = [data]
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        for records in section.values():
+            if isinstance(records, list):
+                for record in records:
+                    if isinstance(record, dict) and match_field in record:
+                        yield record
+
+
+def write_back(output_file, match_field, icon_paths):
+    """
+    Sets icon_path (and the tile) on the records in output_file whose match_field is in icon_paths.
+    Returns the scan data if the file changed, else None.
+    """
+    # Held from the read to the write: a rescan may be rewriting the same file
+    with locked(output_file):
+        try:
+            with open(output_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logging.warning(f"  -> Scan output '{output_file}' is gone, nothing to update.")
+            return None
+        except ValueError:
+            logging.warning(f"  -> '{output_file}' is not a JSON scan output (streamed?), not updating it.")
+            return None
+
+        updated = []
+        for record in _records_to_update(data, match_field):
+            icon_path = icon_paths.get(record[match_field])
+            if icon_path and record.get("icon_path") != icon_path:
+                record["icon_path"] = icon_path
+                updated.append(record)
+        if not updated:
+            return None
+
+        add_tile_paths(updated)
+        tmp_path = temp_path_for(output_file)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, output_file)
+        logging.info(f"  -> Wrote {len(updated)} new icons into '{output_file}'")
+        return data
+
+
+def backfill(queue, max_workers=4, limit=None, library=None):
+    """Works through the due jobs. Returns {"done", "retry", "failed", "updated_files"}."""
+    summary = {"done": 0, "retry": 0, "failed": 0, "updated_files": []}
+    if not has_api_key():
+        # Every lookup would fail the same way; the jobs wait for a key instead of using up their attempts
+        logging.info(f"No SteamGridDB API key, leaving the artwork queue as it is: {queue.counts()}")
+        return summary
+    if not api_reachable():
+        logging.info(f"Offline, leaving the artwork queue as it is: {queue.counts()}")
+        return summary
+
+    from artwork_cache import get_cache
+
+    cache = get_cache()
+    hints = PriorityHints()
+    handled = 0
+    while limit is None or handled < limit:
+        size = BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - handled)
+        jobs = queue.claim(size, hints)
+        if not jobs:
+            break
+        handled += len(jobs)
+
+        by_output = {}
+        for job in jobs:
+            by_output.setdefault((job["platform"], job["output_file"], job["match_field"]), []).append(job)
+
+        for (platform, output_file, match_field), output_jobs in by_output.items():
+            icon_names = {job["game_name"]: job["icon_name"] for job in output_jobs}
+            identities = {job["game_name"]: job["identity"] for job in output_jobs if job["identity"]}
+            icon_paths = fetch_artwork_batch(list(icon_names), icon_name_for=icon_names.get, max_workers=max_workers,
+                                             identities=identities, platform=platform, hints=hints)
+
+            finished = []
+            for job in output_jobs:
+                if icon_paths.get(job["game_name"]) or known_miss(cache, job["game_name"], job["identity"]):
+                    finished.append(job["id"])
+                elif queue.retry_later(job, "lookup failed"):
+                    summary["retry"] += 1
+                else:
+                    summary["failed"] += 1
+            queue.finish(finished)
+            summary["done"] += len(finished)
+
+            data = write_back(output_file, match_field, icon_paths)
+            if data is not None:
+                summary["updated_files"].append(output_file)
+                if library:
+                    merge_into_library(library, platform, data)
+
+    logging.info(f"Artwork backfill: {summary['done']} done, {summary['retry']} to retry, "
+                 f"{summary['failed']} failed, queue now {queue.counts()}")
+    return summary
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Downloads the artwork that scans with --defer-artwork queued.")
+    parser.add_argument("--workers", type=int, default=4, help="How many lookups may run at the same time.")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many jobs.")
+    parser.add_argument("--library", metavar="MENU_DATA",
+                        help="Also merge the updated scan outputs into this menu_data.json.")
+    args = parser.parse_args()
+
+    logging.info("--- Artwork Backfill Starting ---")
+    queue = ArtworkQueue()
+    try:
+        summary = backfill(queue, max(args.workers, 1), args.limit, args.library)
+    finally:
+        queue.close()
+    print(json.dumps(summary))
+    logging.info("--- Artwork Backfill Finished ---")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+# In res://scripts/artwork_cache.py
+
+import os
+import time
+import sqlite3
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+CACHE_PATH = os.path.join(MEDIA_DIR, 'artwork_cache.sqlite3')
+
+# How long a "no artwork found" answer is trusted before the title is searched again.
+MISS_TTL_SECONDS = float(os.getenv("XMB_ARTWORK_MISS_TTL", str(7 * 24 * 60 * 60)))
+
+
+class ArtworkCache:
+    """
+    On-disk cache of SteamGridDB lookups, keyed by the cleaned search name.
+    Hits remember the game id, icon URL and the local icon file; misses are
+    stored too and expire after miss_ttl seconds. For every downloaded icon file
+    it also keeps the HTTP validators and the SHA-256 of what was written.
+    """
+
+    def __init__(self, path=CACHE_PATH, miss_ttl=MISS_TTL_SECONDS):
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS artwork (
+                clean_name TEXT PRIMARY KEY,
+                found INTEGER NOT NULL,
+                game_id INTEGER,
+                icon_url TEXT,
+                icon_path TEXT,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS downloads (
+                icon_path TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def lookup(self, clean_name):
+        """Returns the cached entry as a dict, or None if unknown or an expired miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT found, game_id, icon_url, icon_path, updated_at FROM artwork WHERE clean_name = ?",
+                (clean_name,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        found, game_id, icon_url, icon_path, updated_at = row
+        if not found and time.time() - updated_at > self.miss_ttl:
+            return None
+        return {
+            "found": bool(found),
+            "game_id": game_id,
+            "icon_url": icon_url,
+            "icon_path": icon_path,
+        }
+
+    def store_hit(self, clean_name, game_id, icon_url, icon_path):
+        self._store(clean_name, True, game_id, icon_url, icon_path)
+
+    def store_miss(self, clean_name, game_id=None):
+        self._store(clean_name, False, game_id, None, None)
+
+    def _store(self, clean_name, found, game_id, icon_url, icon_path):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artwork VALUES (?, ?, ?, ?, ?, ?)",
+                (clean_name, int(found), game_id, icon_url, icon_path, time.time())
+            )
+            self._conn.commit()
+
+    def download_info(self, icon_path):
+        """Returns what is known about the last download of an icon file: url, etag, last_modified, sha256, size."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, sha256, size FROM downloads WHERE icon_path = ?",
+                (os.path.normcase(os.path.abspath(icon_path)),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("url", "etag", "last_modified", "sha256", "size"), row))
+
+    def store_download(self, icon_path, url, etag, last_modified, sha256, size):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.normcase(os.path.abspath(icon_path)), url, etag, last_modified, sha256, size, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the shared artwork cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtworkCache()
+    return _cache
\ No newline at end of file
@@ -0,0 +1,144 @@
+# In res://scripts/artwork_priority.py
+#
+# Decides which games get their artwork first. XMB.gd writes what the user is
+# looking at to config/artwork_priority.json whenever it changes:
+#
+#   {"platform": "Wii",
+#    "visible": [{"name": "Mario Kart Wii", "path": "F:/wii/mkw.rvz"}, ...],
+#    "recent": [{"name": ..., "path": ...}, ...]}
+#
+# Visible games come first, then recently played ones, then the rest of the
+# focused platform, then everything else; within a rank the scan order is kept.
+# The file's modification time is checked at most every CHECK_INTERVAL seconds
+# and the file is only re-read when it changed, so a hint written mid-scan reorders the games still waiting without
+# restarting anything. fetch_artwork_batch and the backfill worker both pull
+# their work from it.
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HINTS_PATH = os.getenv("XMB_ARTWORK_PRIORITY", os.path.join(SCRIPT_DIR, 'config', 'artwork_priority.json'))
+
+VISIBLE = 3
+RECENT = 2
+FOCUSED_PLATFORM = 1
+
+# Seconds between two looks at the hint file
+CHECK_INTERVAL = 0.5
+
+
+def game_key(name):
+    """Games are matched by file (or folder) name, so scanner names and library paths compare equal."""
+    return os.path.basename(name.replace('\\', '/').rstrip('/')).casefold()
+
+
+class PriorityHints:
+    """The launcher's last priority hint, reloaded when the file changes."""
+
+    def __init__(self, path=HINTS_PATH, interval=CHECK_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.checked_at = None
+        self.mtime = None
+        self.platform = None
+        self.visible = set()
+        self.recent = set()
+
+    @staticmethod
+    def _keys(entries):
+        keys = set()
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict):
+                keys.update(game_key(entry[field]) for field in ("name", "path") if entry.get(field))
+            elif isinstance(entry, str):
+                keys.add(game_key(entry))
+        return keys
+
+    def refresh(self, force=False):
+        """
+        Reloads the hint if the file changed. Returns True when it did. Unless forced,
+        the file isn't even looked at again until interval seconds have passed.
+        """
+        now = time.monotonic()
+        if not force and self.checked_at is not None and now - self.checked_at < self.interval:
+            return False
+        self.checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        data = {}
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Most likely caught half-written; the next change reloads it
+                logging.warning(f"  -> Could not read artwork priority hint '{self.path}': {e}")
+                self.mtime = None
+                return False
+        if not isinstance(data, dict):
+            data = {}
+        self.platform = data.get("platform")
+        self.visible = self._keys(data.get("visible"))
+        self.recent = self._keys(data.get("recent"))
+        return True
+
+    def score(self, platform, names):
+        """Rank of a game known under any of names (a higher rank is fetched first)."""
+        keys = {game_key(name) for name in names if name}
+        if keys & self.visible:
+            return VISIBLE
+        if keys & self.recent:
+            return RECENT
+        if platform is not None and platform == self.platform:
+            return FOCUSED_PLATFORM
+        return 0
+
+
+class ArtworkWorkQueue:
+    """
+    Thread-safe work list handing out the highest ranked item first. items maps
+    each work item to (platform, names) for scoring; the order of items breaks ties.
+    """
+
+    def __init__(self, items, hints=None):
+        self.hints = hints or PriorityHints()
+        self.hints.refresh()
+        self._items = dict(items)
+        self._order = {item: position for position, item in enumerate(self._items)}
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._rank(list(self._items))
+
+    def _rank(self, pending):
+        def sort_key(item):
+            platform, names = self._items[item]
+            return (-self.hints.score(platform, names), self._order[item])
+
+        self._pending = deque(sorted(pending, key=sort_key))
+
+    def pop(self):
+        """The next item to work on, or None when everything has been handed out."""
+        with self._lock:
+            if self._pending and self.hints.refresh():
+                self._rank(self._pending)
+                logging.info(f"  -> Artwork priority hint changed, reordered {len(self._pending)} waiting games")
+            return self._pending.popleft() if self._pending else None
+
+    def prioritized(self):
+        """How many waiting items currently rank above the rest."""
+        with self._lock:
+            return sum(1 for item in self._pending if self.hints.score(*self._items[item]) > 0)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
\ No newline at end of file
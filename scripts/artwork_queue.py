@@ -0,0 +1,196 @@
+# In res://scripts/artwork_queue.py
+#
+# Deferred artwork. A scan run with --defer-artwork never waits for the network:
+# icons already in the artwork cache are used, every other game becomes a job in
+# a persistent queue (media/artwork_queue.sqlite3) and the scan writes its output
+# right away. artwork_backfill.py drains the queue later and writes the icon
+# paths it resolves back into the scan output.
+#
+# A job is unique per (output file, game), so rescans don't pile up duplicates.
+# Jobs that fail on network trouble go back to "pending" with a growing delay,
+# up to MAX_ATTEMPTS tries, after which they are marked "failed" until a rescan
+# queues the game again. Jobs a worker claimed but never finished are picked up
+# again once their lease runs out, so a killed backfill simply resumes.
+
+import os
+import json
+import time
+import logging
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+QUEUE_PATH = os.path.join(MEDIA_DIR, 'artwork_queue.sqlite3')
+
+# A claimed job not finished within this time is handed out again
+LEASE_SECONDS = 600
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 6 * 60 * 60
+MAX_ATTEMPTS = int(os.getenv("XMB_ARTWORK_MAX_ATTEMPTS", "8"))
+
+
+def retry_delay(attempts):
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+
+
+class ArtworkQueue:
+    """Persistent queue of games whose artwork still has to be looked up."""
+
+    def __init__(self, path=QUEUE_PATH):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                platform TEXT NOT NULL,
+                output_file TEXT NOT NULL,
+                game_name TEXT NOT NULL,
+                icon_name TEXT NOT NULL,
+                match_field TEXT NOT NULL,
+                identity TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                claimed_at REAL,
+                last_error TEXT,
+                UNIQUE (output_file, game_name)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, next_attempt_at)")
+        self._conn.commit()
+        # Ranks rows inside the claim query, so only the jobs handed out ever reach Python
+        self._hints = None
+        self._conn.create_function("hint_score", 3, self._hint_score)
+
+    def _hint_score(self, platform, game_name, icon_name):
+        return self._hints.score(platform, (game_name, icon_name)) if self._hints is not None else 0
+
+    def enqueue_many(self, platform, output_file, games):
+        """Queues (game_name, icon_name, match_field, identity) tuples; games already queued are left alone."""
+        rows = [(platform, os.path.abspath(output_file), game_name, icon_name, match_field,
+                 json.dumps(identity) if identity else None)
+                for game_name, icon_name, match_field, identity in games]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                """INSERT INTO jobs (platform, output_file, game_name, icon_name, match_field, identity)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(output_file, game_name) DO UPDATE SET
+                   icon_name = excluded.icon_name, identity = excluded.identity,
+                   state = CASE WHEN jobs.state IN ('done', 'failed') THEN 'pending' ELSE jobs.state END""",
+                rows
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def claim(self, limit, hints=None):
+        """
+        Marks up to limit due jobs as taken by this worker and returns them as dicts.
+        With hints (artwork_priority.PriorityHints), the games the launcher ranks highest are taken first.
+        """
+        now = time.time()
+        if hints is not None:
+            hints.refresh()
+        with self._lock:
+            # Taken before reading, so two backfill processes never claim the same jobs
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._hints = hints
+            try:
+                rows = self._conn.execute(
+                    """SELECT id, platform, output_file, game_name, icon_name, match_field, identity, attempts
+                       FROM jobs WHERE (state = 'pending' AND next_attempt_at <= ?)
+                       OR (state = 'working' AND claimed_at < ?)
+                       ORDER BY hint_score(platform, game_name, icon_name) DESC, id LIMIT ?""",
+                    (now, now - LEASE_SECONDS, limit)
+                ).fetchall()
+            finally:
+                self._hints = None
+            self._conn.executemany("UPDATE jobs SET state = 'working', claimed_at = ? WHERE id = ?",
+                                   [(now, row[0]) for row in rows])
+            self._conn.commit()
+        fields = ("id", "platform", "output_file", "game_name", "icon_name", "match_field", "identity", "attempts")
+        jobs = [dict(zip(fields, row)) for row in rows]
+        for job in jobs:
+            job["identity"] = json.loads(job["identity"]) if job["identity"] else None
+        return jobs
+
+    def finish(self, job_ids):
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET state = 'done', claimed_at = NULL WHERE id = ?",
+                                   [(job_id,) for job_id in job_ids])
+            self._conn.commit()
+
+    def retry_later(self, job, error=None):
+        """Puts a failed job back with a growing delay; returns False once it has used up MAX_ATTEMPTS and failed."""
+        attempts = job["attempts"] + 1
+        state = 'pending' if attempts < MAX_ATTEMPTS else 'failed'
+        with self._lock:
+            self._conn.execute(
+                """UPDATE jobs SET state = ?, attempts = ?, next_attempt_at = ?, claimed_at = NULL,
+                   last_error = ? WHERE id = ?""",
+                (state, attempts, time.time() + retry_delay(attempts), error, job["id"])
+            )
+            self._conn.commit()
+        return state == 'pending'
+
+    def release(self, jobs):
+        """Hands claimed jobs back untouched (e.g. when the network turned out to be down)."""
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET state = 'pending', claimed_at = NULL WHERE id = ?",
+                                   [(job["id"],) for job in jobs])
+            self._conn.commit()
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def known_miss(cache, game_filename, identity=None):
+    """True if the artwork cache remembers that SteamGridDB has nothing for this game."""
+    from artwork import artwork_cache_key
+
+    cache_key = artwork_cache_key(game_filename, identity)[1]
+    cached = cache.lookup(cache_key) if cache_key else None
+    return cached is not None and not cached["found"]
+
+
+def deferred_artwork_fetch(platform, output_file, match_field="filename", queue=None):
+    """
+    A drop-in for artwork.fetch_artwork_batch that never touches the network: cached
+    icons are returned, every other game (short of known misses) is queued for
+    artwork_backfill.py.
+    match_field is the record field holding the game name in the scan output
+    ("filename" for Switch/Wii, "name" for PS3).
+    """
+    def fetch(game_filenames, icon_name_for=None, on_result=None, identities=None, **kwargs):
+        from artwork import get_game_artwork, default_icon_name
+        from artwork_cache import get_cache
+
+        icon_name_for = icon_name_for or default_icon_name
+        identities = identities or {}
+        cache = get_cache()
+        results, queued = {}, []
+        for game_filename in game_filenames:
+            icon_name = icon_name_for(game_filename)
+            identity = identities.get(game_filename)
+            icon_path = get_game_artwork(game_filename, icon_name, cache=cache, identity=identity, offline=True)
+            results[game_filename] = icon_path
+            if icon_path is None and not known_miss(cache, game_filename, identity):
+                queued.append((game_filename, icon_name, match_field, identity))
+            elif on_result is not None:
+                on_result(game_filename, icon_path)
+
+        if queued and output_file:
+            added = (queue or ArtworkQueue()).enqueue_many(platform, output_file, queued)
+            logging.info(f"  -> Deferred artwork for {len(queued)} games ({added} queue entries added or updated)")
+        return results
+
+    return fetch
\ No newline at end of file
@@ -0,0 +1,150 @@
+# In res://scripts/bench/cold_start.py
+#
+# Cold-start benchmark for the Python scripts the launcher spawns.
+#
+# Every case runs a script the way XMB.gd does (a fresh interpreter per call)
+# on an input that never touches the network: a missing or empty emulator
+# config, or launching a dummy emulator. It reports the median wall-clock
+# time, the import time measured with `python -X importtime`, and which heavy
+# modules were imported. It exits with status 1 if a script goes over its
+# time budget or imports a module that should only load on demand.
+#
+# Usage: python scripts/bench/cold_start.py [--runs 7] [--budget-ms 250] [--output results.json]
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported on the cold paths measured here.
+LAZY_MODULES = ("requests", "urllib3", "dotenv", "yaml", "sqlite3", "concurrent.futures")
+
+DEFAULT_BUDGET_MS = 250
+
+
+def build_cases(work_dir):
+    """Returns (name, script, args) for every measured startup path."""
+    empty_config = os.path.join(work_dir, 'empty_config')
+    missing_config = os.path.join(work_dir, 'missing_config')
+    os.makedirs(empty_config, exist_ok=True)
+    open(os.path.join(empty_config, 'qt-config.ini'), 'w').close()
+    open(os.path.join(empty_config, 'Dolphin.ini'), 'w').close()
+    output = os.path.join(work_dir, 'out', 'gamedir_contents.json')
+
+    return [
+        ("switch_empty_config", "read_config_switch.py", [empty_config, output]),
+        ("wii_empty_config", "read_config_wii.py", [empty_config, output]),
+        ("ps3_missing_games_yml", "read_config_ps3.py", [missing_config, output]),
+        # The "emulator" is the interpreter itself; it rejects the Switch flags and exits.
+        ("launch_game", "launch_game.py", [sys.executable, os.path.join(work_dir, 'game.nsp')]),
+    ]
+
+
+def copy_scripts(work_dir):
+    """Runs against a copy of scripts/ so logs and manifests never land in the repo."""
+    target = os.path.join(work_dir, 'scripts')
+    os.makedirs(target)
+    for name in os.listdir(SCRIPTS_DIR):
+        if name.endswith('.py'):
+            shutil.copy2(os.path.join(SCRIPTS_DIR, name), target)
+    return target
+
+
+def run_once(script_path, args, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [script_path] + args
+
+    start = time.perf_counter()
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return elapsed_ms, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Returns (total import ms, {top-level module: cumulative ms}) from -X importtime output.
+    Lines look like: 'import time:       183 |        183 |   _io'
+    """
+    total_us = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            total_us += int(self_us)
+        except ValueError:
+            continue
+        if not name.startswith("  "):
+            # Only count imports made directly by the script, not nested ones
+            modules[name.strip()] = int(cumulative_us) / 1000
+    return total_us / 1000, modules
+
+
+def benchmark(runs, budget_ms):
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        scripts_copy = copy_scripts(work_dir)
+        for name, script, args in build_cases(work_dir):
+            script_path = os.path.join(scripts_copy, script)
+            run_once(script_path, args)  # warm the OS file cache and __pycache__
+
+            timings = [run_once(script_path, args)[0] for _ in range(runs)]
+            _, importtime_stderr = run_once(script_path, args, importtime=True)
+            import_ms, modules = parse_importtime(importtime_stderr)
+            heavy = sorted(
+                name for name in modules
+                if any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES)
+            )
+            slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+
+            median_ms = statistics.median(timings)
+            results.append({
+                "case": name,
+                "script": script,
+                "median_ms": round(median_ms, 1),
+                "min_ms": round(min(timings), 1),
+                "import_ms": round(import_ms, 1),
+                "slowest_imports": [[module, round(ms, 1)] for module, ms in slowest],
+                "lazy_modules_imported": heavy,
+                "budget_ms": budget_ms,
+                "ok": median_ms <= budget_ms and not heavy,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures cold-start time of the launcher's Python scripts.")
+    parser.add_argument("--runs", type=int, default=7, help="Timed runs per case (the median is reported).")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum median wall-clock time per script.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = benchmark(args.runs, args.budget_ms)
+
+    for result in results:
+        status = "ok" if result["ok"] else "FAIL"
+        print(f"{status:4}  {result['case']:24} median {result['median_ms']:7.1f} ms  "
+              f"imports {result['import_ms']:6.1f} ms  budget {result['budget_ms']:.0f} ms")
+        if result["lazy_modules_imported"]:
+            print(f"      imported eagerly: {', '.join(result['lazy_modules_imported'])}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=4)
+
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
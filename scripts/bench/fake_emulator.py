@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# In res://scripts/bench/fake_emulator.py
+#
+# Stands in for an emulator executable when testing launches. It accepts any
+# arguments, appends them as one JSON line to $FAKE_EMULATOR_LOG (if set),
+# stays up for $FAKE_EMULATOR_SECONDS (default 1) and exits with
+# $FAKE_EMULATOR_EXIT_CODE (default 0).
+#
+# Usage: bench/fake_emulator.py [any emulator flags] <game path>
+
+import os
+import sys
+import json
+import time
+
+if __name__ == "__main__":
+    log_path = os.getenv("FAKE_EMULATOR_LOG")
+    if log_path:
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"pid": os.getpid(), "argv": sys.argv[1:]}) + "\n")
+    time.sleep(float(os.getenv("FAKE_EMULATOR_SECONDS", "1")))
+    sys.exit(int(os.getenv("FAKE_EMULATOR_EXIT_CODE", "0")))
\ No newline at end of file
@@ -0,0 +1,240 @@
+# In res://scripts/bench/scan_benchmark.py
+#
+# End-to-end scan benchmark. For every library size it generates a synthetic
+# library per platform (ROM trees for Switch and Wii, game folders for PS3),
+# writes the matching qt-config.ini, Dolphin.ini and games.yml, and runs the
+# real scanners against a local SteamGridDB stub (sgdb_stub.py) twice: once
+# from scratch ("cold") and once more over the unchanged library ("rescan").
+#
+# Reported per run: wall time, files per second, API calls per game and the
+# scanner's peak RSS. Results are written as JSON; --compare prints the change
+# against an earlier results file so regressions between versions show up.
+#
+# ROM files are sparse (only the header is written, every file has its own
+# size), so even 50,000 files take little disk space.
+#
+# Usage: python scripts/bench/scan_benchmark.py [--sizes 100,1000,10000] [--latency-ms 20]
+#            [--platforms switch,wii,ps3] [--output results.json] [--compare old.json]
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import platform
+import tempfile
+import subprocess
+import urllib.request
+
+from cold_start import copy_scripts
+from sgdb_stub import start_stub, stub_url
+
+SCANNERS = {
+    "switch": ("read_config_switch.py", "qt-config.ini"),
+    "wii": ("read_config_wii.py", "Dolphin.ini"),
+    "ps3": ("read_config_ps3.py", "games.yml"),
+}
+FILES_PER_FOLDER = 1000
+DEFAULT_SIZES = "100,1000"
+# A wall time this much slower than the compared run is flagged
+REGRESSION_THRESHOLD = 1.10
+
+
+def _folder_for(root, i):
+    folder = os.path.join(root, f"set_{i // FILES_PER_FOLDER:03d}")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _write_sparse(path, header, size):
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.truncate(size)
+
+
+def generate_switch(work_dir, count):
+    root = os.path.join(work_dir, 'roms', 'switch')
+    for i in range(count):
+        title_id = f"0100{i:08X}0000"
+        path = os.path.join(_folder_for(root, i), f"Game {i:05d} [{title_id}][v0].nsp")
+        _write_sparse(path, b"", 1024 + i)
+
+    config_dir = os.path.join(work_dir, 'config', 'switch')
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, 'qt-config.ini'), 'w', encoding='utf-8') as f:
+        f.write("[UI]\n")
+        f.write(f"Paths\\gamedirs\\1\\path={root.replace(os.sep, '/')}\n")
+        f.write("Paths\\gamedirs\\1\\deep_scan=true\n")
+        f.write("Paths\\gamedirs\\size=1\n")
+    return config_dir
+
+
+def generate_wii(work_dir, count):
+    root = os.path.join(work_dir, 'roms', 'wii')
+    for i in range(count):
+        header = bytearray(0x440)
+        header[0:6] = f"R{i:05d}".encode()
+        struct.pack_into(">I", header, 0x18, 0x5D1C9EA3)
+        header[0x20:0x40] = f"Synthetic Game {i:05d}".encode().ljust(0x20, b"\0")
+        _write_sparse(os.path.join(_folder_for(root, i), f"Game {i:05d} (USA).iso"), bytes(header), 0x8000 + i)
+
+    config_dir = os.path.join(work_dir, 'config', 'wii')
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, 'Dolphin.ini'), 'w', encoding='utf-8') as f:
+        f.write("[General]\n")
+        f.write(f"ISOPath0 = {root.replace(os.sep, '/')}\n")
+        f.write("ISOPaths = 1\n")
+        f.write("RecursiveISOPaths = True\n")
+    return config_dir
+
+
+def generate_ps3(work_dir, count):
+    root = os.path.join(work_dir, 'roms', 'ps3')
+    config_dir = os.path.join(work_dir, 'config', 'ps3')
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, 'games.yml'), 'w', encoding='utf-8') as f:
+        for i in range(count):
+            serial = f"BLUS{i:05d}"
+            game_dir = os.path.join(_folder_for(root, i), f"Game {i:05d} [{serial}]")
+            os.makedirs(game_dir, exist_ok=True)
+            f.write(f"{serial}: \"{game_dir.replace(os.sep, '/')}/\"\n")
+    return config_dir
+
+
+GENERATORS = {"switch": generate_switch, "wii": generate_wii, "ps3": generate_ps3}
+
+
+def _stub_calls(stub):
+    with urllib.request.urlopen(f"{stub_url(stub)}/stats") as response:
+        return json.load(response)["total"]
+
+
+def run_scanner(script_path, args, env):
+    """Runs one scan. Returns (wall seconds, peak RSS in MB or None, exit code)."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script_path] + args, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return wall, round(usage.ru_maxrss / divisor, 1), process.returncode
+
+    peak_rss = None
+    try:
+        import psutil
+        watched = psutil.Process(process.pid)
+        while process.poll() is None:
+            try:
+                peak_rss = max(peak_rss or 0, watched.memory_info().rss)
+            except psutil.Error:
+                break
+            time.sleep(0.05)
+    except ImportError:
+        pass
+    process.wait()
+    wall = time.perf_counter() - start
+    return wall, round(peak_rss / (1024 * 1024), 1) if peak_rss else None, process.returncode
+
+
+def benchmark(sizes, platforms, latency_ms, rate):
+    results = []
+    stub = start_stub(latency_ms=latency_ms)
+    try:
+        for size in sizes:
+            for name in platforms:
+                with tempfile.TemporaryDirectory() as work_dir:
+                    config_dir = GENERATORS[name](work_dir, size)
+                    scripts_copy = copy_scripts(work_dir)
+                    script, _ = SCANNERS[name]
+                    output = os.path.join(work_dir, 'out', f"gamedir_contents_{name}.json")
+                    env = dict(os.environ,
+                               XMB_STEAMGRIDDB_API_URL=stub_url(stub),
+                               STEAMGRIDDB_API_KEY="benchmark",
+                               XMB_ARTWORK_RATE=str(rate),
+                               XMB_ARTWORK_BUDGET="0")
+
+                    for phase in ("cold", "rescan"):
+                        calls_before = _stub_calls(stub)
+                        wall, peak_rss_mb, exit_code = run_scanner(
+                            os.path.join(scripts_copy, script), [config_dir, output], env)
+                        api_calls = _stub_calls(stub) - calls_before
+                        results.append({
+                            "platform": name,
+                            "files": size,
+                            "phase": phase,
+                            "wall_s": round(wall, 3),
+                            "files_per_s": round(size / wall, 1) if wall else None,
+                            "api_calls": api_calls,
+                            "api_calls_per_game": round(api_calls / size, 2),
+                            "peak_rss_mb": peak_rss_mb,
+                            "exit_code": exit_code,
+                        })
+                        print(f"{name:6} {size:6d} files  {phase:6}  {wall:8.2f} s  "
+                              f"{size / wall:9.1f} files/s  {api_calls / size:5.2f} calls/game  "
+                              f"peak {peak_rss_mb if peak_rss_mb is not None else '?'} MB"
+                              + ("" if exit_code == 0 else f"  exit {exit_code}"))
+    finally:
+        stub.shutdown()
+    return results
+
+
+def compare(results, previous_path):
+    """Prints the wall time change against an earlier results file. Returns True if anything regressed."""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {
+            (r["platform"], r["files"], r["phase"]): r for r in json.load(f).get("results", [])
+        }
+    regressed = False
+    print(f"\nCompared with {previous_path}:")
+    for result in results:
+        old = previous.get((result["platform"], result["files"], result["phase"]))
+        if not old or not old["wall_s"]:
+            continue
+        ratio = result["wall_s"] / old["wall_s"]
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        regressed = regressed or bool(flag)
+        print(f"{result['platform']:6} {result['files']:6d} files  {result['phase']:6}  "
+              f"{old['wall_s']:8.2f} s -> {result['wall_s']:8.2f} s  ({ratio:5.2f}x){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the scanners on synthetic libraries.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated library sizes (files per platform).")
+    parser.add_argument("--platforms", default=",".join(SCANNERS), help="Comma separated: switch, wii, ps3.")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Delay the stub adds to every request.")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="XMB_ARTWORK_RATE for the scanners (0 = no rate limit, measures the pipeline itself).")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="An earlier results file to compare wall times with.")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    platforms = [name.strip().lower() for name in args.platforms.split(",") if name.strip()]
+    unknown = [name for name in platforms if name not in SCANNERS]
+    if unknown:
+        parser.error(f"unknown platform(s): {', '.join(unknown)}")
+
+    results = benchmark(sizes, platforms, args.latency_ms, args.rate)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "system": platform.platform(),
+                "latency_ms": args.latency_ms,
+                "rate": args.rate,
+                "results": results,
+            }, f, indent=4)
+
+    failed = any(result["exit_code"] != 0 for result in results)
+    regressed = compare(results, args.compare) if args.compare else False
+    sys.exit(1 if failed or regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+# In res://scripts/bench/sgdb_stub.py
+#
+# A local stand-in for the parts of the SteamGridDB API the scanners use:
+#
+#   GET /search/autocomplete/<term>  -> one result per term (none for terms starting with "Unknown")
+#   GET /icons/game/<id>             -> one icon pointing at /img/<id>.png
+#   GET /img/<id>.png                -> a small PNG, with an ETag
+#   GET /stats                       -> request counts per endpoint
+#
+# Every answer is delayed by the configured latency. With throttle_every=N
+# every Nth request gets a 429 with Retry-After: 1, and with error_every=N a
+# 503 without Retry-After. Point the scanners at it with
+# XMB_STEAMGRIDDB_API_URL=http://127.0.0.1:<port>.
+#
+# Usage: python scripts/bench/sgdb_stub.py [--port 8765] [--latency-ms 20] [--throttle-every 0] [--error-every 0]
+
+import json
+import time
+import zlib
+import struct
+import argparse
+import threading
+from urllib.parse import unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def _tiny_png(size=64):
+    """A solid-colour RGBA PNG, built without Pillow."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    raw = b"".join(b"\0" + b"\x30\x60\xc0\xff" * size for _ in range(size))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+ICON_PNG = _tiny_png()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data):
+        self._send(200, json.dumps(data).encode(), {'Content-Type': 'application/json'})
+
+    def do_GET(self):
+        server = self.server
+        path = unquote(self.path)
+        if path == '/stats':
+            with server.lock:
+                return self._send_json(dict(server.counts))
+
+        endpoint = "image" if path.startswith('/img/') else "icons" if '/icons/game/' in path else \
+            "search" if '/search/autocomplete/' in path else "other"
+        with server.lock:
+            server.counts["total"] += 1
+            server.counts[endpoint] = server.counts.get(endpoint, 0) + 1
+            throttled = server.throttle_every and server.counts["total"] % server.throttle_every == 0
+            if throttled:
+                server.counts["throttled"] = server.counts.get("throttled", 0) + 1
+            failed = not throttled and server.error_every and server.counts["total"] % server.error_every == 0
+            if failed:
+                server.counts["failed"] = server.counts.get("failed", 0) + 1
+        time.sleep(server.latency)
+
+        if throttled:
+            return self._send(429, headers={'Retry-After': '1'})
+        if failed:
+            return self._send(503)
+        if endpoint == "search":
+            term = path.rsplit('/', 1)[1]
+            data = [] if term.startswith("Unknown") else [{"id": zlib.crc32(term.encode()) % 1000000, "name": term}]
+            return self._send_json({"success": True, "data": data})
+        if endpoint == "icons":
+            game_id = path.rsplit('/', 1)[1]
+            port = server.server_address[1]
+            return self._send_json({"success": True, "data": [{"url": f"http://127.0.0.1:{port}/img/{game_id}.png"}]})
+        if endpoint == "image":
+            if self.headers.get('If-None-Match') == '"stub"':
+                return self._send(304)
+            return self._send(200, ICON_PNG, {'Content-Type': 'image/png', 'ETag': '"stub"'})
+        self._send(404)
+
+
+def start_stub(port=0, latency_ms=20, throttle_every=0, error_every=0):
+    """Starts the stub on a background thread and returns the server; server.shutdown() stops it."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.throttle_every = throttle_every
+    server.error_every = error_every
+    server.counts = {"total": 0}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves a fake SteamGridDB API for benchmarks and testing.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a 429.")
+    parser.add_argument("--error-every", type=int, default=0, help="Answer every Nth request with a 503.")
+    args = parser.parse_args()
+
+    stub = start_stub(args.port, args.latency_ms, args.throttle_every, args.error_every)
+    print(f"SteamGridDB stub listening on {stub_url(stub)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
\ No newline at end of file
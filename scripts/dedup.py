@@ -0,0 +1,176 @@
+# In res://scripts/dedup.py
+#
+# Finds copies of the same game file across the scanned folders. Only files that
+# share their exact size with another file are looked at; those get a cheap
+# fingerprint (a hash of the first and last FINGERPRINT_CHUNK bytes plus the
+# size) and, in "full" mode, a hash of the whole file to confirm the match.
+# Fingerprints are cached by path, size and mtime, so every file is read once.
+
+import os
+import time
+import hashlib
+import logging
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+CACHE_PATH = os.path.join(MEDIA_DIR, 'fingerprints.sqlite3')
+
+# "quick" compares size and a head/tail hash, "full" also hashes whole files
+DEDUP_MODES = ("off", "quick", "full")
+DEFAULT_DEDUP = "quick"
+FINGERPRINT_CHUNK = 64 * 1024
+FULL_HASH_BLOCK = 1024 * 1024
+
+
+def quick_fingerprint(path, size):
+    """Hashes the size and the head and tail chunks of a file (the whole file if it is small)."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= 2 * FINGERPRINT_CHUNK:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(FINGERPRINT_CHUNK))
+            f.seek(size - FINGERPRINT_CHUNK)
+            digest.update(f.read(FINGERPRINT_CHUNK))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """Hashes the whole file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(FULL_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FingerprintCache:
+    """
+    On-disk cache of file fingerprints, keyed by path. An entry is only used while
+    the file's size and mtime are the same as when it was hashed.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS fingerprints (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                quick TEXT,
+                full TEXT,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def lookup(self, path, size, mtime):
+        """Returns {"quick", "full"} for an unchanged file (either may be None), else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quick, full FROM fingerprints WHERE path = ? AND size = ? AND mtime = ?",
+                (path, size, mtime)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"quick": row[0], "full": row[1]}
+
+    def store_many(self, entries):
+        """Stores (path, size, mtime, quick, full) tuples in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+                [entry + (now,) for entry in entries]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _fingerprint_all(candidates, cache, known, kind, max_workers):
+    """
+    Fills known[key] = {"quick", "full"} for (key, path, size, mtime) candidates, computing
+    the kind ("quick" or "full") hash only where the cache doesn't have it. Files that
+    can't be read are dropped from known.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fingerprint(candidate):
+        key, path, size, mtime = candidate
+        entry = known.get(key) or cache.lookup(path, size, mtime) or {"quick": None, "full": None}
+        if entry[kind] is not None:
+            return key, entry, None
+        try:
+            value = quick_fingerprint(path, size) if kind == "quick" else full_hash(path)
+        except OSError as e:
+            logging.warning(f"  -> Could not fingerprint '{path}': {e}")
+            return key, None, None
+        entry = dict(entry, **{kind: value})
+        return key, entry, (path, size, mtime, entry["quick"], entry["full"])
+
+    updates = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, entry, update in pool.map(fingerprint, candidates):
+            if entry is None:
+                known.pop(key, None)
+            else:
+                known[key] = entry
+            if update is not None:
+                updates.append(update)
+    if updates:
+        cache.store_many(updates)
+
+
+def _group(candidates, known, kind):
+    groups = {}
+    for key, _, size, _ in candidates:
+        if key in known:
+            groups.setdefault((size, known[key][kind]), []).append(key)
+    return [keys for keys in groups.values() if len(keys) > 1]
+
+
+def find_duplicates(files, full=False, cache=None, max_workers=4):
+    """
+    Groups identical files. files is a list of (key, path, size, mtime); returns a list
+    of key groups with at least two members, each in the order the files were given,
+    so the first key of a group is the copy to keep.
+
+    With full=True, files whose quick fingerprints match are hashed completely
+    before they count as copies.
+    """
+    by_size = {}
+    for candidate in files:
+        if candidate[2] > 0:
+            by_size.setdefault(candidate[2], []).append(candidate)
+    candidates = [candidate for group in by_size.values() if len(group) > 1 for candidate in group]
+    if not candidates:
+        return []
+
+    own_cache = cache is None
+    if own_cache:
+        cache = FingerprintCache()
+    try:
+        known = {}
+        _fingerprint_all(candidates, cache, known, "quick", max_workers)
+        groups = _group(candidates, known, "quick")
+        if full and groups:
+            in_groups = {key for keys in groups for key in keys}
+            candidates = [candidate for candidate in candidates if candidate[0] in in_groups]
+            _fingerprint_all(candidates, cache, known, "full", max_workers)
+            groups = _group(candidates, known, "full")
+    finally:
+        if own_cache:
+            cache.close()
+
+    # Back into the order the files were given
+    order = {candidate[0]: index for index, candidate in enumerate(files)}
+    return sorted((sorted(keys, key=order.get) for keys in groups), key=lambda keys: order[keys[0]])
\ No newline at end of file
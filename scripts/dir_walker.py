@@ -0,0 +1,152 @@
+# In res://scripts/dir_walker.py
+#
+# Directory walker shared by the scanners. It is built on os.scandir, so on
+# Windows the size and mtime of every file come from the directory listing
+# itself instead of a stat call per file. Several roots are walked in
+# parallel, one worker per device, and matches are yielded as soon as they
+# are found so later stages can start before the slowest root is done.
+
+import os
+import queue
+import fnmatch
+import logging
+import threading
+
+# Folders that never contain games but can be huge or unreadable
+DEFAULT_EXCLUDES = ("$RECYCLE.BIN", "System Volume Information")
+
+# Kinds of items yielded by walk_root / walk_roots
+FILE = "file"
+DIR = "dir"
+ERROR = "error"
+DONE = "done"
+
+
+def depth_for(recursive, max_depth=None):
+    """The max_depth to walk a game directory with: 0 for a flat listing, else max_depth (None = unlimited)."""
+    return max_depth if recursive else 0
+
+
+def _excluded(name, exclude):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in exclude)
+
+
+def scan_dir(abs_dir, extensions, exclude=DEFAULT_EXCLUDES):
+    """
+    Lists one folder: returns ([(name, size, mtime)] for the files whose name ends with
+    one of extensions, [names of sub-folders]). Raises OSError if the folder can't be listed.
+    """
+    files, subdirs = [], []
+    with os.scandir(abs_dir) as it:
+        entries = list(it)
+    for entry in entries:
+        if _excluded(entry.name, exclude):
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+            elif entry.name.lower().endswith(extensions):
+                stat = entry.stat()
+                files.append((entry.name, stat.st_size, stat.st_mtime))
+        except OSError as e:
+            logging.warning(f"  -> Could not read '{entry.path}': {e}")
+    return files, subdirs
+
+
+def walk_root(root, extensions, max_depth=0, exclude=DEFAULT_EXCLUDES, stop=None):
+    """
+    Yields (FILE, relative_path, size, mtime) for every file under root whose name
+    ends with one of extensions, and (DIR, relative_path, mtime) for every folder
+    listed (the root itself is ''). Relative paths use forward slashes. A folder
+    that can't be listed yields no DIR item, so its mtime is never recorded as seen.
+
+    max_depth=0 only lists root itself, None recurses without limit. Names
+    matching an exclude pattern (fnmatch style) are skipped, files and folders alike.
+    """
+    pending = [("", 0)]
+    while pending:
+        if stop is not None and stop.is_set():
+            return
+        rel_dir, depth = pending.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+
+        try:
+            # Taken before listing, so a change made during the listing shows up next time
+            mtime = os.stat(abs_dir).st_mtime
+            files, subdirs = scan_dir(abs_dir, extensions, exclude)
+        except OSError as e:
+            if not rel_dir:
+                raise
+            logging.warning(f"  -> Could not list '{abs_dir}': {e}")
+            continue
+
+        yield (DIR, rel_dir, mtime)
+
+        if max_depth is None or depth < max_depth:
+            for name in subdirs:
+                pending.append((f"{rel_dir}/{name}" if rel_dir else name, depth + 1))
+        for name, size, mtime in files:
+            yield (FILE, f"{rel_dir}/{name}" if rel_dir else name, size, mtime)
+
+
+def _device_of(root):
+    try:
+        return os.stat(root).st_dev
+    except OSError:
+        return root
+
+
+def walk_roots(roots, extensions, exclude=DEFAULT_EXCLUDES):
+    """
+    Walks several roots in parallel and yields (root, item) as items arrive, where item
+    is what walk_root yields, (ERROR, exception) if the root could not be listed, and
+    finally (DONE,) once the root is finished. roots is a list of (root, max_depth).
+
+    Roots on the same device are walked one after the other by the same worker, so
+    a single USB drive or network share is never hit by several walkers at once.
+    Closing the generator early stops the workers.
+    """
+    by_device = {}
+    for root, max_depth in roots:
+        by_device.setdefault(_device_of(root), []).append((root, max_depth))
+
+    results = queue.Queue(maxsize=1024)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def worker(device_roots):
+        for root, max_depth in device_roots:
+            try:
+                for item in walk_root(root, extensions, max_depth, exclude, stop):
+                    put((root, item))
+            except OSError as e:
+                put((root, (ERROR, e)))
+            put((root, (DONE,)))
+        put(None)
+
+    threads = [
+        threading.Thread(target=worker, args=(device_roots,), daemon=True)
+        for device_roots in by_device.values()
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        finished = 0
+        while finished < len(threads):
+            item = results.get()
+            if item is None:
+                finished += 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
\ No newline at end of file
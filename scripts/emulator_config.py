@@ -0,0 +1,113 @@
+# In res://scripts/emulator_config.py
+#
+# One-pass readers for the emulator config files the scanners start from.
+# Every configured game directory is returned, however many there are, and
+# the parsed result is kept in memory until the file's mtime or size changes
+# (the scanner daemon reads the same configs over and over).
+
+import os
+import re
+import threading
+
+# Eden/Yuzu (qt-config.ini, [UI] section):
+#   Paths\gamedirs\4\path=C:/Games/Switch
+#   Paths\gamedirs\4\deep_scan=true
+#   Paths\gamedirs\4\deep_scan\default=false   <- Qt bookkeeping, ignored
+#   Paths\gamedirs\size=4
+EDEN_GAMEDIR_RE = re.compile(r'^Paths\\gamedirs\\(\d+)\\(path|deep_scan)=(.*)$')
+
+# Dolphin (Dolphin.ini, [General] section):
+#   ISOPath0 = C:/Games/Wii
+#   ISOPaths = 1
+#   RecursiveISOPaths = True
+DOLPHIN_ISOPATH_RE = re.compile(r'^ISOPath(\d+)\s*=(.*)$')
+DOLPHIN_RECURSIVE_RE = re.compile(r'^RecursiveISOPaths\s*=(.*)$')
+
+# Eden lists its virtual storages next to real folders
+EDEN_VIRTUAL_DIRS = ("SDMC", "UserNAND", "SysNAND")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _is_true(value):
+    return value.strip().lower() in ("true", "1", "yes")
+
+
+def _read_lines_cached(config_path, parser):
+    """Runs parser over the file's lines, reusing the last result while mtime and size are unchanged."""
+    stat = os.stat(config_path)
+    key = (os.path.abspath(config_path), parser.__name__)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        result = parser(f)
+
+    with _cache_lock:
+        _cache[key] = (signature, result)
+    return result
+
+
+def _parse_eden(lines):
+    gamedirs = {}
+    for line in lines:
+        match = EDEN_GAMEDIR_RE.match(line.strip())
+        if not match:
+            continue
+        index, key, value = int(match.group(1)), match.group(2), match.group(3)
+        entry = gamedirs.setdefault(index, {"index": index, "path": None, "deep_scan": False})
+        if key == "path":
+            entry["path"] = value
+        else:
+            entry["deep_scan"] = _is_true(value)
+
+    return [gamedirs[index] for index in sorted(gamedirs) if gamedirs[index]["path"]]
+
+
+def _parse_dolphin(lines):
+    iso_paths = {}
+    recursive = False
+    for line in lines:
+        clean_line = line.strip()
+        match = DOLPHIN_ISOPATH_RE.match(clean_line)
+        if match:
+            iso_paths[int(match.group(1))] = match.group(2).strip()
+            continue
+        match = DOLPHIN_RECURSIVE_RE.match(clean_line)
+        if match:
+            recursive = _is_true(match.group(1))
+
+    # Dolphin has a single recursive flag that applies to every ISO path
+    return [
+        {"index": index, "path": iso_paths[index], "recursive": recursive}
+        for index in sorted(iso_paths) if iso_paths[index]
+    ]
+
+
+def read_eden_gamedirs(config_path):
+    """
+    Returns every game directory from an Eden/Yuzu qt-config.ini as a list of
+    {"index", "path", "deep_scan"} dicts, ordered by index.
+    """
+    return _read_lines_cached(config_path, _parse_eden)
+
+
+def read_dolphin_iso_paths(config_path):
+    """
+    Returns every ISO path from a Dolphin.ini as a list of
+    {"index", "path", "recursive"} dicts, ordered by index.
+    """
+    return _read_lines_cached(config_path, _parse_dolphin)
+
+
+def is_filesystem_path(value):
+    """True for real folders ('C:/Games', '/mnt/roms'), False for Eden's virtual SDMC/NAND entries."""
+    if value in EDEN_VIRTUAL_DIRS:
+        return False
+    is_drive_path = len(value) >= 2 and value[0].isalpha() and value[1] == ':'
+    return is_drive_path or os.path.isabs(value)
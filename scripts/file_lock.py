@@ -0,0 +1,83 @@
+# In res://scripts/file_lock.py
+#
+# The watcher (scan_watch.py), the artwork backfill and scans started from
+# XMB.gd can run at the same time and rewrite the same files: a scan output,
+# its manifest and the library. Every rewrite goes through a temp file of its
+# own (temp_path_for), and whoever reads a file to write it back holds
+# locked(path) from the read to the replace, so two writers never interleave:
+#
+#   with locked(library_path):
+#       library = load_library(library_path)
+#       ...
+#       write_library(library_path, library)
+#
+# A scan holds the lock of its output file for the whole scan, which covers
+# the output and the manifest next to it. The lock is '<path>.lock', held
+# with flock (msvcrt.locking on Windows), so the OS drops it when the process
+# holding it dies. A thread already holding a lock can take it again.
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+RETRY_SECONDS = 0.05
+
+_held = threading.local()
+
+
+def temp_path_for(path):
+    """A temp file next to path that no other process or thread writing path uses."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def lock_path_for(path):
+    return os.path.normpath(os.path.abspath(path)) + '.lock'
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _acquire(f):
+        while True:
+            f.seek(0)
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(RETRY_SECONDS)
+
+    def _release(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _acquire(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _release(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked(path):
+    """Holds the lock for path (a file, or a sharded library's directory) until the block ends."""
+    if not path or path == '-':
+        yield
+        return
+    lock_path = lock_path_for(path)
+    held = _held.__dict__.setdefault("paths", set())
+    if lock_path in held:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        _acquire(f)
+        held.add(lock_path)
+        try:
+            yield
+        finally:
+            held.discard(lock_path)
+            _release(f)
\ No newline at end of file
@@ -1,72 +1,285 @@
+# In res://scripts/focus_window.py
+#
+# Brings an emulator window to the front. The window is looked for by the start
+# of its title; enumeration stops at the first match. XMB.gd runs it with --wait
+# when the launcher supervisor reports that a game started. With --wait the script
+# keeps looking until the window shows up or the deadline passes, re-checking
+# whenever a window is shown or renamed (on Windows, through a WinEvent hook)
+# and at least on a backoff schedule. It reports how long the window took to
+# appear as one JSON line on stdout:
+#
+#   {"found": true, "focused": true, "title": "yuzu | Mario Kart 8", "waited_s": 1.42, "checks": 5}
+#
+# The window system and the clock sit behind a small backend class, so the
+# waiting logic also runs headless (e.g. on Linux) against FakeWindowBackend,
+# whose windows appear on a simulated clock instead of after real sleeps:
+#
+#   python focus_window.py "yuzu" --wait 10 --backend fake --fake-window "yuzu | Game=1.5"
+#
+# Exits with 0 once the window has focus, 1 if it wasn't found and 2 if it was
+# found but the OS kept it from taking focus. Logs go to python_scanner.log
+# (XMB_SCANNER_LOG overrides it).
+#
+# Usage: python focus_window.py "Partial Window Title" [--wait SECONDS]
+
+import os
 import sys
-import win32gui
-import win32con
+import json
+import time
 import logging
-import os
+import argparse
 
 # Get the directory where the script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Backoff between checks while waiting: starts at FIRST, doubles up to MAX
+BACKOFF_FIRST = 0.05
+BACKOFF_MAX = 1.0
+
+# Exit codes
+FOUND_AND_FOCUSED = 0
+NOT_FOUND = 1
+FOCUS_REFUSED = 2
+
+
 def setup_logging():
     """Configures logging to write to a file."""
-    log_file_path = os.path.join(SCRIPT_DIR, 'python_scanner.log')
+    log_file_path = os.getenv("XMB_SCANNER_LOG", os.path.join(SCRIPT_DIR, 'python_scanner.log'))
     logging.basicConfig(
         filename=log_file_path,
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
-        filemode='w'
+        filemode='a' # Append mode, so logs from different scripts add to the same file
     )
 
-def force_focus(partial_title):
-    """Finds a window whose title starts with partial_title and focuses it."""
-    logging.info(f"--- Searching for window starting with: '{partial_title}' ---")
-    
-    # --- START OF THE FIX ---
-    # We will replace the exact search with a loop that finds a partial match.
-    
-    hwnd = None
-    
-    def callback(handle, extra):
-        # This function is called for every open window.
-        nonlocal hwnd
-        if win32gui.IsWindowVisible(handle):
-            window_text = win32gui.GetWindowText(handle)
-            # Check if the window's title starts with the text we're looking for.
-            if window_text.startswith(partial_title):
-                hwnd = handle # If it matches, we've found our window.
-
-    # Enumerate through all windows and run our callback function.
-    win32gui.EnumWindows(callback, None)
-    
-    # --- END OF THE FIX ---
 
+class Win32WindowBackend:
+    """Top-level windows through win32gui, with a WinEvent hook to wake up when windows appear."""
+
+    EVENT_OBJECT_SHOW = 0x8002
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0
+    QS_ALLINPUT = 0x04FF
+    PM_REMOVE = 0x0001
+
+    def __init__(self):
+        import win32gui
+        import win32con
+
+        self.win32gui = win32gui
+        self.win32con = win32con
+        self._changed = False
+        self._hooks = []
+        self._event_proc = None
+
+    def clock(self):
+        return time.monotonic()
+
+    def find_window(self, partial_title):
+        """The first visible window whose title starts with partial_title, or None. Stops at the match."""
+        found = []
+
+        def callback(handle, extra):
+            if self.win32gui.IsWindowVisible(handle) and self.win32gui.GetWindowText(handle).startswith(partial_title):
+                found.append(handle)
+                return False # Stop enumerating
+            return True
+
+        try:
+            self.win32gui.EnumWindows(callback, None)
+        except Exception as e:
+            # Stopping the enumeration early surfaces as an error with code 0 in some pywin32 versions
+            if not found and getattr(e, 'winerror', None) != 0:
+                raise
+        return found[0] if found else None
+
+    def title(self, handle):
+        return self.win32gui.GetWindowText(handle)
+
+    def focus(self, handle):
+        self.win32gui.ShowWindow(handle, self.win32con.SW_RESTORE)
+        self.win32gui.SetForegroundWindow(handle)
+        return self.win32gui.GetForegroundWindow() == handle
+
+    def _install_hooks(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+                                       wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = (wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, proc_type,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            # Only whole windows (OBJID_WINDOW, CHILDID_SELF), not their parts
+            if id_object == 0 and id_child == 0:
+                self._changed = True
+
+        self._event_proc = proc_type(on_event)
+        for event in (self.EVENT_OBJECT_SHOW, self.EVENT_OBJECT_NAMECHANGE):
+            hook = user32.SetWinEventHook(event, event, None, self._event_proc, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+            if hook:
+                self._hooks.append(hook)
+        return bool(self._hooks)
+
+    def wait_for_change(self, timeout):
+        """Returns after timeout seconds, or earlier once a window was shown or renamed."""
+        if self._event_proc is None and not self._install_hooks():
+            time.sleep(timeout)
+            return
+
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        message = wintypes.MSG()
+        deadline = time.monotonic() + timeout
+        while not self._changed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Out-of-context hooks are delivered through this thread's message queue
+            user32.MsgWaitForMultipleObjects(0, None, False, int(remaining * 1000), self.QS_ALLINPUT)
+            while user32.PeekMessageW(ctypes.byref(message), None, 0, 0, self.PM_REMOVE):
+                user32.TranslateMessage(ctypes.byref(message))
+                user32.DispatchMessageW(ctypes.byref(message))
+        self._changed = False
+
+    def close(self):
+        if self._hooks:
+            import ctypes
+
+            for hook in self._hooks:
+                ctypes.windll.user32.UnhookWinEvent(hook)
+            self._hooks = []
+
+
+class FakeWindowBackend:
+    """
+    Windows that appear a given number of seconds into a simulated clock; for running without a desktop.
+    Waiting moves the clock forward instead of sleeping, so a run takes no real time.
+    """
+
+    def __init__(self, windows, refuse_focus=False):
+        self.now = 0.0
+        self.windows = list(windows) # (title, seconds until it appears)
+        self.refuse_focus = refuse_focus
+        self.wakeups = 0 # wait_for_change calls cut short by a window appearing
+
+    def clock(self):
+        return self.now
+
+    def find_window(self, partial_title):
+        for handle, (title, appears_after) in enumerate(self.windows, 1):
+            if self.now < appears_after:
+                continue
+            if title.startswith(partial_title):
+                return handle
+        return None
+
+    def title(self, handle):
+        return self.windows[handle - 1][0]
+
+    def focus(self, handle):
+        return not self.refuse_focus
+
+    def wait_for_change(self, timeout):
+        # Wake up as soon as the next window appears, like the Windows hook does
+        upcoming = [appears_after - self.now for _, appears_after in self.windows if appears_after > self.now]
+        if upcoming and min(upcoming) < timeout:
+            self.wakeups += 1
+            self.now += min(upcoming)
+        else:
+            self.now += timeout
+
+    def close(self):
+        pass
+
+
+def wait_for_window(backend, partial_title, timeout=0.0):
+    """
+    Looks for the window until it appears or timeout seconds have passed (one look with timeout 0).
+    Returns (handle or None, seconds waited, number of checks), timed on the backend's clock.
+    """
+    start = backend.clock()
+    deadline = start + timeout
+    delay = BACKOFF_FIRST
+    checks = 0
+    while True:
+        checks += 1
+        handle = backend.find_window(partial_title)
+        now = backend.clock()
+        if handle or now >= deadline:
+            return handle, now - start, checks
+        backend.wait_for_change(min(delay, deadline - now))
+        delay = min(delay * 2, BACKOFF_MAX)
+
+
+def force_focus(partial_title, timeout=0.0, backend=None):
+    """Finds a window whose title starts with partial_title (waiting up to timeout seconds) and focuses it."""
+    logging.info(f"--- Searching for window starting with: '{partial_title}' ---")
+    backend = backend or Win32WindowBackend()
+    result = {"found": False, "focused": False, "title": None, "waited_s": None, "checks": 0}
     try:
+        hwnd, waited, checks = wait_for_window(backend, partial_title, timeout)
+        result.update(waited_s=round(waited, 3), checks=checks)
         if not hwnd:
-            logging.error(f"Window starting with '{partial_title}' not found.")
-            return
+            logging.error(f"Window starting with '{partial_title}' not found after {waited:.2f}s.")
+            return result
+
+        result.update(found=True, title=backend.title(hwnd))
+        logging.info(f"Found matching window: '{result['title']}' ({hwnd}) after {waited:.2f}s and {checks} checks")
 
-        logging.info(f"Found matching window: '{win32gui.GetWindowText(hwnd)}' ({hwnd})")
-        
-        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-        win32gui.SetForegroundWindow(hwnd)
-        
-        if win32gui.GetForegroundWindow() == hwnd:
+        result["focused"] = backend.focus(hwnd)
+        if result["focused"]:
             logging.info(f"SUCCESS: Window is now the foreground window.")
         else:
             logging.warning(f"FAILURE: OS prevented the window from taking focus.")
 
     except Exception as e:
         logging.error(f"An unexpected error occurred", exc_info=True)
+    finally:
+        backend.close()
+    return result
+
+
+def _fake_window(value):
+    title, _, seconds = value.rpartition("=")
+    if not title:
+        return value, 0.0
+    return title, float(seconds)
+
 
 if __name__ == "__main__":
     setup_logging()
     logging.info("--- Focus Script Starting ---")
-    
-    if len(sys.argv) > 1:
-        title = sys.argv[1]
-        force_focus(title)
-    else:
+
+    parser = argparse.ArgumentParser(description="Brings the window whose title starts with the given text to the front.")
+    parser.add_argument("title", nargs="?")
+    parser.add_argument("--wait", type=float, default=0.0, metavar="SECONDS",
+                        help="Keep looking this long if the window isn't there yet.")
+    parser.add_argument("--backend", choices=("win32", "fake"), default="win32")
+    parser.add_argument("--fake-window", action="append", type=_fake_window, default=[], metavar="TITLE=SECONDS",
+                        help="With the fake backend: a window that appears after SECONDS (can be repeated).")
+    parser.add_argument("--fake-refuse-focus", action="store_true",
+                        help="With the fake backend: act like the OS keeping the window from taking focus.")
+    args = parser.parse_args()
+
+    if not args.title:
         print("Usage: python focus_window.py \"Partial Window Title\"")
         logging.warning("Script was called with no window title argument.")
-    
-    logging.info("--- Focus Script Finished ---")
\ No newline at end of file
+        sys.exit(NOT_FOUND)
+
+    if args.backend == "fake":
+        window_backend = FakeWindowBackend(args.fake_window, args.fake_refuse_focus)
+    else:
+        window_backend = Win32WindowBackend()
+    outcome = force_focus(args.title, args.wait, window_backend)
+    print(json.dumps(outcome))
+
+    logging.info("--- Focus Script Finished ---")
+    if not outcome["found"]:
+        sys.exit(NOT_FOUND)
+    sys.exit(FOUND_AND_FOCUSED if outcome["focused"] else FOCUS_REFUSED)
\ No newline at end of file
@@ -0,0 +1,166 @@
+# In res://scripts/game_id.py
+#
+# Identifies games from the first few bytes of the image instead of from the
+# file name. Only the header is read (never more than HEADER_READ_SIZE bytes),
+# so multi-gigabyte images cost one small read each.
+#
+# identify_game() returns a dict like
+#   {"key": "wii:RSBE01", "platform": "wii", "id": "RSBE01", "title": "Super Smash Bros. Brawl"}
+# where "key" is stable across renames and copies and "title" may be None.
+
+import os
+import re
+import struct
+import logging
+
+HEADER_READ_SIZE = 64 * 1024
+
+# GameCube / Wii disc header (also the first bytes of a plain .iso/.gcm)
+WII_MAGIC = 0x5D1C9EA3      # at 0x18
+GAMECUBE_MAGIC = 0xC2339F3D # at 0x1C
+DISC_TITLE_OFFSET = 0x20
+DISC_TITLE_SIZE = 0x3E0
+
+# WBFS container: "WBFS", u32 sector count, u8 log2(sector size); disc header in the next sector
+WBFS_MAGIC = b"WBFS"
+
+# WIA/RVZ container: 0x48 byte header 1, then header 2 holding a copy of the
+# first 0x80 bytes of the disc header at offset 0x10.
+RVZ_MAGICS = (b"RVZ\x01", b"WIA\x01")
+RVZ_DISC_HEADER_OFFSET = 0x48 + 0x10
+RVZ_DISC_HEADER_SIZE = 0x80
+
+# Switch: title IDs are 16 hex digits starting with 01, as in "Mario Kart 8 [010075100E8EC000][v0].nsp"
+SWITCH_TITLE_ID_RE = re.compile(r'\b(01[0-9A-Fa-f]{14})\b')
+PFS0_MAGIC = b"PFS0"
+
+# PS3 serials, as in "Game [BLES01961]": discs (BLES, BCUS, ...) and PSN titles (NPUB, NPEA, ...)
+PS3_SERIAL_RE = re.compile(r'\b(B[CL][AEJKPU][BCDMSTVXZ]\d{5}|NP[AEHJKU][A-Z]\d{5})\b')
+
+
+def _read_header(path, size=HEADER_READ_SIZE):
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+def _decode_title(raw):
+    raw = raw.split(b"\0", 1)[0]
+    for encoding in ("utf-8", "shift_jis", "latin-1"):
+        try:
+            title = raw.decode(encoding).strip()
+            return title or None
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _valid_disc_id(raw):
+    return len(raw) == 6 and all(48 <= c <= 57 or 65 <= c <= 90 for c in raw)
+
+
+def parse_disc_header(header):
+    """Reads the game ID and internal title from a GameCube/Wii disc header, or returns None."""
+    if len(header) < DISC_TITLE_OFFSET:
+        return None
+    wii_magic, gc_magic = struct.unpack_from(">II", header, 0x18)
+    if wii_magic == WII_MAGIC:
+        platform = "wii"
+    elif gc_magic == GAMECUBE_MAGIC:
+        platform = "gamecube"
+    else:
+        return None
+
+    disc_id = header[0:6]
+    if not _valid_disc_id(disc_id):
+        return None
+    disc_id = disc_id.decode("ascii")
+    title = _decode_title(header[DISC_TITLE_OFFSET:DISC_TITLE_OFFSET + DISC_TITLE_SIZE])
+    return {"key": f"{platform}:{disc_id}", "platform": platform, "id": disc_id, "title": title}
+
+
+def identify_disc_image(path):
+    """Identifies .iso, .gcm, .wbfs and .rvz/.wia images from their headers."""
+    header = _read_header(path, 0x400)
+    magic = header[:4]
+
+    if magic == WBFS_MAGIC and len(header) >= 9:
+        sector_size = 1 << header[8]
+        with open(path, 'rb') as f:
+            f.seek(sector_size)
+            return parse_disc_header(f.read(0x400))
+
+    if magic in RVZ_MAGICS:
+        disc_header = header[RVZ_DISC_HEADER_OFFSET:RVZ_DISC_HEADER_OFFSET + RVZ_DISC_HEADER_SIZE]
+        return parse_disc_header(disc_header)
+
+    return parse_disc_header(header)
+
+
+def _pfs0_file_names(header):
+    """Lists the file names inside an NSP (PFS0) from its header."""
+    if header[:4] != PFS0_MAGIC or len(header) < 0x10:
+        return []
+    file_count, string_table_size = struct.unpack_from("<II", header, 4)
+    string_table_start = 0x10 + file_count * 0x18
+    string_table = header[string_table_start:string_table_start + string_table_size]
+    return [name.decode("utf-8", "replace") for name in string_table.split(b"\0") if name]
+
+
+def identify_switch_game(path):
+    """
+    Takes the title ID from the file name if it carries one, else from the NSP's
+    ticket name (the rights ID starts with the title ID). XCI headers are
+    encrypted, so for those the file name is all there is.
+    """
+    name = os.path.basename(path)
+    match = SWITCH_TITLE_ID_RE.search(name)
+    if not match and name.lower().endswith('.nsp'):
+        for inner_name in _pfs0_file_names(_read_header(path)):
+            if inner_name.lower().endswith(('.tik', '.cert')):
+                match = SWITCH_TITLE_ID_RE.match(inner_name[:16])
+                if match:
+                    break
+    if not match:
+        return None
+
+    title_id = match.group(1).upper()
+    return {"key": f"switch:{title_id}", "platform": "switch", "id": title_id, "title": None}
+
+
+def identify_ps3_game(game_id, game_path=None):
+    """PS3 games already carry their serial (the games.yml key); fall back to the folder name."""
+    serial = game_id if isinstance(game_id, str) and PS3_SERIAL_RE.fullmatch(game_id) else None
+    if serial is None and game_path:
+        match = PS3_SERIAL_RE.search(os.path.basename(os.path.normpath(game_path)))
+        serial = match.group(1) if match else None
+    if serial is None:
+        return None
+    return {"key": f"ps3:{serial}", "platform": "ps3", "id": serial, "title": None}
+
+
+def identify_game(path):
+    """Identifies a Switch or GameCube/Wii game file, returning None if it can't be identified."""
+    lower = path.lower()
+    try:
+        if lower.endswith(('.nsp', '.xci')):
+            return identify_switch_game(path)
+        if lower.endswith(('.iso', '.gcm', '.wbfs', '.rvz', '.wia')):
+            return identify_disc_image(path)
+    except (OSError, struct.error) as e:
+        logging.warning(f"  -> Could not read header of '{path}': {e}")
+    return None
+
+
+def identify_games(paths, max_workers=8):
+    """
+    Identifies many files at once, {name: path} -> {name: identity or None}.
+    The header reads are spread over a few threads since most of the time is
+    spent waiting on the drive.
+    """
+    if not paths:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor
+
+    names = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(names, pool.map(identify_game, (paths[name] for name in names))))
\ No newline at end of file
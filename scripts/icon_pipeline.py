@@ -0,0 +1,220 @@
+# In res://scripts/icon_pipeline.py
+#
+# Post-processing for downloaded and extracted icons. SteamGridDB often returns
+# large PNGs, while the XMB only ever draws them as ICON_SIZE tiles, so every
+# icon gets a tile-sized copy (optionally as WebP) that XMB.gd can load without
+# resizing. The tiles of a platform can also be packed into one atlas image
+# with an index JSON.
+#
+# Work is spread over a process pool (resizing is CPU bound) and a tile is only
+# rebuilt when its source icon is newer. Needs Pillow (pip install Pillow); without
+# it tiles are simply not made and the launcher keeps using the original icons.
+#
+# Usage: python icon_pipeline.py <scan output .json> [--size 100] [--format png|webp] [--atlas <atlas .png>]
+
+import os
+import sys
+import json
+import math
+import logging
+import argparse
+
+from file_lock import locked, temp_path_for
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+TILE_DIR = os.path.join(MEDIA_DIR, 'icon', 'tiles')
+
+# XMB.gd draws icons at ICON_SIZE (100x100)
+TILE_SIZE = int(os.getenv("XMB_ICON_TILE_SIZE", "100"))
+TILE_FORMAT = os.getenv("XMB_ICON_TILE_FORMAT", "png")
+TILE_FORMATS = ("png", "webp")
+WEBP_QUALITY = 90
+# Below this many icons the process pool costs more than it saves
+POOL_THRESHOLD = 4
+
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def tile_path_for(icon_path, size=TILE_SIZE, fmt=TILE_FORMAT):
+    stem = os.path.splitext(os.path.basename(icon_path))[0]
+    return os.path.join(TILE_DIR, str(size), f"{stem}.{fmt}")
+
+
+def _is_fresh(source, target):
+    try:
+        return os.path.getmtime(target) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def make_tile(source, target, size, fmt):
+    """
+    Fits source into a size x size tile (keeping its aspect ratio) and saves it as fmt. Runs in a worker process.
+    Returns the target, or the exception if the icon could not be processed.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(source) as image:
+            image = image.convert("RGBA")
+            image.thumbnail((size, size), Image.LANCZOS)
+            tile = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+            tile.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = temp_path_for(target)
+        if fmt == "webp":
+            tile.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+        else:
+            tile.save(tmp_path, "PNG", optimize=True)
+        os.replace(tmp_path, target)
+        return target
+    except Exception as e:
+        # Anything Pillow raises (a broken file, a decompression bomb, ...) only costs this icon its tile
+        return e
+
+
+def _prepare_tile_dir():
+    os.makedirs(TILE_DIR, exist_ok=True)
+    # Tiles are loaded from disk at runtime; keep the Godot editor from importing them
+    gdignore = os.path.join(TILE_DIR, '.gdignore')
+    if not os.path.exists(gdignore):
+        open(gdignore, 'w').close()
+
+
+def make_tiles(icon_paths, size=TILE_SIZE, fmt=TILE_FORMAT, max_workers=None):
+    """
+    Makes a tile for every icon path and returns {icon_path: tile_path} (forward slashes).
+    Tiles newer than their icon are reused; icons that can't be processed are left out.
+    Returns {} when Pillow is not installed.
+    """
+    icon_paths = [path for path in dict.fromkeys(icon_paths) if path]
+    if not icon_paths:
+        return {}
+    if not pillow_available():
+        logging.info("  -> Pillow is not installed, icons are used as downloaded.")
+        return {}
+    _prepare_tile_dir()
+
+    tiles = {}
+    stale = []
+    for icon_path in icon_paths:
+        tile_path = tile_path_for(icon_path, size, fmt)
+        if _is_fresh(icon_path, tile_path):
+            tiles[icon_path] = tile_path.replace('\\', '/')
+        elif os.path.isfile(icon_path):
+            stale.append((icon_path, tile_path))
+
+    if len(stale) >= POOL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(make_tile, *zip(*stale), [size] * len(stale), [fmt] * len(stale)))
+    else:
+        results = [make_tile(icon_path, tile_path, size, fmt) for icon_path, tile_path in stale]
+
+    for (icon_path, tile_path), result in zip(stale, results):
+        if isinstance(result, Exception):
+            logging.warning(f"  -> Could not make a tile for '{icon_path}', using the icon as is: {result!r}")
+        else:
+            tiles[icon_path] = tile_path.replace('\\', '/')
+    if stale:
+        logging.info(f"  -> Made {len(stale)} icon tiles, {len(tiles) - len(stale)} were up to date")
+    return tiles
+
+
+def add_tile_paths(records, size=TILE_SIZE, fmt=TILE_FORMAT):
+    """Sets "icon_tile_path" on every record that has an icon, in place."""
+    tiles = make_tiles([record.get("icon_path") for record in records], size, fmt)
+    for record in records:
+        tile_path = tiles.get(record.get("icon_path"))
+        if tile_path:
+            record["icon_tile_path"] = tile_path
+        else:
+            record.pop("icon_tile_path", None)
+
+
+def build_atlas(tile_paths, atlas_path, size=TILE_SIZE):
+    """
+    Packs same-sized tiles into one square-ish grid image and writes '<atlas>.json' next to it:
+    {"image": ..., "tile_size": size, "icons": {tile file name: [x, y, w, h]}}.
+    Nothing is rebuilt if the atlas is newer than every tile and holds the same set.
+    """
+    from PIL import Image
+
+    tile_paths = sorted(set(tile_paths))
+    index_path = os.path.splitext(atlas_path)[0] + '.json'
+    names = [os.path.basename(path) for path in tile_paths]
+    if os.path.isfile(index_path) and all(_is_fresh(path, atlas_path) for path in tile_paths):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                if sorted(json.load(f).get("icons", {})) == sorted(names):
+                    return index_path
+        except (OSError, ValueError):
+            pass
+
+    columns = max(1, math.ceil(math.sqrt(len(tile_paths))))
+    rows = max(1, math.ceil(len(tile_paths) / columns))
+    atlas = Image.new("RGBA", (columns * size, rows * size), (0, 0, 0, 0))
+    icons = {}
+    for i, (path, name) in enumerate(zip(tile_paths, names)):
+        x, y = (i % columns) * size, (i // columns) * size
+        with Image.open(path) as tile:
+            atlas.paste(tile.convert("RGBA"), (x, y))
+        icons[name] = [x, y, size, size]
+
+    os.makedirs(os.path.dirname(atlas_path) or '.', exist_ok=True)
+    atlas.save(atlas_path)
+    tmp_path = temp_path_for(index_path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"image": atlas_path.replace('\\', '/'), "tile_size": size, "icons": icons}, f, indent=4)
+    os.replace(tmp_path, index_path)
+    logging.info(f"  -> Packed {len(icons)} tiles into '{atlas_path}'")
+    return index_path
+
+
+def _records_in(data):
+    """Every game record in a scanner's output JSON ({root: [records]})."""
+    return [record for records in data.values() if isinstance(records, list) for record in records
+            if isinstance(record, dict)]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename=os.path.join(SCRIPT_DIR, 'python_scanner.log'),
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+    parser = argparse.ArgumentParser(description="Makes icon tiles (and optionally an atlas) for a scan output.")
+    parser.add_argument("scan_output", help="A gamedir_contents JSON written by one of the scanners.")
+    parser.add_argument("--size", type=int, default=TILE_SIZE, help="Tile width and height in pixels.")
+    parser.add_argument("--format", choices=TILE_FORMATS, default=TILE_FORMAT)
+    parser.add_argument("--atlas", help="Also pack the tiles into this PNG, with an index next to it.")
+    args = parser.parse_args()
+
+    if not pillow_available():
+        print("Error: Pillow is required. Please install it using 'pip install Pillow'")
+        sys.exit(1)
+
+    with locked(args.scan_output):
+        with open(args.scan_output, 'r', encoding='utf-8') as f:
+            scan_data = json.load(f)
+        records = _records_in(scan_data)
+        add_tile_paths(records, args.size, args.format)
+
+        tmp_output = temp_path_for(args.scan_output)
+        with open(tmp_output, 'w', encoding='utf-8') as f:
+            json.dump(scan_data, f, separators=(',', ':'))
+        os.replace(tmp_output, args.scan_output)
+
+    if args.atlas:
+        build_atlas([record["icon_tile_path"] for record in records if record.get("icon_tile_path")],
+                    args.atlas, args.size)
\ No newline at end of file
@@ -1,25 +1,70 @@
+# In res://scripts/launch_game.py
+#
+# Starts an emulator with a game. The command line comes from LAUNCH_TEMPLATES,
+# one argument list per platform with {emulator}, {game_path}, {game_id} and
+# {game_dir} placeholders. Entries in config/launch_templates.json (same shape,
+# {platform: [args]}) replace the built-in ones, so emulator flags can change
+# without touching code. launcher_supervisor.py uses the same table.
+
+import os
 import sys
+import json
+import argparse
 import subprocess
 
-def main():
-    # Check if we have the correct number of command-line arguments
-    # sys.argv[0] is the script name itself
-    # sys.argv[1] should be the emulator path
-    # sys.argv[2] should be the game path
-    if len(sys.argv) != 3:
-        print("Usage: python launch_game.py <emulator_path> <game_path>")
-        sys.exit(1)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_PATH = os.path.join(SCRIPT_DIR, 'config', 'launch_templates.json')
+
+LAUNCH_TEMPLATES = {
+    "Switch": ["{emulator}", "-f", "-g", "{game_path}"],
+    "Wii": ["{emulator}", "-e", "{game_path}"],
+    # RPCS3 takes the literal '%RPCS3_GAMEID%:' prefix followed by the serial
+    "Playstation 3": ["{emulator}", "--no-gui", "%RPCS3_GAMEID%:{game_id}"],
+}
+
+
+def load_templates(path=TEMPLATES_PATH):
+    """The built-in templates with the user's overrides applied."""
+    templates = dict(LAUNCH_TEMPLATES)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        return templates
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring '{path}': {e}", file=sys.stderr)
+        return templates
+    for platform, template in overrides.items():
+        if isinstance(template, list) and template and all(isinstance(arg, str) for arg in template):
+            templates[platform] = template
+    return templates
 
-    emulator_path = sys.argv[1]
-    game_path = sys.argv[2]
 
-    # This is the command structure for your Switch emulator
-    command_args = [
-        emulator_path,
-        "-f",
-        "-g",
-        game_path
-    ]
+def build_command(template, emulator, game_path, game_id=None):
+    """Fills a template in. Raises KeyError naming a placeholder the launch didn't provide."""
+    values = {"emulator": emulator, "game_path": game_path, "game_dir": os.path.dirname(game_path)}
+    if game_id:
+        values["game_id"] = game_id
+    return [arg.format_map(values) for arg in template]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Starts an emulator with a game.")
+    parser.add_argument("emulator_path")
+    parser.add_argument("game_path")
+    parser.add_argument("--platform", default="Switch", help="Which launch template to use.")
+    parser.add_argument("--game-id", help="Needed by templates with a {game_id} placeholder.")
+    args = parser.parse_args()
+
+    template = load_templates().get(args.platform)
+    if template is None:
+        print(f"Error: no launch template for '{args.platform}'")
+        sys.exit(1)
+    try:
+        command_args = build_command(template, args.emulator_path, args.game_path, args.game_id)
+    except KeyError as e:
+        print(f"Error: the {args.platform} template needs {e}")
+        sys.exit(1)
 
     print(f"--- Python Launcher ---")
     print(f"Executing command: {' '.join(command_args)}")
@@ -0,0 +1,381 @@
+# In res://scripts/launcher_supervisor.py
+#
+# A resident launcher. XMB.gd starts it once and sends launch requests to it
+# instead of spawning cmd.exe and a fresh Python interpreter per game. It
+# speaks the same line-based JSON-RPC 2.0 as scanner_daemon.py, over a
+# localhost TCP connection (or stdin/stdout with --stdio):
+#
+#   {"jsonrpc": "2.0", "id": 1, "method": "auth", "params": {"token": "<contents of --token-file>"}}
+#   {"jsonrpc": "2.0", "id": 2, "method": "launch", "params": {"platform": "Wii", "game_path": "F:/wii/a.rvz"}}
+#
+# Anything on the machine can connect to a localhost port, web pages included,
+# so a TCP client must send "auth" with the session token XMB.gd wrote to
+# --token-file before anything else; a connection that starts with anything
+# else is answered with an error and closed. The emulator is never taken from
+# the request either: it is the "<platform>_EXEC" path the user set in the
+# launcher's settings (--emulator-config, re-read on every launch), run through
+# the platform's template from launch_game.py.
+#
+# Methods:
+#   auth      - params: token (TCP only). result: true
+#   launch    - params: platform, game_path, game_id (opt., PS3), requested_at (opt., unix time
+#               the user pressed play)
+#               result: {"launch_id", "pid", "command", "start_ms", "request_ms"}
+#               start_ms is the time from receiving the request to the process running,
+#               request_ms the time since requested_at (null without it).
+#   running   - result: list of {"launch_id", "pid", "platform", "game_path", "started"}
+#   stop      - params: launch_id; asks the emulator to terminate. result: true if it was running
+#   templates - result: the launch templates in use (see launch_game.py)
+#   ping      - result: "pong"
+#   shutdown  - result: null, then the supervisor exits (running emulators keep running)
+#
+# Notifications sent to every client:
+#   launch.started - {"launch_id", "pid", "platform", "game_path", "start_ms"}
+#   launch.exited  - {"launch_id", "pid", "platform", "game_path", "exit_code", "runtime_s"}
+#
+# To try it without an emulator (e.g. on Linux), set bench/fake_emulator.py as
+# the platform's executable; it accepts any flags, runs for a while and exits
+# with a chosen code.
+#
+# The supervisor logs to python_scanner.log; XMB_SCANNER_LOG overrides it.
+#
+# Usage: python launcher_supervisor.py --token-file TOKEN --emulator-config EMULATOR_PATHS_CFG [--port 47601]
+#        python launcher_supervisor.py --stdio --emulator-config EMULATOR_PATHS_CFG
+
+import os
+import re
+import sys
+import json
+import hmac
+import time
+import logging
+import argparse
+import threading
+import subprocess
+import socketserver
+
+from launch_game import load_templates, build_command
+from scanner_daemon import RpcError, PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, INVALID_PARAMS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PORT = int(os.getenv("XMB_LAUNCHER_PORT", "47601"))
+
+LAUNCH_FAILED = -32001
+NOT_AUTHORIZED = -32002
+
+# One 'key=value' line of a Godot ConfigFile; keys with spaces are written quoted
+CONFIG_ENTRY = re.compile(r'^("(?:[^"\\]|\\.)*"|[^=\s]+)\s*=\s*(.*)$')
+
+
+def setup_logging():
+    """Configures logging to write to a file."""
+    log_file_path = os.getenv("XMB_SCANNER_LOG", os.path.join(SCRIPT_DIR, 'python_scanner.log'))
+    logging.basicConfig(
+        filename=log_file_path,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
+
+def _config_string(text):
+    text = text.strip()
+    if text.startswith('"'):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text.strip('"')
+    return text
+
+
+def read_emulator_paths(config_path):
+    """The emulator executables set in XMB.gd's emulator_paths.cfg, as {platform: path}."""
+    paths = {}
+    section = None
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('[') and line.endswith(']'):
+                    section = line[1:-1]
+                    continue
+                match = CONFIG_ENTRY.match(line)
+                if section != "paths" or not match:
+                    continue
+                key, value = _config_string(match.group(1)), _config_string(match.group(2))
+                if key.endswith("_EXEC") and isinstance(value, str) and value:
+                    paths[key[:-len("_EXEC")]] = value
+    except OSError as e:
+        logging.warning(f"Could not read emulator paths from '{config_path}': {e}")
+    return paths
+
+
+def read_token(token_path):
+    try:
+        with open(token_path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError as e:
+        logging.error(f"Could not read the launcher token from '{token_path}': {e}")
+        return None
+
+
+class LauncherSupervisor:
+    """Starts emulators from the template table and watches every process until it exits."""
+
+    def __init__(self, templates, notify, emulator_config):
+        self.templates = templates
+        self.notify = notify
+        self.emulator_config = emulator_config
+        self.running = True
+        self.launches = {}
+        self.next_id = 1
+        self._lock = threading.Lock()
+
+    def launch(self, platform=None, game_path=None, game_id=None, requested_at=None):
+        received = time.perf_counter()
+        template = self.templates.get(platform)
+        if template is None:
+            raise RpcError(INVALID_PARAMS, f"No launch template for '{platform}'")
+        if not game_path:
+            raise RpcError(INVALID_PARAMS, "'game_path' is required")
+        emulator = read_emulator_paths(self.emulator_config).get(platform)
+        if not emulator:
+            raise RpcError(LAUNCH_FAILED, f"No {platform} emulator executable is set in the launcher's settings")
+        try:
+            command = build_command(template, emulator, game_path, game_id)
+        except KeyError as e:
+            raise RpcError(INVALID_PARAMS, f"The {platform} launch template needs {e}")
+
+        try:
+            # The emulator must not write into the protocol stream
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logging.error(f"Could not start {platform} emulator: {e}")
+            raise RpcError(LAUNCH_FAILED, f"Could not start '{emulator}': {e}")
+        start_ms = round((time.perf_counter() - received) * 1000, 2)
+        request_ms = round((time.time() - requested_at) * 1000, 2) if requested_at else None
+
+        with self._lock:
+            launch_id = self.next_id
+            self.next_id += 1
+            self.launches[launch_id] = {"process": process, "platform": platform, "game_path": game_path,
+                                        "started": time.time()}
+        logging.info(f"Launched {platform} game '{game_path}' as pid {process.pid} "
+                     f"({start_ms} ms to start, {request_ms} ms since requested)")
+        self.notify("launch.started", {"launch_id": launch_id, "pid": process.pid, "platform": platform,
+                                       "game_path": game_path, "start_ms": start_ms})
+        threading.Thread(target=self._watch, args=(launch_id,), daemon=True).start()
+        return {"launch_id": launch_id, "pid": process.pid, "command": command, "start_ms": start_ms,
+                "request_ms": request_ms}
+
+    def _watch(self, launch_id):
+        launch = self.launches[launch_id]
+        exit_code = launch["process"].wait()
+        runtime = round(time.time() - launch["started"], 3)
+        with self._lock:
+            self.launches.pop(launch_id, None)
+        logging.info(f"{launch['platform']} game '{launch['game_path']}' exited with code {exit_code} "
+                     f"after {runtime}s")
+        self.notify("launch.exited", {"launch_id": launch_id, "pid": launch["process"].pid,
+                                      "platform": launch["platform"], "game_path": launch["game_path"],
+                                      "exit_code": exit_code, "runtime_s": runtime})
+
+    def list_running(self):
+        with self._lock:
+            return [{"launch_id": launch_id, "pid": launch["process"].pid, "platform": launch["platform"],
+                     "game_path": launch["game_path"], "started": launch["started"]}
+                    for launch_id, launch in self.launches.items()]
+
+    def stop(self, launch_id=None):
+        with self._lock:
+            launch = self.launches.get(launch_id)
+        if launch is None:
+            return False
+        launch["process"].terminate()
+        return True
+
+    def handle(self, request):
+        """Handles one decoded request and returns the response dict (None for notifications)."""
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or "method" not in request:
+            return self._error(None, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+
+        try:
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "Params must be an object")
+            if method == "launch":
+                result = self.launch(**params)
+            elif method == "running":
+                result = self.list_running()
+            elif method == "stop":
+                result = self.stop(**params)
+            elif method == "templates":
+                result = self.templates
+            elif method == "auth":
+                # Only TCP connections need it; see serve_tcp
+                result = True
+            elif method == "ping":
+                result = "pong"
+            elif method == "shutdown":
+                self.running = False
+                result = None
+            else:
+                raise RpcError(METHOD_NOT_FOUND, f"Method '{method}' not found")
+        except RpcError as e:
+            return self._error(request_id, e.code, e.message)
+        except TypeError as e:
+            return self._error(request_id, INVALID_PARAMS, str(e))
+
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return self._error(None, PARSE_ERROR, f"Parse error: {e}")
+        return self.handle(request)
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class Clients:
+    """The connected clients' output streams; notifications go to all of them."""
+
+    def __init__(self):
+        self.streams = []
+        self._lock = threading.Lock()
+
+    def add(self, stream):
+        with self._lock:
+            self.streams.append(stream)
+
+    def remove(self, stream):
+        with self._lock:
+            if stream in self.streams:
+                self.streams.remove(stream)
+
+    def write(self, message, stream=None):
+        line = (json.dumps(message) + "\n").encode("utf-8")
+        with self._lock:
+            targets = [stream] if stream is not None else list(self.streams)
+            for target in targets:
+                try:
+                    target.write(line)
+                    target.flush()
+                except (OSError, ValueError):
+                    pass
+
+    def notify(self, method, params):
+        self.write({"jsonrpc": "2.0", "method": method, "params": params})
+
+
+def serve_stdio(supervisor, clients):
+    """Reads requests from stdin until shutdown or end of input."""
+    clients.add(sys.stdout.buffer)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = supervisor.handle_line(line)
+        if response is not None:
+            clients.write(response, sys.stdout.buffer)
+        if not supervisor.running:
+            break
+
+
+def is_auth_request(line, token):
+    """True if line is an "auth" request carrying token."""
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return False
+    if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or request.get("method") != "auth":
+        return False
+    params = request.get("params")
+    offered = params.get("token") if isinstance(params, dict) else None
+    return isinstance(offered, str) and hmac.compare_digest(offered.encode("utf-8"), token.encode("utf-8"))
+
+
+def serve_tcp(supervisor, clients, port, token):
+    """
+    Accepts clients on 127.0.0.1:port, each sending one request per line, until shutdown.
+    A connection whose first line isn't an "auth" request with token is answered with an error and closed.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            authenticated = False
+            try:
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    line = line.decode("utf-8", "replace")
+                    if not authenticated:
+                        if not is_auth_request(line, token):
+                            logging.warning(f"Launcher supervisor: refused a client from {self.client_address} "
+                                            f"that did not authenticate")
+                            clients.write(supervisor._error(None, NOT_AUTHORIZED, "Not authorized"), self.wfile)
+                            break
+                        authenticated = True
+                        # Only authenticated clients hear about launches
+                        clients.add(self.wfile)
+                    response = supervisor.handle_line(line)
+                    if response is not None:
+                        clients.write(response, self.wfile)
+                    if not supervisor.running:
+                        threading.Thread(target=self.server.shutdown, daemon=True).start()
+                        break
+            except (OSError, ValueError):
+                pass
+            finally:
+                clients.remove(self.wfile)
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = sys.platform != 'win32'
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    try:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        # Most likely a supervisor from an earlier session is still listening; clients use that one
+        logging.warning(f"Launcher supervisor could not listen on port {port}: {e}")
+        return False
+    with server:
+        logging.info(f"Launcher supervisor listening on 127.0.0.1:{port}")
+        server.serve_forever()
+    return True
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Resident launcher that starts and watches emulators.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Localhost TCP port to listen on.")
+    parser.add_argument("--stdio", action="store_true", help="Talk JSON-RPC over stdin/stdout instead.")
+    parser.add_argument("--token-file", help="File holding the token TCP clients must authenticate with.")
+    parser.add_argument("--emulator-config", required=True,
+                        help="The launcher's emulator_paths.cfg, where the emulator executables are looked up.")
+    args = parser.parse_args()
+
+    logging.info("--- Launcher Supervisor Starting ---")
+    token = None
+    if not args.stdio:
+        token = read_token(args.token_file) if args.token_file else None
+        if not token:
+            logging.error("Launcher supervisor needs a --token-file to listen on TCP, not starting.")
+            sys.exit(1)
+    clients = Clients()
+    supervisor = LauncherSupervisor(load_templates(), clients.notify, args.emulator_config)
+    if args.stdio:
+        serve_stdio(supervisor, clients)
+    elif not serve_tcp(supervisor, clients, args.port, token):
+        sys.exit(1)
+    logging.info("--- Launcher Supervisor Finished ---")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,236 @@
+# In res://scripts/library_merge.py
+#
+# Merges scanner output into the launcher's library (menu_data.json), so XMB.gd
+# only has to load the finished file. Every platform's output is normalised to
+# one item schema:
+#
+#   {"name": ..., "path": ..., "icon_path": ..., "id": ..., "alternate_paths": [...] (only for merged copies)}
+#
+# Items are matched to the library by a stable key ("id:<game id>" when the
+# scanner could read one, else "path:<path>"), so a renamed or moved game keeps
+# its place and any fields the scanners don't write (user data such as
+# favourites or play counts) survive a rescan. Only the scanned platform's
+# section is replaced; each section also carries an index {key: item position}.
+# The file is written atomically and only when the section actually changed,
+# under a lock (see file_lock.py) since several scripts merge at the same time.
+# Large libraries can live in a sharded store instead (see library_store.py);
+# pass its directory wherever a menu_data.json path is taken.
+#
+# Usage: python library_merge.py <platform> <scan output .json> [<menu_data.json>]
+
+import os
+import sys
+import json
+import logging
+
+from file_lock import locked, temp_path_for
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'menu_data.json')
+
+PLATFORM_ICONS = {
+    "Switch": "res://src/icons/platform/icon_switch.svg",
+    "Wii": "res://src/icons/platform/icon_wii.svg",
+    "Playstation 3": "res://src/icons/platform/icon_ps3.svg",
+}
+# The fields a scan owns; everything else on a library item belongs to the user
+SCANNER_FIELDS = ("name", "path", "icon_path", "id", "alternate_paths")
+DELTA_KINDS = ("added", "changed", "removed")
+# Delta "removed" lists hold filenames under their root, except for these platforms (game ids)
+ID_KEYED_PLATFORMS = ("Playstation 3",)
+
+
+def _normalize_path(path):
+    return path.replace('\\', '/')
+
+
+def path_key(path):
+    return "path:" + _normalize_path(path).rstrip('/').casefold()
+
+
+def item_key(item):
+    return f"id:{item['id']}" if item.get("id") else path_key(item.get("path") or "")
+
+
+def _icon_for(record):
+    """The tile-sized icon when icon_pipeline.py made one, else the full icon."""
+    tile_path = record.get("icon_tile_path")
+    if tile_path and os.path.isfile(tile_path):
+        return tile_path
+    return record.get("icon_path")
+
+
+def normalize_record(root, record):
+    """One scanner record (Switch/Wii {"filename", ...} or PS3 {"name", "path", ...}) as a library item."""
+    if "filename" in record:
+        filename = record["filename"]
+        item = {
+            "name": record.get("title") or filename,
+            "path": f"{_normalize_path(root).rstrip('/')}/{filename}",
+        }
+    else:
+        item = {"name": record.get("name", ""), "path": _normalize_path(record.get("path", ""))}
+    item["icon_path"] = _icon_for(record)
+    item["id"] = record.get("id", "")
+    if record.get("alternate_paths"):
+        item["alternate_paths"] = record["alternate_paths"]
+    return item
+
+
+def normalize_scan_output(data):
+    """Every record of a full scan output ({root: [records]}) as library items, in scan order."""
+    return [normalize_record(root, record) for root, records in data.items() if isinstance(records, list)
+            for record in records if isinstance(record, dict)]
+
+
+def is_delta(data):
+    return isinstance(data, dict) and set(data) == set(DELTA_KINDS)
+
+
+def _removed_keys(removed, by_id=False):
+    """Keys of the games a delta removed: filenames under their root, or game ids when by_id."""
+    if by_id:
+        return {f"id:{name}" for names in removed.values() for name in names}
+    return {path_key(f"{_normalize_path(root).rstrip('/')}/{name}")
+            for root, names in removed.items() for name in names}
+
+
+def _merge_item(old, new):
+    """The scanned item with the user's own fields of the library item it replaces."""
+    if old is None:
+        return new
+    merged = {field: value for field, value in old.items() if field not in SCANNER_FIELDS}
+    merged.update(new)
+    return merged
+
+
+def merge_items(old_items, scanned, delta=False, removed_by_id=False):
+    """
+    Merges scanned items into a platform's old items. A full scan replaces the list
+    (keeping user fields of matched items); a delta ({"added", "changed", "removed"}
+    of raw scanner records) only touches the games it names.
+    """
+    by_key, by_path = {}, {}
+    for item in old_items:
+        if isinstance(item, dict):
+            by_key.setdefault(item_key(item), item)
+            by_path.setdefault(path_key(item.get("path") or ""), item)
+
+    def old_for(item):
+        return by_key.get(item_key(item)) or by_path.get(path_key(item["path"]))
+
+    if not delta:
+        return [_merge_item(old_for(item), item) for item in scanned]
+
+    # Updated games stay where they were, new ones go to the end
+    updated, new_items = {}, []
+    for kind in ("added", "changed"):
+        for item in normalize_scan_output(scanned[kind]):
+            old = old_for(item)
+            if old is None:
+                new_items.append(item)
+            else:
+                updated[id(old)] = _merge_item(old, item)
+
+    removed = _removed_keys(scanned["removed"], removed_by_id)
+    items = []
+    for item in old_items:
+        if not isinstance(item, dict):
+            continue
+        if id(item) in updated:
+            items.append(updated[id(item)])
+        elif item_key(item) not in removed and path_key(item.get("path") or "") not in removed:
+            items.append(item)
+    return items + new_items
+
+
+def build_index(items):
+    """{key: position} for a platform's items; a key taken twice falls back to the item's path."""
+    index = {}
+    for position, item in enumerate(items):
+        key = item_key(item)
+        if key in index:
+            key = path_key(item.get("path") or "")
+        index.setdefault(key, position)
+    return index
+
+
+def load_library(library_path):
+    try:
+        with open(library_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        return json.loads(content) if content else {}
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logging.warning(f"  -> '{library_path}' is not valid JSON ({e}), starting a new library.")
+        return {}
+
+
+def write_library(library_path, library):
+    """Writes the library like Godot's JSON.stringify(data, "\\t") does, replacing the file atomically."""
+    tmp_path = temp_path_for(library_path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(library, f, indent='\t', sort_keys=True, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, library_path)
+
+
+def merge_into_library(library_path, platform, scan_data):
+    """
+    Merges one platform's scan output (full or delta) into the library file, or into
+    the sharded store (see library_store.py) when library_path is its directory.
+    Returns True if the platform's section changed and the file was rewritten.
+    """
+    if scan_data is None:
+        return False
+    import library_store
+
+    # Held from the read to the write, so a concurrent scan or backfill can't lose this merge
+    with locked(library_path):
+        sharded = library_store.is_store(library_path)
+        if sharded:
+            library = None
+            old_section = library_store.load_platform(library_path, platform)
+        else:
+            library = load_library(library_path)
+            old_section = library.get(platform) if isinstance(library.get(platform), dict) else {}
+        old_items = old_section.get("items") if isinstance(old_section.get("items"), list) else []
+
+        if is_delta(scan_data):
+            items = merge_items(old_items, scan_data, delta=True, removed_by_id=platform in ID_KEYED_PLATFORMS)
+        else:
+            items = merge_items(old_items, normalize_scan_output(scan_data))
+
+        section = dict(old_section)
+        section["icon_path"] = old_section.get("icon_path") or PLATFORM_ICONS.get(platform, "res://icon.svg")
+        section["items"] = items
+        section["index"] = build_index(items)
+        if section == old_section:
+            logging.info(f"Library section '{platform}' is unchanged.")
+            return False
+
+        if sharded:
+            library_store.write_platform(library_path, platform, section)
+        else:
+            library[platform] = section
+            write_library(library_path, library)
+        logging.info(f"Merged {len(items)} {platform} games into '{library_path}'.")
+        return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename=os.path.join(SCRIPT_DIR, 'python_scanner.log'),
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+    if len(sys.argv) < 3:
+        print("Usage: python library_merge.py <platform> <scan output .json> [<menu_data.json>]")
+        sys.exit(1)
+
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        scan_output = json.load(f)
+    merge_into_library(sys.argv[3] if len(sys.argv) > 3 else DEFAULT_LIBRARY_PATH, sys.argv[1], scan_output)
\ No newline at end of file
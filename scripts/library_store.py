@@ -0,0 +1,295 @@
+# In res://scripts/library_store.py
+#
+# A sharded form of menu_data.json for large libraries. Instead of one
+# pretty-printed document, every platform's games are split by game directory
+# into compact shards, each with its common path and icon directory factored
+# out, plus a small index the launcher reads first:
+#
+#   library/index.json
+#     {"version": 2, "platforms": {"Wii": {"section": {"icon_path": ...}, "count": 812,
+#       "shards": [{"file": "wii-1f3a9c0d2e.json", "root": "F:/wii/", "count": 800, "mtime": ...}, ...],
+#       "runs": [[0, 790], [1, 12], [0, 10]]}}}
+#   library/wii-1f3a9c0d2e.json
+#     {"version": 2, "platform": "Wii", "root": "F:/wii/", "icon_dir": "C:/xmb/scripts/media/icon/",
+#      "items": [{"name": "Mario Kart Wii", "path": "mkw.rvz", "icon_file": "mkw.png", "id": "RMCE01"}, ...]}
+#
+# Item paths are relative to the shard's root. An icon that lives in the
+# shard's icon_dir is stored as "icon_file", the part after icon_dir; any other
+# icon_path (absolute or relative) is stored as is. Every other field is stored
+# as is too, so user data survives. Items keep their order within a shard, and
+# "runs" in the index records how the shards interleave in library order
+# ([shard number, how many games] at a time), so joining the shards gives back
+# exactly the list that was split. Only shards whose content changed are
+# rewritten, so an unchanged shard keeps its mtime in the index.
+#
+# Version 1 shards had no "icon_file" and no "runs": a relative icon_path was
+# always relative to icon_dir, and shards were read one after the other.
+#
+# library_merge.py merges straight into a store when given its directory
+# instead of a .json file.
+#
+# Usage: python library_store.py split <menu_data.json> <library dir>
+#        python library_store.py join <library dir> <menu_data.json>
+
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+
+from file_lock import locked, temp_path_for
+from library_merge import build_index, load_library, write_library
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_NAME = 'index.json'
+STORE_VERSION = 2
+
+
+def is_store(library_path):
+    """A library path names a sharded store unless it is a .json file."""
+    return not library_path.lower().endswith('.json')
+
+
+def _parent(path):
+    """Everything up to and including the last '/' before the file or folder name."""
+    cut = path.rstrip('/').rfind('/')
+    return path[:cut + 1] if cut >= 0 else ""
+
+
+def _is_relative(value):
+    return not value.startswith(('/', '\\')) and ':' not in value
+
+
+def group_by_root(items):
+    """
+    Splits items into [(root, [items])] by game directory, in the order each root first
+    appears. Games in sub-folders go with the closest directory that holds other games.
+    """
+    parents = sorted({_parent(item.get("path") or "") for item in items}, key=len)
+    root_for = {}
+    roots = []
+    for parent in parents:
+        root = next((root for root in roots if root and parent.startswith(root)), parent)
+        if root == parent:
+            roots.append(parent)
+        root_for[parent] = root
+
+    groups = {}
+    for item in items:
+        groups.setdefault(root_for[_parent(item.get("path") or "")], []).append(item)
+    return list(groups.items())
+
+
+def _common_icon_dir(items):
+    dirs = {}
+    for item in items:
+        icon_path = item.get("icon_path")
+        if isinstance(icon_path, str) and _parent(icon_path):
+            dirs[_parent(icon_path)] = dirs.get(_parent(icon_path), 0) + 1
+    return max(dirs, key=dirs.get) if dirs else ""
+
+
+def pack_shard(platform, root, items):
+    icon_dir = _common_icon_dir(items)
+    packed = []
+    for item in items:
+        entry = dict(item)
+        if isinstance(item.get("path"), str):
+            entry["path"] = item["path"][len(root):]
+        icon_path = item.get("icon_path")
+        if icon_dir and isinstance(icon_path, str) and icon_path.startswith(icon_dir) \
+                and _is_relative(icon_path[len(icon_dir):]):
+            del entry["icon_path"]
+            entry["icon_file"] = icon_path[len(icon_dir):]
+        packed.append(entry)
+    return {"version": STORE_VERSION, "platform": platform, "root": root, "icon_dir": icon_dir, "items": packed}
+
+
+def unpack_shard(shard):
+    root = shard.get("root", "")
+    icon_dir = shard.get("icon_dir", "")
+    legacy = shard.get("version", 1) < 2
+    items = []
+    for entry in shard.get("items", []):
+        item = dict(entry)
+        if isinstance(entry.get("path"), str):
+            item["path"] = root + entry["path"]
+        if "icon_file" in entry:
+            item["icon_path"] = icon_dir + item.pop("icon_file")
+        elif legacy and icon_dir and isinstance(entry.get("icon_path"), str) and _is_relative(entry["icon_path"]):
+            item["icon_path"] = icon_dir + entry["icon_path"]
+        items.append(item)
+    return items
+
+
+def shard_runs(groups, items):
+    """[[shard number, count], ...] giving the order in which items take their games from the shards."""
+    shard_of = {id(item): number for number, (_, group) in enumerate(groups) for item in group}
+    runs = []
+    for item in items:
+        number = shard_of[id(item)]
+        if runs and runs[-1][0] == number:
+            runs[-1][1] += 1
+        else:
+            runs.append([number, 1])
+    return runs
+
+
+def interleave(shard_items, runs):
+    """Puts the shards' items back in library order. Without usable runs the shards are concatenated."""
+    cursors = [0] * len(shard_items)
+    items = []
+    for run in runs if isinstance(runs, list) else []:
+        try:
+            number, count = int(run[0]), int(run[1])
+            taken = shard_items[number][cursors[number]:cursors[number] + count]
+        except (TypeError, ValueError, IndexError):
+            continue
+        items.extend(taken)
+        cursors[number] += len(taken)
+    # Whatever the runs don't account for (a version 1 index, or a shard that changed on its own)
+    for number, shard in enumerate(shard_items):
+        items.extend(shard[cursors[number]:])
+    return items
+
+
+def shard_name(platform, root):
+    slug = re.sub(r'[^a-z0-9]+', '-', platform.lower()).strip('-') or 'platform'
+    return f"{slug}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:10]}.json"
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def _write_if_changed(path, text):
+    """Replaces the file atomically unless it already holds text. Returns True if it was written."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except (OSError, ValueError):
+        pass
+    tmp_path = temp_path_for(path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def load_index(store_dir):
+    try:
+        with open(os.path.join(store_dir, INDEX_NAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {"version": STORE_VERSION, "platforms": {}}
+    except ValueError as e:
+        logging.warning(f"  -> Library index in '{store_dir}' is not valid JSON ({e}), starting a new one.")
+        return {"version": STORE_VERSION, "platforms": {}}
+    if not isinstance(index.get("platforms"), dict):
+        index["platforms"] = {}
+    return index
+
+
+def load_platform(store_dir, platform, index=None):
+    """One platform's section as menu_data.json has it ({..., "items", "index"}), or {} if it isn't stored."""
+    entry = (index or load_index(store_dir))["platforms"].get(platform)
+    if not isinstance(entry, dict):
+        return {}
+    shard_items = []
+    for shard_info in entry.get("shards", []):
+        try:
+            with open(os.path.join(store_dir, shard_info["file"]), 'r', encoding='utf-8') as f:
+                shard_items.append(unpack_shard(json.load(f)))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"  -> Skipping library shard {shard_info.get('file')}: {e}")
+            shard_items.append([])
+    items = interleave(shard_items, entry.get("runs"))
+    section = dict(entry.get("section", {}))
+    section["items"] = items
+    section["index"] = build_index(items)
+    return section
+
+
+def write_platform(store_dir, platform, section, index=None):
+    """
+    Stores one platform's section ({"icon_path", "items", ...}; "index" is rebuilt on load)
+    and updates the index. Shards the platform no longer has are deleted.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    index = index or load_index(store_dir)
+    old_entry = index["platforms"].get(platform) or {}
+    items = [item for item in section.get("items", []) if isinstance(item, dict)]
+
+    groups = group_by_root(items)
+    shards = []
+    written = 0
+    for root, root_items in groups:
+        name = shard_name(platform, root)
+        path = os.path.join(store_dir, name)
+        if _write_if_changed(path, _dumps(pack_shard(platform, root, root_items))):
+            written += 1
+        shards.append({"file": name, "root": root, "count": len(root_items), "mtime": os.stat(path).st_mtime})
+
+    kept = {shard["file"] for shard in shards}
+    for shard_info in old_entry.get("shards", []):
+        if shard_info.get("file") not in kept:
+            try:
+                os.remove(os.path.join(store_dir, shard_info["file"]))
+            except (OSError, KeyError):
+                pass
+
+    index["version"] = STORE_VERSION
+    index["platforms"][platform] = {
+        "section": {key: value for key, value in section.items() if key not in ("items", "index")},
+        "count": len(items),
+        "shards": shards,
+        "runs": shard_runs(groups, items),
+    }
+    _write_if_changed(os.path.join(store_dir, INDEX_NAME), json.dumps(index, indent='\t', ensure_ascii=False))
+    logging.info(f"Stored {len(items)} {platform} games in {len(shards)} shards ({written} rewritten) "
+                 f"in '{store_dir}'.")
+    return index
+
+
+def split_library(library_path, store_dir):
+    """Converts a menu_data.json into a sharded store."""
+    with locked(store_dir):
+        library = load_library(library_path)
+        index = load_index(store_dir)
+        for platform, section in library.items():
+            if isinstance(section, dict) and isinstance(section.get("items"), list):
+                index = write_platform(store_dir, platform, section, index)
+    return index
+
+
+def join_library(store_dir, library_path):
+    """Converts a sharded store back into a menu_data.json."""
+    with locked(library_path):
+        index = load_index(store_dir)
+        library = {platform: load_platform(store_dir, platform, index) for platform in index["platforms"]}
+        write_library(library_path, library)
+    return library
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename=os.path.join(SCRIPT_DIR, 'python_scanner.log'),
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+    if len(sys.argv) != 4 or sys.argv[1] not in ("split", "join"):
+        print("Usage: python library_store.py split <menu_data.json> <library dir>\n"
+              "       python library_store.py join <library dir> <menu_data.json>")
+        sys.exit(1)
+
+    if sys.argv[1] == "split":
+        result = split_library(sys.argv[2], sys.argv[3])
+        print(f"Split into {sum(len(p['shards']) for p in result['platforms'].values())} shards.")
+    else:
+        result = join_library(sys.argv[2], sys.argv[3])
+        print(f"Joined {sum(len(section['items']) for section in result.values())} games.")
\ No newline at end of file
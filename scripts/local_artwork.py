@@ -0,0 +1,227 @@
+# In res://scripts/local_artwork.py
+#
+# Harvests the icons and titles that ship with the games themselves, so most
+# scans never have to ask SteamGridDB:
+#
+#   PS3       PARAM.SFO (TITLE, TITLE_ID) and ICON0.PNG, in PS3_GAME/ for disc
+#             games or in the game folder itself for PSN/HDD games.
+#   GameCube  opening.bnr from the disc's file system: a 96x32 banner (RGB5A3)
+#             and the full game name. Only plain .iso/.gcm images can be read.
+#   Wii       the banner lives in the encrypted game partition, so only the
+#             title from the disc header (game_id.py) is available.
+#
+# Icons are written to scripts/media/icon like the downloaded ones and are only
+# rewritten when the source is newer than the icon already there.
+
+import os
+import zlib
+import struct
+import logging
+
+from artwork import atomic_copy, icon_path_for, ICON_SAVE_DIR
+from game_id import GAMECUBE_MAGIC
+
+# PARAM.SFO: little endian header, then 16 byte index entries
+SFO_MAGIC = b"\0PSF"
+SFO_HEADER = struct.Struct("<4sIIII")  # magic, version, key table, data table, entry count
+SFO_ENTRY = struct.Struct("<HHIII")     # key offset, format, length, max length, data offset
+SFO_FORMAT_INT32 = 0x0404
+
+# GameCube disc: FST offset and size at 0x424, 12 byte FST entries
+GC_FST_POINTER = 0x424
+GC_FST_ENTRY = struct.Struct(">III")
+GC_BANNER_NAME = "opening.bnr"
+GC_BANNER_MAGICS = (b"BNR1", b"BNR2")
+GC_BANNER_WIDTH, GC_BANNER_HEIGHT = 96, 32
+GC_BANNER_IMAGE_OFFSET = 0x20
+GC_BANNER_INFO_OFFSET = 0x1820  # short name (0x20), short maker (0x20), long name (0x40), ...
+GC_BANNER_SIZE = 0x1960
+GC_MAX_FST_SIZE = 4 * 1024 * 1024
+
+
+def read_param_sfo(path):
+    """Returns the entries of a PARAM.SFO as {key: str or int}, or None if it can't be parsed."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, _, key_table, data_table, count = SFO_HEADER.unpack_from(data, 0)
+        if magic != SFO_MAGIC:
+            return None
+
+        entries = {}
+        for i in range(count):
+            key_offset, fmt, length, _, data_offset = SFO_ENTRY.unpack_from(data, SFO_HEADER.size + i * SFO_ENTRY.size)
+            key_start = key_table + key_offset
+            key = data[key_start:data.index(b"\0", key_start)].decode("utf-8")
+            value = data[data_table + data_offset:data_table + data_offset + length]
+            if fmt == SFO_FORMAT_INT32:
+                entries[key] = struct.unpack("<I", value[:4])[0]
+            else:
+                entries[key] = value.split(b"\0", 1)[0].decode("utf-8", "replace").strip()
+        return entries
+    except (OSError, struct.error, ValueError) as e:
+        logging.warning(f"  -> Could not read '{path}': {e}")
+        return None
+
+
+def _copy_if_newer(source, target):
+    """Copies source to target unless target is already at least as new. Returns the target for Godot."""
+    try:
+        if os.path.getmtime(target) >= os.path.getmtime(source):
+            return target.replace('\\', '/')
+    except OSError:
+        pass
+    atomic_copy(source, target)
+    logging.info(f"  -> Local icon saved to: {target}")
+    return target.replace('\\', '/')
+
+
+def ps3_local_info(game_path, icon_name):
+    """
+    Reads a PS3 game folder. Returns (title, icon_path): the TITLE from PARAM.SFO
+    and ICON0.PNG copied to '<icon_name>.png'. Either can be None.
+    """
+    title = None
+    icon_path = None
+    for folder in (os.path.join(game_path, "PS3_GAME"), game_path):
+        sfo_path = os.path.join(folder, "PARAM.SFO")
+        icon = os.path.join(folder, "ICON0.PNG")
+        if not os.path.isfile(sfo_path) and not os.path.isfile(icon):
+            continue
+
+        sfo = read_param_sfo(sfo_path) if os.path.isfile(sfo_path) else None
+
+        if sfo and isinstance(sfo.get("TITLE"), str) and sfo["TITLE"]:
+            # Titles may span two lines on the XMB, e.g. "Game\nSubtitle"
+            title = " ".join(sfo["TITLE"].split())
+        if os.path.isfile(icon):
+            try:
+                icon_path = _copy_if_newer(icon, icon_path_for(icon_name))
+            except OSError as e:
+                logging.warning(f"  -> Could not copy '{icon}': {e}")
+        break
+    return title, icon_path
+
+
+def _find_root_file(f, name):
+    """Returns (offset, size) of a file in the root folder of a GameCube disc, or None."""
+    f.seek(GC_FST_POINTER)
+    fst_offset, fst_size = struct.unpack(">II", f.read(8))
+    if not 0 < fst_size <= GC_MAX_FST_SIZE:
+        return None
+    f.seek(fst_offset)
+    fst = f.read(fst_size)
+
+    entry_count = GC_FST_ENTRY.unpack_from(fst, 0)[2]
+    string_table = entry_count * GC_FST_ENTRY.size
+    i = 1
+    while i < entry_count:
+        flags_and_name, offset_or_parent, size_or_next = GC_FST_ENTRY.unpack_from(fst, i * GC_FST_ENTRY.size)
+        name_start = string_table + (flags_and_name & 0xFFFFFF)
+        entry_name = fst[name_start:fst.index(b"\0", name_start)].decode("latin-1")
+        if flags_and_name >> 24:
+            # A folder; skip its contents, opening.bnr is always in the root
+            i = max(size_or_next, i + 1)
+            continue
+        if entry_name.lower() == name:
+            return offset_or_parent, size_or_next
+        i += 1
+    return None
+
+
+def _decode_rgb5a3(image):
+    """Decodes the 4x4-tiled RGB5A3 banner into rows of RGBA bytes."""
+    rows = [bytearray(GC_BANNER_WIDTH * 4) for _ in range(GC_BANNER_HEIGHT)]
+    pixel = 0
+    for tile_y in range(0, GC_BANNER_HEIGHT, 4):
+        for tile_x in range(0, GC_BANNER_WIDTH, 4):
+            for y in range(tile_y, tile_y + 4):
+                for x in range(tile_x, tile_x + 4):
+                    value = (image[pixel * 2] << 8) | image[pixel * 2 + 1]
+                    pixel += 1
+                    if value & 0x8000:
+                        rgba = (((value >> 10) & 0x1F) * 255 // 31, ((value >> 5) & 0x1F) * 255 // 31,
+                                (value & 0x1F) * 255 // 31, 255)
+                    else:
+                        rgba = (((value >> 8) & 0xF) * 17, ((value >> 4) & 0xF) * 17,
+                                (value & 0xF) * 17, ((value >> 12) & 0x7) * 255 // 7)
+                    rows[y][x * 4:x * 4 + 4] = bytes(rgba)
+    return rows
+
+
+def write_png(path, width, height, rows):
+    """Writes 8-bit RGBA rows as a PNG using only the standard library."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    raw = b"".join(b"\0" + bytes(row) for row in rows)
+    png = (b"\x89PNG\r\n\x1a\n"
+           + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+           + chunk(b"IDAT", zlib.compress(raw, 9))
+           + chunk(b"IEND", b""))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+
+
+def gamecube_local_info(image_path, icon_name):
+    """
+    Reads opening.bnr from a plain GameCube image. Returns (title, icon_path) with
+    the banner's long game name and the banner saved as '<icon_name>.png'.
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            f.seek(0x1C)
+            if struct.unpack(">I", f.read(4))[0] != GAMECUBE_MAGIC:
+                return None, None
+            location = _find_root_file(f, GC_BANNER_NAME)
+            if location is None or location[1] < GC_BANNER_SIZE:
+                return None, None
+            f.seek(location[0])
+            banner = f.read(GC_BANNER_SIZE)
+            f.seek(3)
+            region = f.read(1)
+    except (OSError, struct.error, ValueError) as e:
+        logging.warning(f"  -> Could not read banner of '{image_path}': {e}")
+        return None, None
+    if banner[:4] not in GC_BANNER_MAGICS:
+        return None, None
+
+    encoding = "shift_jis" if region == b"J" else "cp1252"
+    info = banner[GC_BANNER_INFO_OFFSET:]
+    long_name = info[0x40:0x80].split(b"\0", 1)[0].decode(encoding, "replace").strip()
+    short_name = info[0x00:0x20].split(b"\0", 1)[0].decode(encoding, "replace").strip()
+    title = " ".join((long_name or short_name).split()) or None
+
+    icon_path = icon_path_for(icon_name)
+    try:
+        if not os.path.isfile(icon_path) or os.path.getmtime(icon_path) < os.path.getmtime(image_path):
+            os.makedirs(ICON_SAVE_DIR, exist_ok=True)
+            image = banner[GC_BANNER_IMAGE_OFFSET:GC_BANNER_IMAGE_OFFSET + GC_BANNER_WIDTH * GC_BANNER_HEIGHT * 2]
+            write_png(icon_path, GC_BANNER_WIDTH, GC_BANNER_HEIGHT, _decode_rgb5a3(image))
+            logging.info(f"  -> Banner saved to: {icon_path}")
+    except OSError as e:
+        logging.warning(f"  -> Could not save banner of '{image_path}': {e}")
+        return title, None
+    return title, icon_path.replace('\\', '/')
+
+
+def harvest_local_files(paths, identities, icon_name_for, max_workers=8):
+    """
+    Looks for local artwork for game files, {name: path} -> {name: (title, icon_path)}
+    for every file that had something to offer. Only identified GameCube images
+    are opened; everything else is left to SteamGridDB.
+    """
+    names = [
+        name for name in paths
+        if (identities.get(name) or {}).get("platform") == "gamecube"
+        and paths[name].lower().endswith(('.iso', '.gcm'))
+    ]
+    if not names:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda name: gamecube_local_info(paths[name], icon_name_for(name)), names)
+        return {name: result for name, result in zip(names, results) if result[0] or result[1]}
\ No newline at end of file
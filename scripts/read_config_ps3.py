@@ -2,34 +2,22 @@
 
 import os
 import sys
-import json
 import re
-import requests
-from dotenv import load_dotenv
 import logging
-
-# --- NEW: Load environment variables and set up API access ---
-load_dotenv()
-api_key = os.getenv("STEAMGRIDDB_API_KEY")
-STEAMGRIDDB_API_URL = "https://www.steamgriddb.com/api/v2"
-
-if api_key:
-    print("API key loaded successfully!")
-else:
-    print("Warning: Could not load SteamGridDB API key. Make sure it's set in your .env file.")
+import argparse
+from artwork import clean_search_name, fetch_artwork_batch
+from artwork_queue import deferred_artwork_fetch
+from game_id import identify_ps3_game
+from title_db import title_for
+from local_artwork import ps3_local_info
+from icon_pipeline import add_tile_paths
+import scan_metrics
+from file_lock import locked
+from library_merge import merge_into_library
+from scan_manifest import ScanManifest, manifest_path_for, write_scan_output
+from scan_stream import open_ndjson_stream
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-ICON_SAVE_DIR = os.path.join(SCRIPT_DIR, 'media', 'icon')
-# --- END NEW ---
-
-
-# This script requires the PyYAML library.
-# You can install it by running: pip install PyYAML
-try:
-    import yaml
-except ImportError:
-    print("Error: The PyYAML library is required. Please install it using 'pip install PyYAML'")
-    sys.exit(1)
 
 # --- NEW: Function to set up logging ---
 def setup_logging():
@@ -42,70 +30,49 @@ def setup_logging():
         filemode='a' # Append mode, so logs from different scripts add to the same file
     )
 
-# --- NEW: Copied function to get and save game artwork ---
-def get_game_artwork(game_filename):
+def read_games_yml(config_path, manifest, root):
     """
-    Searches SteamGridDB for a game's icon, downloads it, and returns the local path.
+    Returns {game_id: game_path} from games.yml. If the file has not changed since
+    the last scan, the paths stored in the manifest are used instead of re-parsing it.
+    They include the games whose folder was missing then (e.g. on an unplugged drive),
+    so those are picked up as soon as the folder is back.
     """
-    if not api_key or api_key == "YOUR_API_KEY_HERE":
-        logging.warning("SteamGridDB API Key is not set. Skipping icon search.")
-        return None
-
-    # 1. Clean filename to get a good search term
-    clean_name = re.sub(r'\[.*?\]|\(.*?\)|\..*$', '', game_filename).strip()
-    if not clean_name:
-        return None
-
-    logging.info(f"  -> Searching artwork for '{clean_name}'...")
-    headers = {'Authorization': f'Bearer {api_key}'}
-    
+    yml_mtime = os.stat(config_path).st_mtime
+    known = manifest.roots.get(root)
+    if known is not None and known.get("mtime") == yml_mtime and isinstance(known.get("paths"), dict):
+        logging.info("  -> games.yml unchanged since last scan, reusing game paths.")
+        return dict(known["paths"]), yml_mtime
+
+    # This script requires the PyYAML library. It is only imported when games.yml
+    # actually has to be parsed. You can install it by running: pip install PyYAML
+    try:
+        import yaml
+    except ImportError:
+        print("Error: The PyYAML library is required. Please install it using 'pip install PyYAML'")
+        logging.error("The PyYAML library is required to read games.yml.")
+        return None, yml_mtime
+
     try:
-        # 2. Search for the game to get its ID
-        search_res = requests.get(f"{STEAMGRIDDB_API_URL}/search/autocomplete/{clean_name}", headers=headers)
-        search_res.raise_for_status()
-        search_data = search_res.json()
-
-        if search_data.get('success') and search_data.get('data'):
-            game_id = search_data['data'][0]['id']
-            
-            # 3. Get icons for that game ID
-            icon_res = requests.get(f"{STEAMGRIDDB_API_URL}/icons/game/{game_id}", headers=headers)
-            icon_res.raise_for_status()
-            icon_data = icon_res.json()
-
-            if icon_data.get('success') and icon_data.get('data'):
-                icon_url = icon_data['data'][0]['url']
-                
-                # 4. Download the icon
-                image_res = requests.get(icon_url, stream=True)
-                image_res.raise_for_status()
-
-                # 5. Save the icon locally
-                safe_filename = re.sub(r'[<>:"/\\|?*]', '_', clean_name)
-                icon_filename = f"{safe_filename}.png"
-                
-                os.makedirs(ICON_SAVE_DIR, exist_ok=True)
-                local_icon_path = os.path.join(ICON_SAVE_DIR, icon_filename)
-
-                with open(local_icon_path, 'wb') as f:
-                    for chunk in image_res.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                logging.info(f"  -> Icon saved to: {local_icon_path}")
-                # Return the path with forward slashes for Godot
-                return local_icon_path.replace('\\', '/')
-    
-    except requests.exceptions.RequestException as e:
-        logging.error(f"  -> API request or download failed for '{clean_name}': {e}")
-    except (IndexError, KeyError):
-        logging.warning(f"  -> No results found in API for '{clean_name}'.")
-
-    return None
-
-def find_games_from_yml(directory, filename, output_filename):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            yaml_data = yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        logging.error(f"An error occurred while parsing the YAML file: {e}")
+        return None, yml_mtime
+
+    if not isinstance(yaml_data, dict):
+        logging.error("Error: The YAML file does not contain a valid dictionary structure.")
+        return None, yml_mtime
+    return yaml_data, yml_mtime
+
+
+def find_games_from_yml(directory, filename, output_filename, delta=False, full=False, stream=None,
+                        defer_artwork=False):
     """
     Reads a RPCS3 games.yml file to find game paths, extracts game info,
     and saves it to a JSON file for Godot.
+    Games whose folder did not change since the last scan are taken from the scan manifest.
+    Returns the listing, or in delta mode only what changed.
+    With defer_artwork, missing icons are queued for artwork_backfill.py instead of downloaded.
     """
     config_path = os.path.join(directory, filename)
 
@@ -114,68 +81,166 @@ def find_games_from_yml(directory, filename, output_filename):
         return
 
     logging.info(f"Reading from: {config_path}\n")
-    
-    game_list = []
 
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            yaml_data = yaml.safe_load(f)
+    manifest = ScanManifest(manifest_path_for(output_filename), full=full)
+    root = directory
+    normalized_root = directory.replace('\\', '/')
+    signatures = {}
+    records = {}
+    scan_delta = {"added": [], "changed": [], "unchanged": [], "removed": []}
+    yml_mtime = None
 
-        if not isinstance(yaml_data, dict):
-            logging.error("Error: The YAML file does not contain a valid dictionary structure.")
+    try:
+        with scan_metrics.phase("config"):
+            yaml_data, yml_mtime = read_games_yml(config_path, manifest, root)
+        if yaml_data is None:
             return
 
         for game_id, game_path in yaml_data.items():
-            if not os.path.isdir(game_path):
+            if not isinstance(game_path, str) or not os.path.isdir(game_path):
                 logging.warning(f"  -> Path for {game_id} does not exist: {game_path}")
                 continue
+            signatures[game_id] = [game_path, os.stat(game_path).st_mtime]
+
+        scan_delta = manifest.diff(root, signatures)
+        unchanged = set(scan_delta["unchanged"])
+        for game_id in signatures:
+            game_object = manifest.record_for(root, game_id)
+            if game_object is None or game_id not in unchanged:
+                game_path = signatures[game_id][0]
+                base_name = os.path.basename(os.path.normpath(game_path))
+                clean_name = re.sub(r'\[.*?\]', '', base_name).strip()
+                normalized_path = game_path.replace('\\', '/')
+
+                # The game's own PARAM.SFO title and ICON0.PNG come first
+                with scan_metrics.phase("local_artwork"):
+                    title, icon_path = ps3_local_info(game_path, game_id)
+                if icon_path:
+                    scan_metrics.count("artwork.local")
+
+                game_object = {
+                    "name": title or title_for(game_id) or clean_name,
+                    "path": normalized_path,
+                    "id": game_id,
+                    "icon_path": icon_path # Without a local icon, filled in by the artwork batch below
+                }
+                logging.info(f"  -> Found '{game_object['name']}'")
+            records[game_id] = game_object
+            if stream is not None:
+                stream.game(normalized_root, game_object)
+
+        if stream is not None:
+            for game_id in scan_delta["removed"]:
+                stream.removed(normalized_root, {"id": game_id})
 
-            base_name = os.path.basename(os.path.normpath(game_path))
-            clean_name = re.sub(r'\[.*?\]', '', base_name).strip()
-            normalized_path = game_path.replace('\\', '/')
-
-            # --- MODIFIED: Get icon path ---
-            local_icon_path = get_game_artwork(clean_name)
-
-            game_object = {
-                "name": clean_name,
-                "path": normalized_path,
-                "id": game_id,
-                "icon_path": local_icon_path # Use the downloaded icon path
-            }
-            game_list.append(game_object)
-            logging.info(f"  -> Found '{clean_name}'")
-
-    except yaml.YAMLError as e:
-        logging.error(f"An error occurred while parsing the YAML file: {e}")
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
 
-    output_data = { directory.replace('\\', '/'): game_list }
-
-    if game_list:
-        output_dir = os.path.dirname(output_filename)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        logging.info(f"\nSaving {len(game_list)} found games to '{output_filename}'...")
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=4)
-        logging.info("Save complete.")
+    # PS3 icons are named after the cleaned search term, not the folder name.
+    # Games that already have an icon from a previous scan are not looked up again.
+    pending = [game for game in records.values() if game["icon_path"] is None]
+    on_result = None
+    if stream is not None:
+        ids_by_name = {}
+        for game in pending:
+            ids_by_name.setdefault(game["name"], []).append(game["id"])
+
+        def on_result(name, icon_path):
+            for game_id in ids_by_name.get(name, []):
+                stream.artwork(normalized_root, {"id": game_id}, icon_path)
+
+    # The serial keys the artwork cache, so renaming a game folder doesn't search again
+    identities = {game["name"]: identify_ps3_game(game["id"], game["path"]) for game in pending}
+    fetch_artwork = fetch_artwork_batch
+    if defer_artwork:
+        fetch_artwork = deferred_artwork_fetch("Playstation 3", output_filename, match_field="name")
+    with scan_metrics.phase("artwork"):
+        icon_paths = fetch_artwork([game["name"] for game in pending], icon_name_for=clean_search_name,
+                                   on_result=on_result, identities=identities, platform="Playstation 3")
+    unchanged = set(scan_delta["unchanged"])
+    for game in pending:
+        game["icon_path"] = icon_paths.get(game["name"])
+        if game["id"] in unchanged and game["icon_path"] is not None:
+            scan_delta["changed"].append(game["id"])
+
+    # Tile-sized copies of every icon that is new in this scan
+    changed = set(scan_delta["added"]) | set(scan_delta["changed"])
+    with scan_metrics.phase("tiles"):
+        add_tile_paths([game for game in records.values() if game["id"] in changed])
+
+    scan_metrics.count("files.listed", len(signatures))
+    for kind in ("added", "changed", "removed"):
+        scan_metrics.count(f"games.{kind}", len(scan_delta[kind]))
+
+    game_list = list(records.values())
+    output_data = { normalized_root: game_list }
+    delta_output = {"added": {}, "changed": {}, "removed": {}}
+    for kind in ("added", "changed"):
+        if scan_delta[kind]:
+            delta_output[kind][normalized_root] = [records[game_id] for game_id in scan_delta[kind]]
+    if scan_delta["removed"]:
+        delta_output["removed"][normalized_root] = scan_delta["removed"]
+
+    if yml_mtime is not None:
+        paths = {game_id: path for game_id, path in (yaml_data or {}).items() if isinstance(path, str)}
+        manifest.update(root, yml_mtime, signatures, records, paths=paths)
+
+    if stream is not None:
+        stream.done()
+    # Streamed or not, the output file gets the JSON document ('-' only streams)
+    if output_filename == '-':
+        pass
+    elif game_list or delta:
+        write_scan_output(output_filename, output_data, delta_output, delta)
     else:
         logging.info("\nNo valid game paths were found to save.")
+    manifest.save()
+    return delta_output if delta else output_data
 
 
 if __name__ == "__main__":
     setup_logging() # --- NEW ---
     logging.info("--- Starting PS3 Scan Script ---")
 
-    if len(sys.argv) > 2:
-        target_directory = sys.argv[1]
-        output_file = sys.argv[2]
-    else:
+    parser = argparse.ArgumentParser(description="Scans the RPCS3 games.yml for PS3 games.")
+    parser.add_argument("config_dir")
+    parser.add_argument("output_file")
+    parser.add_argument("--delta", action="store_true",
+                        help="Also write the added, changed and removed games to <output>.delta.json.")
+    parser.add_argument("--full", action="store_true", help="Ignore the scan manifest and rescan everything.")
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json",
+                        help="'ndjson' also streams one record per game and icon to <output>.ndjson.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the scan under cProfile and write the stats next to the output file.")
+    parser.add_argument("--library", metavar="MENU_DATA",
+                        help="Also merge the result into this menu_data.json (see library_merge.py).")
+    parser.add_argument("--defer-artwork", action="store_true",
+                        help="Don't download missing artwork now, queue it for artwork_backfill.py.")
+
+    if len(sys.argv) <= 2:
         logging.error("Error: Required arguments were not provided (config directory and output file path).")
         sys.exit(1)
+    args = parser.parse_args()
 
     config_file_name = "games.yml"
-    find_games_from_yml(target_directory, config_file_name, output_file)
+    stream = None
+
+    def scan():
+        data = find_games_from_yml(args.config_dir, config_file_name, args.output_file, args.delta, args.full, stream,
+                                   args.defer_artwork)
+        if args.library:
+            with scan_metrics.phase("library"):
+                merge_into_library(args.library, "Playstation 3", data)
+        return data
+
+    # The stream is opened under the lock too: a scan of the same output may be running elsewhere
+    with locked(args.output_file):
+        close_stream = None
+        if args.format == "ndjson":
+            stream, close_stream = open_ndjson_stream("Playstation 3", args.output_file)
+        try:
+            scan_metrics.run_scan("Playstation 3", args.output_file, scan, args.profile)
+        finally:
+            if close_stream:
+                close_stream()
     logging.info("--- PS3 Script Finished ---")
\ No newline at end of file
@@ -1,23 +1,19 @@
 import os
-import sys
-import json
 import logging
-import re
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-# [cite_start]The API key is loaded into the 'api_key' variable [cite: 63]
-api_key = os.getenv("STEAMGRIDDB_API_KEY")
-STEAMGRIDDB_API_URL = "https://www.steamgriddb.com/api/v2"
-
-if api_key:
-    print("API key loaded successfully!")
-else:
-    print("Error: Could not load API key. Make sure it's set in your .env file.")
+import argparse
+from functools import partial
+from artwork import fetch_artwork_batch
+from artwork_queue import deferred_artwork_fetch
+from scan_manifest import ScanManifest, manifest_path_for, incremental_file_scan, list_game_directories, write_scan_output
+from dedup import DEDUP_MODES, DEFAULT_DEDUP
+import scan_metrics
+from file_lock import locked
+from library_merge import merge_into_library
+from scan_stream import open_ndjson_stream
+from dir_walker import DEFAULT_EXCLUDES, depth_for
+from emulator_config import read_eden_gamedirs, is_filesystem_path
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-ICON_SAVE_DIR = os.path.join(SCRIPT_DIR, 'media', 'icon')
 
 def setup_logging():
     """Configures logging to write to a file."""
@@ -27,68 +23,13 @@ def setup_logging():
         filename=log_file_path,
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
-        filemode='w'
+        filemode='a' # Append mode, so logs from different scripts add to the same file
     )
 
-def get_game_artwork(game_filename):
-    """
-    Searches SteamGridDB for a game's icon, downloads it, and returns the local path.
-    """
-    # --- FIXED: Use the correct 'api_key' variable ---
-    if not api_key or api_key == "YOUR_API_KEY_HERE":
-        logging.warning("SteamGridDB API Key is not set. Skipping icon search.")
-        return None
-
-    clean_name = re.sub(r'\[.*?\]|\(.*?\)|\..*$', '', game_filename).strip()
-    if not clean_name:
-        return None
-
-    logging.info(f"  -> Searching artwork for '{clean_name}'...")
-    # --- FIXED: Use the correct 'api_key' variable ---
-    headers = {'Authorization': f'Bearer {api_key}'}
-    
-    try:
-        search_res = requests.get(f"{STEAMGRIDDB_API_URL}/search/autocomplete/{clean_name}", headers=headers)
-        search_res.raise_for_status()
-        search_data = search_res.json()
-
-        if search_data.get('success') and search_data.get('data'):
-            game_id = search_data['data'][0]['id']
-            
-            icon_res = requests.get(f"{STEAMGRIDDB_API_URL}/icons/game/{game_id}", headers=headers)
-            icon_res.raise_for_status()
-            icon_data = icon_res.json()
-
-            if icon_data.get('success') and icon_data.get('data'):
-                icon_url = icon_data['data'][0]['url']
-                
-                image_res = requests.get(icon_url, stream=True)
-                image_res.raise_for_status()
-
-                base_game_name = os.path.splitext(game_filename)[0]
-                safe_filename = re.sub(r'[<>:"/\\|?*]', '_', base_game_name)
-                icon_filename = f"{safe_filename}.png"
-                
-                os.makedirs(ICON_SAVE_DIR, exist_ok=True)
-                local_icon_path = os.path.join(ICON_SAVE_DIR, icon_filename)
-
-                with open(local_icon_path, 'wb') as f:
-                    for chunk in image_res.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                logging.info(f"  -> Icon saved to: {local_icon_path}")
-                # The local path is returned with forward slashes for Godot
-                return local_icon_path.replace('\\', '/')
-    
-    except requests.exceptions.RequestException as e:
-        logging.error(f"  -> API request or download failed for '{clean_name}': {e}")
-    except (IndexError, KeyError):
-        logging.warning(f"  -> No results found in API for '{clean_name}'.")
-
-    return None
-
 
-def find_game_paths_from_config(directory, filename):
+def find_game_paths_from_config(directory, filename, output_filename=None, delta=False, full=False, stream=None,
+                                recursive=None, max_depth=None, exclude=DEFAULT_EXCLUDES, dedup=DEFAULT_DEDUP,
+                                defer_artwork=False):
     config_path = os.path.join(directory, filename)
 
     if not os.path.isfile(config_path):
@@ -96,73 +37,104 @@ def find_game_paths_from_config(directory, filename):
         return
 
     logging.info(f"Reading from: {config_path}")
-    directory_contents = {}
+    manifest = ScanManifest(manifest_path_for(output_filename) if output_filename else None, full=full)
+    listings = {}
+    game_dirs = []
 
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        for i in range(1, 6):
-            key_to_find = f"Paths\\gamedirs\\{i}\\path="
-            for line in lines:
-                clean_line = line.strip()
-                if clean_line.startswith(key_to_find):
-                    value = clean_line.split('=', 1)[1]
-                    logging.info(f"Value for gamedir {i}: {value}")
-
-                    if len(value) >= 2 and value[0].isalpha() and value[1] == ':':
-                        if os.path.isdir(value):
-                            try:
-                                contents = os.listdir(value)
-                                filtered_contents = [item for item in contents if item.lower().endswith(('.nsp', '.xci'))]
-                                
-                                if filtered_contents:
-                                    game_list = []
-                                    for game_file in filtered_contents:
-                                        local_icon_path = get_game_artwork(game_file)
-                                        game_list.append({
-                                            "filename": game_file,
-                                            "icon_path": local_icon_path
-                                        })
-                                    
-                                    directory_contents[value.replace('\\', '/')] = game_list
-                                    logging.info(f"  -> Storing {len(game_list)} items from '{value}'")
-                                else:
-                                    logging.info(f"  -> No .nsp or .xci files found in '{value}'.")
-                            except Exception as list_e:
-                                logging.warning(f"  -> Could not list contents of '{value}': {list_e}")
-                        else:
-                            logging.warning(f"  -> Directory '{value}' does not exist or is not accessible.")
-                    break
+        with scan_metrics.phase("config"):
+            gamedirs = list(read_eden_gamedirs(config_path))
+        for gamedir in gamedirs:
+            value = gamedir["path"]
+            logging.info(f"Value for gamedir {gamedir['index']}: {value} (deep_scan={gamedir['deep_scan']})")
+
+            if not is_filesystem_path(value):
+                continue
+            if os.path.isdir(value):
+                deep_scan = gamedir["deep_scan"] if recursive is None else recursive
+                game_dirs.append((value, depth_for(deep_scan, max_depth)))
+            else:
+                logging.warning(f"  -> Directory '{value}' does not exist or is not accessible.")
+
+        listings = list_game_directories(manifest, game_dirs, ('.nsp', '.xci'), exclude, stream)
 
     except Exception as e:
         logging.error(f"An error occurred while reading the file: {e}")
 
-    if directory_contents:
-        if len(sys.argv) > 2:
-            output_filename = sys.argv[2]
-            output_dir = os.path.dirname(output_filename)
-            os.makedirs(output_dir, exist_ok=True)
-    
-            logging.info(f"Saving found directory contents to '{output_filename}'...")
-            with open(output_filename, 'w', encoding='utf-8') as f:
-                json.dump(directory_contents, f, indent=4)
-            logging.info("Save complete.")
-        else:
-            logging.error("Output file path was not provided to the script.")
+    # Only new, changed or still icon-less games go through the artwork batch
+    # (or, with defer_artwork, into the queue artwork_backfill.py drains)
+    fetch_artwork = partial(fetch_artwork_batch, platform="Switch")
+    if defer_artwork and output_filename:
+        fetch_artwork = deferred_artwork_fetch("Switch", output_filename)
+    directory_contents, delta_output = incremental_file_scan(manifest, listings, fetch_artwork, stream, dedup)
+
+    if not output_filename:
+        logging.error("Output file path was not provided to the script.")
+        return
+
+    if stream is not None:
+        stream.done()
+    # Streamed or not, the output file gets the JSON document ('-' only streams)
+    if output_filename != '-' and (directory_contents or delta):
+        write_scan_output(output_filename, directory_contents, delta_output, delta)
+    manifest.save()
+    return delta_output if delta else directory_contents
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scans the Eden/Yuzu game directories for Switch games.")
+    parser.add_argument("config_dir", nargs="?",
+                        default=os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming', 'eden', 'config'))
+    parser.add_argument("output_file", nargs="?")
+    parser.add_argument("--delta", action="store_true",
+                        help="Also write the added, changed and removed games to <output>.delta.json.")
+    parser.add_argument("--full", action="store_true", help="Ignore the scan manifest and rescan everything.")
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json",
+                        help="'ndjson' also streams one record per game and icon to <output>.ndjson.")
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=None,
+                        help="Scan sub-folders (default: follow the emulator's own setting).")
+    parser.add_argument("--max-depth", type=int, default=None, help="How many folder levels to descend when recursive.")
+    parser.add_argument("--exclude", action="append", default=list(DEFAULT_EXCLUDES), metavar="PATTERN",
+                        help="Skip files and folders matching this pattern (can be repeated).")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=DEFAULT_DEDUP,
+                        help="List copies of the same file once ('full' also compares whole files).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the scan under cProfile and write the stats next to the output file.")
+    parser.add_argument("--library", metavar="MENU_DATA",
+                        help="Also merge the result into this menu_data.json (see library_merge.py).")
+    parser.add_argument("--defer-artwork", action="store_true",
+                        help="Don't download missing artwork now, queue it for artwork_backfill.py.")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     setup_logging()
     logging.info("--- Starting Python Scan Script ---")
-    
-    if len(sys.argv) > 1:
-        target_directory = sys.argv[1]
-        logging.info(f"Using directory from command-line argument: {target_directory}")
-    else:
-        target_directory = os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming', 'eden', 'config')
-        logging.info(f"No directory argument provided. Using default: {target_directory}")
+
+    args = parse_args()
+    target_directory = args.config_dir
+    logging.info(f"Using config directory: {target_directory}")
 
     config_file_name = "qt-config.ini" 
-    find_game_paths_from_config(target_directory, config_file_name)
+    stream = None
+
+    def scan():
+        data = find_game_paths_from_config(target_directory, config_file_name, args.output_file, args.delta, args.full,
+                                           stream, args.recursive, args.max_depth, tuple(args.exclude), args.dedup,
+                                           args.defer_artwork)
+        if args.library:
+            with scan_metrics.phase("library"):
+                merge_into_library(args.library, "Switch", data)
+        return data
+
+    # The stream is opened under the lock too: a scan of the same output may be running elsewhere
+    with locked(args.output_file):
+        close_stream = None
+        if args.format == "ndjson" and args.output_file:
+            stream, close_stream = open_ndjson_stream("Switch", args.output_file)
+        try:
+            scan_metrics.run_scan("Switch", args.output_file, scan, args.profile)
+        finally:
+            if close_stream:
+                close_stream()
     logging.info("--- Python Script Finished ---")
\ No newline at end of file
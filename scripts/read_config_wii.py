@@ -2,25 +2,23 @@
 
 import os
 import sys
-import json
-import re
-import requests
-from dotenv import load_dotenv
 import logging
-
-# --- NEW: Load environment variables and set up API access ---
-load_dotenv()
-api_key = os.getenv("STEAMGRIDDB_API_KEY")
-STEAMGRIDDB_API_URL = "https://www.steamgriddb.com/api/v2"
-
-if api_key:
-    print("API key loaded successfully!")
-else:
-    print("Warning: Could not load SteamGridDB API key. Make sure it's set in your .env file.")
+import argparse
+from functools import partial
+from artwork import fetch_artwork_batch
+from artwork_queue import deferred_artwork_fetch
+from scan_manifest import ScanManifest, manifest_path_for, incremental_file_scan, list_game_directories, write_scan_output
+from dedup import DEDUP_MODES, DEFAULT_DEDUP
+import scan_metrics
+from file_lock import locked
+from library_merge import merge_into_library
+from scan_stream import open_ndjson_stream
+from dir_walker import DEFAULT_EXCLUDES, depth_for
+from emulator_config import read_dolphin_iso_paths
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-ICON_SAVE_DIR = os.path.join(SCRIPT_DIR, 'media', 'icon')
-# --- END NEW ---
+
+WII_EXTENSIONS = ('.iso', '.gcm', '.wbfs', '.rvz', '.wad', '.dol', '.elf')
 
 # --- NEW: Function to set up logging ---
 def setup_logging():
@@ -33,65 +31,14 @@ def setup_logging():
         filemode='a' # Append mode
     )
 
-# --- NEW: Copied function to get and save game artwork ---
-def get_game_artwork(game_filename):
-    """
-    Searches SteamGridDB for a game's icon, downloads it, and returns the local path.
-    """
-    if not api_key or api_key == "YOUR_API_KEY_HERE":
-        logging.warning("SteamGridDB API Key is not set. Skipping icon search.")
-        return None
-
-    clean_name = re.sub(r'\[.*?\]|\(.*?\)|\..*$', '', game_filename).strip()
-    if not clean_name:
-        return None
-
-    logging.info(f"  -> Searching artwork for '{clean_name}'...")
-    headers = {'Authorization': f'Bearer {api_key}'}
-    
-    try:
-        search_res = requests.get(f"{STEAMGRIDDB_API_URL}/search/autocomplete/{clean_name}", headers=headers)
-        search_res.raise_for_status()
-        search_data = search_res.json()
-
-        if search_data.get('success') and search_data.get('data'):
-            game_id = search_data['data'][0]['id']
-            
-            icon_res = requests.get(f"{STEAMGRIDDB_API_URL}/icons/game/{game_id}", headers=headers)
-            icon_res.raise_for_status()
-            icon_data = icon_res.json()
-
-            if icon_data.get('success') and icon_data.get('data'):
-                icon_url = icon_data['data'][0]['url']
-                
-                image_res = requests.get(icon_url, stream=True)
-                image_res.raise_for_status()
-
-                base_game_name = os.path.splitext(game_filename)[0]
-                safe_filename = re.sub(r'[<>:"/\\|?*]', '_', base_game_name)
-                icon_filename = f"{safe_filename}.png"
-                
-                os.makedirs(ICON_SAVE_DIR, exist_ok=True)
-                local_icon_path = os.path.join(ICON_SAVE_DIR, icon_filename)
-
-                with open(local_icon_path, 'wb') as f:
-                    for chunk in image_res.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                logging.info(f"  -> Icon saved to: {local_icon_path}")
-                return local_icon_path.replace('\\', '/')
-    
-    except requests.exceptions.RequestException as e:
-        logging.error(f"  -> API request or download failed for '{clean_name}': {e}")
-    except (IndexError, KeyError):
-        logging.warning(f"  -> No results found in API for '{clean_name}'.")
-
-    return None
-
-def find_game_paths_from_config(directory, filename, output_filename):
+def find_game_paths_from_config(directory, filename, output_filename, delta=False, full=False, stream=None,
+                                recursive=None, max_depth=None, exclude=DEFAULT_EXCLUDES, dedup=DEFAULT_DEDUP,
+                                defer_artwork=False):
     """
     Reads a Dolphin Emulator configuration file to find ISO paths.
     It lists the contents and saves game files to a JSON file.
+    Directories and files that did not change since the last scan are taken from the scan manifest.
+    Returns the listing, or in delta mode only what changed.
     """
     config_path = os.path.join(directory, filename)
 
@@ -100,71 +47,99 @@ def find_game_paths_from_config(directory, filename, output_filename):
         return
 
     logging.info(f"Reading from: {config_path}\n")
-    directory_contents = {}
+    manifest = ScanManifest(manifest_path_for(output_filename), full=full)
+    listings = {}
+    game_dirs = []
 
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        for i in range(0, 10):
-            key_to_find = f"ISOPath{i}"
-            for line in lines:
-                clean_line = line.strip()
-                if clean_line.startswith(key_to_find + ' ' + '='):
-                    value = clean_line.split('=', 1)[1].strip()
-                    logging.info(f"Value for ISOPath{i}: {value}")
-
-                    if os.path.isdir(value):
-                        try:
-                            contents = os.listdir(value)
-                            filtered_contents = [item for item in contents if item.lower().endswith(('.iso', '.gcm', '.wbfs', '.rvz', '.wad', '.dol', '.elf'))]
-                            
-                            if filtered_contents:
-                                normalized_path = value.replace('\\', '/')
-                                # --- MODIFIED: Loop through games to find icons ---
-                                game_list = []
-                                for game_file in filtered_contents:
-                                    local_icon_path = get_game_artwork(game_file)
-                                    game_list.append({
-                                        "filename": game_file, 
-                                        "icon_path": local_icon_path
-                                    })
-                                directory_contents[normalized_path] = game_list
-                                logging.info(f"  -> Storing {len(game_list)} matching items from '{value}'")
-                            else:
-                                logging.info(f"  -> No compatible game files found in '{value}'.")
-                        except Exception as list_e:
-                            logging.warning(f"  -> Could not list contents of '{value}': {list_e}")
-                    else:
-                        logging.warning(f"  -> Directory '{value}' does not exist or is not accessible.")
-                    break
+        with scan_metrics.phase("config"):
+            iso_paths = list(read_dolphin_iso_paths(config_path))
+        for iso_path in iso_paths:
+            value = iso_path["path"]
+            logging.info(f"Value for ISOPath{iso_path['index']}: {value} (recursive={iso_path['recursive']})")
+
+            if os.path.isdir(value):
+                walk_recursive = iso_path["recursive"] if recursive is None else recursive
+                game_dirs.append((value, depth_for(walk_recursive, max_depth)))
+            else:
+                logging.warning(f"  -> Directory '{value}' does not exist or is not accessible.")
+
+        listings = list_game_directories(manifest, game_dirs, WII_EXTENSIONS, exclude, stream)
 
     except Exception as e:
         logging.error(f"An error occurred while reading the file: {e}")
 
-    if directory_contents:
-        output_dir = os.path.dirname(output_filename)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        logging.info(f"\nSaving found directory contents to '{output_filename}'...")
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump(directory_contents, f, indent=4)
-        logging.info("Save complete.")
+    # Only new, changed or still icon-less games go through the artwork batch
+    # (or, with defer_artwork, into the queue artwork_backfill.py drains)
+    fetch_artwork = partial(fetch_artwork_batch, platform="Wii")
+    if defer_artwork and output_filename:
+        fetch_artwork = deferred_artwork_fetch("Wii", output_filename)
+    directory_contents, delta_output = incremental_file_scan(manifest, listings, fetch_artwork, stream, dedup)
+
+    if stream is not None:
+        stream.done()
+    # Streamed or not, the output file gets the JSON document ('-' only streams)
+    if output_filename == '-':
+        pass
+    elif directory_contents or delta:
+        write_scan_output(output_filename, directory_contents, delta_output, delta)
     else:
         logging.info("\nNo directory contents were found to save.")
+    manifest.save()
+    return delta_output if delta else directory_contents
 
 
 if __name__ == "__main__":
     setup_logging() # --- NEW ---
     logging.info("--- Starting Wii Scan Script ---")
 
-    if len(sys.argv) > 2:
-        target_directory = sys.argv[1]
-        output_file = sys.argv[2]
-    else:
+    parser = argparse.ArgumentParser(description="Scans the Dolphin ISO paths for Wii and GameCube games.")
+    parser.add_argument("config_dir")
+    parser.add_argument("output_file")
+    parser.add_argument("--delta", action="store_true",
+                        help="Also write the added, changed and removed games to <output>.delta.json.")
+    parser.add_argument("--full", action="store_true", help="Ignore the scan manifest and rescan everything.")
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json",
+                        help="'ndjson' also streams one record per game and icon to <output>.ndjson.")
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=None,
+                        help="Scan sub-folders (default: follow the emulator's own setting).")
+    parser.add_argument("--max-depth", type=int, default=None, help="How many folder levels to descend when recursive.")
+    parser.add_argument("--exclude", action="append", default=list(DEFAULT_EXCLUDES), metavar="PATTERN",
+                        help="Skip files and folders matching this pattern (can be repeated).")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=DEFAULT_DEDUP,
+                        help="List copies of the same file once ('full' also compares whole files).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the scan under cProfile and write the stats next to the output file.")
+    parser.add_argument("--library", metavar="MENU_DATA",
+                        help="Also merge the result into this menu_data.json (see library_merge.py).")
+    parser.add_argument("--defer-artwork", action="store_true",
+                        help="Don't download missing artwork now, queue it for artwork_backfill.py.")
+
+    if len(sys.argv) <= 2:
         logging.error("Error: Required command-line arguments not provided (config directory and output file path).")
         sys.exit(1)
+    args = parser.parse_args()
 
     config_file_name = "Dolphin.ini"
-    find_game_paths_from_config(target_directory, config_file_name, output_file)
+    stream = None
+
+    def scan():
+        data = find_game_paths_from_config(args.config_dir, config_file_name, args.output_file, args.delta, args.full,
+                                           stream, args.recursive, args.max_depth, tuple(args.exclude), args.dedup,
+                                           args.defer_artwork)
+        if args.library:
+            with scan_metrics.phase("library"):
+                merge_into_library(args.library, "Wii", data)
+        return data
+
+    # The stream is opened under the lock too: a scan of the same output may be running elsewhere
+    with locked(args.output_file):
+        close_stream = None
+        if args.format == "ndjson":
+            stream, close_stream = open_ndjson_stream("Wii", args.output_file)
+        try:
+            scan_metrics.run_scan("Wii", args.output_file, scan, args.profile)
+        finally:
+            if close_stream:
+                close_stream()
     logging.info("--- Wii Script Finished ---")
\ No newline at end of file
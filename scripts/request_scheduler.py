@@ -0,0 +1,189 @@
+# In res://scripts/request_scheduler.py
+#
+# Every SteamGridDB request goes through a RequestScheduler. It
+#   - spaces requests with a token bucket shared by the whole process,
+#   - retries 429 and transient 5xx answers and connection errors with jittered
+#     exponential backoff, honouring Retry-After (a 429 pauses every worker),
+#   - gives up on a scan once its request budget is spent,
+#   - puts a (connect, read) timeout on every request.
+#
+# Settings come from the environment: XMB_ARTWORK_RATE (requests per second,
+# default 10), XMB_ARTWORK_BURST (20), XMB_ARTWORK_RETRIES (4), XMB_ARTWORK_BUDGET
+# (requests per scan, default 10000, 0 = no limit) and XMB_HTTP_TIMEOUT (seconds).
+# A game needs about three requests (search, icon list, download), so the
+# defaults look up roughly 3 games a second and 3,300 new games per scan. Games
+# past the budget are logged as skipped and looked up by the next scan; the
+# artwork cache keeps the ones already found from costing requests again. Like
+# requests itself, this module is only imported once artwork is actually looked up.
+
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+
+import scan_metrics
+
+RATE_PER_SECOND = float(os.getenv("XMB_ARTWORK_RATE", "10"))
+BURST = int(os.getenv("XMB_ARTWORK_BURST", "20"))
+MAX_RETRIES = int(os.getenv("XMB_ARTWORK_RETRIES", "4"))
+SCAN_BUDGET = int(os.getenv("XMB_ARTWORK_BUDGET", "10000"))
+TIMEOUT = (5.0, float(os.getenv("XMB_HTTP_TIMEOUT", "30")))
+
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Longest Retry-After that is waited out; anything longer ends the scan's lookups
+MAX_RETRY_AFTER = 120.0
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class BudgetExceeded(requests.exceptions.RequestException):
+    """Raised instead of sending a request once a scan's request budget is spent."""
+
+
+class TokenBucket:
+    """Allows rate requests per second on average with bursts of up to burst requests."""
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Stops handing out tokens for the given time (e.g. after a 429)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def remaining_pause(self):
+        with self._lock:
+            return max(0.0, self.paused_until - time.monotonic())
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.burst, self.tokens + (now - max(self.updated, self.paused_until)) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_bucket():
+    """The token bucket shared by every scheduler in this process."""
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket()
+    return _bucket
+
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header (seconds or an HTTP date), or returns None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff: a random delay up to base * 2^attempt, capped."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RequestScheduler:
+    """
+    Wraps a requests session for one scan. get() has the same signature as
+    session.get() and returns the final response, or raises a RequestException
+    once retries or the scan's budget are used up.
+    """
+
+    def __init__(self, session, bucket=None, budget=SCAN_BUDGET, max_retries=MAX_RETRIES, timeout=TIMEOUT):
+        self.session = session
+        self.bucket = bucket if bucket is not None else get_bucket()
+        self.budget = budget
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.sent = 0
+        self.retried = 0
+        # Requests not sent because the budget was used up
+        self.refused = 0
+        self._lock = threading.Lock()
+        self._budget_logged = False
+
+    def _spend(self):
+        with self._lock:
+            if self.budget and self.sent >= self.budget:
+                self.refused += 1
+                if not self._budget_logged:
+                    self._budget_logged = True
+                    logging.warning(f"  -> Request budget of {self.budget} for this scan (XMB_ARTWORK_BUDGET) "
+                                    f"is used up, remaining artwork is left for the next scan.")
+                raise BudgetExceeded(f"Request budget of {self.budget} used up")
+            self.sent += 1
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            self._spend()
+            if self.bucket.remaining_pause() > MAX_RETRY_AFTER:
+                raise requests.exceptions.HTTPError(f"SteamGridDB asked to wait, not sending {url}")
+            self.bucket.acquire()
+            scan_metrics.count("artwork.api_calls")
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logging.info(f"  -> {type(e).__name__} for {url}, retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                response.close()
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                    # Throttled for longer than a scan should wait; stop asking for now
+                    self.bucket.pause(retry_after)
+                    raise requests.exceptions.HTTPError(
+                        f"{response.status_code} with Retry-After {retry_after:.0f}s for {url}", response=response
+                    )
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                if response.status_code == 429:
+                    # Everyone slows down, not just this worker
+                    scan_metrics.count("artwork.throttled")
+                    self.bucket.pause(delay)
+                logging.info(f"  -> HTTP {response.status_code} for {url}, retrying in {delay:.1f}s")
+
+            attempt += 1
+            scan_metrics.count("artwork.retries")
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
@@ -0,0 +1,530 @@
+# In res://scripts/scan_manifest.py
+
+import os
+import json
+import logging
+import threading
+
+from dir_walker import DEFAULT_EXCLUDES, FILE, DIR, ERROR, DONE, walk_roots, scan_dir
+from game_id import identify_games
+from artwork import default_icon_name
+from local_artwork import harvest_local_files
+from dedup import DEFAULT_DEDUP, find_duplicates
+from icon_pipeline import add_tile_paths
+from file_lock import temp_path_for
+import scan_metrics
+
+MANIFEST_VERSION = 2
+
+# Folders someone (scan_watch.py) saw change that must be listed again even if their mtime didn't
+_invalidated = set()
+_invalidated_lock = threading.Lock()
+
+
+def _norm(path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def invalidate(directory):
+    """Makes the next scan list directory again, e.g. after a file in it was rewritten in place."""
+    with _invalidated_lock:
+        _invalidated.add(_norm(directory))
+
+
+def clear_invalidated():
+    with _invalidated_lock:
+        _invalidated.clear()
+
+
+def _take_invalidated(root):
+    """Removes and returns the invalidated folders inside root."""
+    prefix = _norm(root)
+    with _invalidated_lock:
+        taken = {path for path in _invalidated if path == prefix or path.startswith(prefix.rstrip(os.sep) + os.sep)}
+        _invalidated.difference_update(taken)
+    return taken
+
+
+def manifest_path_for(output_filename):
+    """The manifest lives next to the scanner's output JSON. Output to stdout ('-') has none."""
+    if output_filename == '-':
+        return None
+    return os.path.splitext(output_filename)[0] + '.manifest.json'
+
+
+class ScanManifest:
+    """
+    Remembers what the last scan saw, so a rescan only has to process what changed.
+
+    For every root (a game directory, or the games.yml for PS3) it stores the
+    mtime of the root (for game directories: of every folder that was walked)
+    and, per entry, a small signature (size and mtime for files) plus the record
+    that was written to the output JSON for it.
+    """
+
+    def __init__(self, path, full=False):
+        self.path = path
+        self.roots = {}
+        if not full:
+            self._load()
+
+    def _load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.roots = data.get("roots", {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read scan manifest '{self.path}', doing a full scan: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = temp_path_for(self.path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "roots": self.roots}, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _same_walk(tree, max_depth, exclude):
+        """True if tree was walked with the same depth and excludes."""
+        return isinstance(tree, dict) and tree.get("max_depth") == max_depth and tree.get("exclude") == list(exclude)
+
+    def _tree_unchanged(self, root, tree, max_depth, exclude):
+        """True if every folder seen by the last walk of root still has the same mtime."""
+        if not self._same_walk(tree, max_depth, exclude):
+            return False
+        try:
+            for rel_dir, mtime in tree["dirs"].items():
+                if os.stat(os.path.join(root, rel_dir) if rel_dir else root).st_mtime != mtime:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    def _rewalk(self, root, known, extensions, max_depth, exclude, invalidated, on_file=None):
+        """
+        Lists root again, but only reads the folders whose mtime changed since the last walk
+        (or that were invalidated); the others keep the files and sub-folders stored for them.
+        Returns (signatures, tree) like a full walk.
+        """
+        old_dirs = known["mtime"]["dirs"]
+        files_in, subdirs_in = {}, {}
+        for name, entry in known["entries"].items():
+            files_in.setdefault(name.rpartition('/')[0], []).append((name, entry["sig"]))
+        for rel_dir in old_dirs:
+            if rel_dir:
+                subdirs_in.setdefault(rel_dir.rpartition('/')[0], []).append(rel_dir)
+
+        signatures = {}
+        tree = {"max_depth": max_depth, "exclude": list(exclude), "dirs": {}}
+        pending = [("", 0)]
+        relisted = 0
+        while pending:
+            rel_dir, depth = pending.pop()
+            abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+            try:
+                mtime = os.stat(abs_dir).st_mtime
+                if old_dirs.get(rel_dir) == mtime and _norm(abs_dir) not in invalidated:
+                    found = files_in.get(rel_dir, [])
+                    subdirs = subdirs_in.get(rel_dir, [])
+                else:
+                    relisted += 1
+                    files, names = scan_dir(abs_dir, extensions, exclude)
+                    prefix = f"{rel_dir}/" if rel_dir else ""
+                    found = [(prefix + name, [size, file_mtime]) for name, size, file_mtime in files]
+                    subdirs = [prefix + name for name in names] if max_depth is None or depth < max_depth else []
+            except OSError as e:
+                if not rel_dir:
+                    raise
+                logging.warning(f"  -> Could not list '{abs_dir}': {e}")
+                continue
+
+            tree["dirs"][rel_dir] = mtime
+            for name, sig in found:
+                signatures[name] = sig
+                if on_file is not None:
+                    on_file(root, name)
+            pending.extend((subdir, depth + 1) for subdir in subdirs)
+
+        scan_metrics.count("dirs.relisted", relisted)
+        logging.info(f"  -> '{root}': re-listed {relisted} of {len(tree['dirs'])} folders, kept the rest.")
+        return signatures, tree
+
+    def list_directories(self, roots, extensions, exclude=DEFAULT_EXCLUDES, on_file=None):
+        """
+        Lists the files matching extensions under every (root, max_depth) in roots.
+        Returns ({root: (signatures, tree)}, {root: error}) where signatures maps each
+        file's path relative to root to [size, mtime].
+
+        A root whose folders all kept their mtime reuses the stored listing and is not
+        walked at all, which is what makes rescans of slow drives cheap. In a root walked
+        before with the same settings only the changed folders are read again. The others
+        are walked in parallel; on_file(root, name) is called as each file turns up.
+        """
+        listings = {}
+        errors = {}
+        to_walk = []
+
+        for root, max_depth in roots:
+            known = self.roots.get(root)
+            invalidated = _take_invalidated(root)
+            if known is not None and not invalidated and self._tree_unchanged(root, known.get("mtime"), max_depth,
+                                                                             exclude):
+                logging.info(f"  -> '{root}' unchanged since last scan, reusing listing.")
+                signatures = {name: entry["sig"] for name, entry in known["entries"].items()}
+                listings[root] = (signatures, known["mtime"])
+                if on_file is not None:
+                    for name in signatures:
+                        on_file(root, name)
+            elif known is not None and self._same_walk(known.get("mtime"), max_depth, exclude):
+                try:
+                    listings[root] = self._rewalk(root, known, extensions, max_depth, exclude, invalidated, on_file)
+                except OSError as e:
+                    errors[root] = e
+            else:
+                to_walk.append((root, max_depth))
+
+        walked = {
+            root: ({}, {"max_depth": max_depth, "exclude": list(exclude), "dirs": {}})
+            for root, max_depth in to_walk
+        }
+        for root, item in walk_roots(to_walk, extensions, exclude):
+            signatures, tree = walked[root]
+            if item[0] == FILE:
+                _, name, size, mtime = item
+                signatures[name] = [size, mtime]
+                if on_file is not None:
+                    on_file(root, name)
+            elif item[0] == DIR:
+                tree["dirs"][item[1]] = item[2]
+            elif item[0] == ERROR:
+                errors[root] = item[1]
+            elif item[0] == DONE and root not in errors:
+                listings[root] = walked[root]
+
+        return listings, errors
+
+    def diff(self, root, signatures):
+        """Splits the current entries of root into added, changed, unchanged and removed."""
+        known = self.roots.get(root, {}).get("entries", {})
+        delta = {"added": [], "changed": [], "unchanged": [], "removed": []}
+        for name, sig in signatures.items():
+            if name not in known:
+                delta["added"].append(name)
+            elif known[name]["sig"] != list(sig):
+                delta["changed"].append(name)
+            else:
+                delta["unchanged"].append(name)
+        delta["removed"] = [name for name in known if name not in signatures]
+        return delta
+
+    def record_for(self, root, name):
+        return self.roots.get(root, {}).get("entries", {}).get(name, {}).get("record")
+
+    def update(self, root, mtime, signatures, records, copies=None, paths=None):
+        """
+        Stores what a scan saw of root. copies maps names to the [root, name] of the copy kept for them;
+        paths (PS3) maps every game games.yml lists to its folder, including folders that are missing.
+        """
+        copies = copies or {}
+        entries = {}
+        for name, sig in signatures.items():
+            entries[name] = {"sig": list(sig), "record": records[name]}
+            if name in copies:
+                entries[name]["copy_of"] = copies[name]
+        self.roots[root] = {"mtime": mtime, "entries": entries}
+        if paths is not None:
+            self.roots[root]["paths"] = paths
+
+    def copies(self):
+        """{(root, name): (root, name) of the kept copy} for every copy the last scan merged away."""
+        return {
+            (root, name): tuple(entry["copy_of"])
+            for root, known in self.roots.items()
+            for name, entry in known.get("entries", {}).items()
+            if entry.get("copy_of")
+        }
+
+    def forget_except(self, roots):
+        """Drops roots that are no longer configured and returns their stored entries."""
+        dropped = {}
+        for root in list(self.roots):
+            if root not in roots:
+                dropped[root] = list(self.roots.pop(root)["entries"])
+        return dropped
+
+
+def streaming_on_file(stream, manifest):
+    """Returns an on_file callback emitting each listed file with its last known icon."""
+    def on_file(root, name):
+        record = manifest.record_for(root, name) or {"filename": name, "icon_path": None}
+        stream.game(root.replace('\\', '/'), record)
+    return on_file
+
+
+def list_game_directories(manifest, game_dirs, extensions, exclude=DEFAULT_EXCLUDES, stream=None):
+    """
+    Lists every (root, max_depth) in game_dirs in parallel and logs what was found.
+    Returns {root: (signatures, tree)}; roots that could not be listed are left out.
+    """
+    on_file = streaming_on_file(stream, manifest) if stream is not None else None
+    with scan_metrics.phase("listing"):
+        listings, errors = manifest.list_directories(game_dirs, extensions, exclude, on_file)
+    # Back in configuration order, which decides the copy kept when files are duplicated
+    listings = {root: listings[root] for root, _ in game_dirs if root in listings}
+
+    for root, _ in game_dirs:
+        if root in errors:
+            logging.warning(f"  -> Could not list contents of '{root}': {errors[root]}")
+        elif listings[root][0]:
+            logging.info(f"  -> Found {len(listings[root][0])} items in '{root}'")
+        else:
+            logging.info(f"  -> No matching game files found in '{root}'.")
+    return listings
+
+
+def find_copies(listings, dedup=DEFAULT_DEDUP):
+    """
+    Finds files that are copies of each other across all listings.
+    Returns {(root, name): (root, name) of the copy that is kept}; the kept copy is
+    the first one in listing order and maps to nothing.
+    """
+    if dedup == "off":
+        return {}
+    files = [
+        ((root, name), os.path.join(root, name), sig[0], sig[1])
+        for root, (signatures, _) in listings.items()
+        for name, sig in signatures.items()
+    ]
+    duplicates = {}
+    for group in find_duplicates(files, full=(dedup == "full")):
+        for key in group[1:]:
+            duplicates[key] = group[0]
+    return duplicates
+
+
+def incremental_file_scan(manifest, listings, fetch_artwork, stream=None, dedup=DEFAULT_DEDUP):
+    """
+    Builds the Switch/Wii style output from {root: (signatures, tree)} listings
+    and updates the manifest. Only added or changed files, and files still missing
+    an icon, are identified from their headers; those without local artwork are
+    sent to fetch_artwork.
+    Returns (directory_contents, delta) where delta holds the added/changed
+    records and removed filenames per normalized root.
+    With a stream, removed files and every resolved icon are emitted as they happen.
+
+    Unless dedup is "off", copies of the same file are listed once, under the
+    first root that has them, with the other locations in "alternate_paths".
+    The delta follows the copies: when the kept copy goes away the next one is
+    reported as added, and a kept copy whose other copies changed as changed.
+    """
+    diffs = {root: manifest.diff(root, signatures) for root, (signatures, _) in listings.items()}
+
+    if stream is not None:
+        for root, delta in diffs.items():
+            for name in delta["removed"]:
+                stream.removed(root.replace('\\', '/'), {"filename": name})
+
+    # Which copy every duplicate pointed to last time, to notice when the kept copy goes away
+    previous_copies = manifest.copies()
+
+    # Games are keyed by (root, name): the same relative name can turn up in several roots
+    pending = []
+    for root, delta in diffs.items():
+        pending.extend((root, name) for name in delta["added"] + delta["changed"])
+        for name in delta["unchanged"]:
+            record = manifest.record_for(root, name)
+            if not record or record.get("icon_path") is None:
+                pending.append((root, name))
+
+    def on_result(key, icon_path):
+        if stream is not None:
+            stream.artwork(key[0].replace('\\', '/'), {"filename": key[1]}, icon_path)
+
+    # Copies of the same file in several places share one entry and one icon
+    with scan_metrics.phase("dedup"):
+        duplicates = find_copies(listings, dedup)
+    scan_metrics.count("files.duplicates", len(duplicates))
+
+    # Identify every game that needs artwork from its header (the manifest keeps the
+    # result in the record, so unchanged games with an icon are never read again)
+    pending_paths = {key: os.path.join(*key) for key in pending}
+    with scan_metrics.phase("identify"):
+        identities = identify_games(pending_paths)
+        if identities:
+            # Switch headers carry no title; the offline title database may know it
+            from title_db import fill_titles
+            fill_titles(identities)
+
+    # Artwork that ships with the game itself wins over a search by name
+    icon_paths = {}
+    local_paths = {key: path for key, path in pending_paths.items() if key not in duplicates}
+    with scan_metrics.phase("local_artwork"):
+        harvested = harvest_local_files(local_paths, identities, lambda key: default_icon_name(key[1]))
+    for key, (title, icon_path) in harvested.items():
+        if title:
+            identities[key]["title"] = title
+        if icon_path:
+            icon_paths[key] = icon_path
+            on_result(key, icon_path)
+    scan_metrics.count("artwork.local", len(icon_paths))
+
+    # The artwork fetchers work on file names (icons are saved per name), so games
+    # sharing a name in different roots are looked up once
+    remote = {}
+    for key in pending:
+        if key not in duplicates and key not in icon_paths:
+            remote.setdefault(key[1], []).append(key)
+    remote_identities = {name: identities.get(keys[0]) for name, keys in remote.items() if identities.get(keys[0])}
+
+    def on_fetched(name, icon_path):
+        for key in remote.get(name, []):
+            on_result(key, icon_path)
+
+    with scan_metrics.phase("artwork"):
+        fetched = fetch_artwork(list(remote), on_result=on_fetched, identities=remote_identities) if remote else {}
+    for name, keys in remote.items():
+        for key in keys:
+            icon_paths[key] = fetched.get(name)
+
+    for key in pending:
+        if key in duplicates:
+            primary_key = duplicates[key]
+            if primary_key in icon_paths:
+                icon_paths[key] = icon_paths[primary_key]
+            else:
+                icon_paths[key] = (manifest.record_for(*primary_key) or {}).get("icon_path")
+            if icon_paths[key] is not None:
+                on_result(key, icon_paths[key])
+
+    all_records = {}
+    new_records = []
+    for root, delta in diffs.items():
+        signatures, tree = listings[root]
+        unchanged = set(delta["unchanged"])
+        records = {}
+        for name in signatures:
+            record = manifest.record_for(root, name)
+            if (root, name) in icon_paths:
+                new_record = {"filename": name, "icon_path": icon_paths[(root, name)]}
+                identity = identities.get((root, name))
+                if identity:
+                    new_record["id"] = identity["id"]
+                    if identity["title"]:
+                        new_record["title"] = identity["title"]
+                if name in unchanged and record != new_record:
+                    # A retried icon finally resolved
+                    delta["changed"].append(name)
+                record = new_record
+                new_records.append(record)
+            records[name] = record
+
+        copies = {name: list(duplicates[(root, name)]) for name in signatures if (root, name) in duplicates}
+        manifest.update(root, tree, signatures, records, copies)
+        all_records[root] = records
+        scan_metrics.count("files.listed", len(signatures))
+        for kind in ("added", "changed", "removed"):
+            scan_metrics.count(f"games.{kind}", len(delta[kind]))
+
+        logging.info(
+            f"  -> '{root}': {len(delta['added'])} added, {len(delta['changed'])} changed, "
+            f"{len(delta['removed'])} removed"
+        )
+
+    # Tile-sized copies of new icons; the records are shared with the manifest
+    with scan_metrics.phase("tiles"):
+        add_tile_paths(new_records)
+
+    # The kept copy lists where the others are
+    alternates = {}
+    for (root, name), primary_key in duplicates.items():
+        alternates.setdefault(primary_key, []).append(os.path.join(root, name).replace('\\', '/'))
+        if stream is not None:
+            stream.duplicate(root.replace('\\', '/'), {"filename": name},
+                             {"root": primary_key[0].replace('\\', '/'), "filename": primary_key[1]})
+    if duplicates:
+        logging.info(f"  -> {len(duplicates)} duplicate copies merged into {len(alternates)} entries")
+    previous_alternates = {}
+    for (root, name), primary_key in previous_copies.items():
+        previous_alternates.setdefault(primary_key, []).append(os.path.join(root, name).replace('\\', '/'))
+
+    def output_record(root, name):
+        record = all_records[root][name]
+        if (root, name) in alternates:
+            record = dict(record, alternate_paths=alternates[(root, name)])
+        return record
+
+    directory_contents = {}
+    delta_output = {"added": {}, "changed": {}, "removed": {}}
+    # (root, name) -> "added" or "changed"; a game that is new counts as added even if its copies changed too
+    reported = {}
+
+    def report(kind, key):
+        if reported.get(key) != "added":
+            reported[key] = kind
+
+    for root, delta in diffs.items():
+        kept = [name for name in all_records[root] if (root, name) not in duplicates]
+        if kept:
+            directory_contents[root.replace('\\', '/')] = [output_record(root, name) for name in kept]
+        removed = list(delta["removed"])
+        added, changed = set(delta["added"]), set(delta["changed"])
+        for name in all_records[root]:
+            key = (root, name)
+            if key in duplicates:
+                if name in added or name in changed:
+                    # A new or changed copy counts as a change to the kept one
+                    report("changed", duplicates[key])
+                elif key not in previous_copies:
+                    # It was listed on its own until a copy turned up before it
+                    removed.append(name)
+            elif name in added or key in previous_copies:
+                # New, or the copy it used to be merged into went away
+                report("added", key)
+            elif name in changed or sorted(alternates.get(key, [])) != sorted(previous_alternates.get(key, [])):
+                report("changed", key)
+        if removed:
+            delta_output["removed"][root.replace('\\', '/')] = removed
+
+    for (root, name), kind in reported.items():
+        delta_output[kind].setdefault(root.replace('\\', '/'), []).append(output_record(root, name))
+
+    for root, names in manifest.forget_except(listings).items():
+        delta_output["removed"][root.replace('\\', '/')] = names
+        if stream is not None:
+            for name in names:
+                stream.removed(root.replace('\\', '/'), {"filename": name})
+
+    return directory_contents, delta_output
+
+
+def delta_path_for(output_filename):
+    """Where a delta scan writes what changed, next to the output JSON."""
+    return os.path.splitext(output_filename)[0] + '.delta.json'
+
+
+def write_scan_output(output_filename, directory_contents, delta_output, delta):
+    """
+    Writes the full directory listing and, in delta mode, also what changed to
+    delta_path_for(output_filename). The output file always keeps every game:
+    artwork_backfill.py writes downloaded icons back into its records. The caller
+    holds the output file's lock (see file_lock.py) for the whole scan.
+    """
+    output_dir = os.path.dirname(output_filename)
+    os.makedirs(output_dir, exist_ok=True)
+
+    writes = [(output_filename, directory_contents)]
+    if delta:
+        writes.append((delta_path_for(output_filename), delta_output))
+    for path, data in writes:
+        logging.info(f"Saving {'scan delta' if data is delta_output else 'found directory contents'} to '{path}'...")
+        # Compact: large libraries repeat long paths in every record, the indentation only added to that
+        tmp_path = temp_path_for(path)
+        with scan_metrics.phase("write"), open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    logging.info("Save complete.")
\ No newline at end of file
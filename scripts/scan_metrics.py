@@ -0,0 +1,150 @@
+# In res://scripts/scan_metrics.py
+#
+# Timing and counters for one scan. Code anywhere in the scan records into the
+# current scan's metrics with
+#
+#   with scan_metrics.phase("listing"): ...     # durations add up per phase
+#   scan_metrics.count("artwork.api_calls")     # counters, safe from any thread
+#
+# The current scan is kept in a context variable, so scans running at the same
+# time in different threads (the daemon) each get their own metrics. A thread a
+# scan starts begins with no scan of its own; give it the scan's metrics by
+# wrapping its target in scan_metrics.bind().
+#
+# and run_scan() writes the summary next to the output JSON as
+# '<output>.metrics.json' (and as one line in python_scanner.log):
+#
+#   {"platform": "Wii", "started": ..., "wall_s": 3.2,
+#    "phases": {"config": 0.001, "listing": 0.41, "artwork": 2.6, ...},
+#    "counters": {"files.listed": 812, "cache.hits": 790, "artwork.api_calls": 66, ...}}
+#
+# With profiling on (--profile, or XMB_SCAN_PROFILE=1) the whole scan also runs
+# under cProfile and the stats are dumped to '<output>.prof' for later
+# inspection with pstats or snakeviz.
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_FROM_ENV = os.getenv("XMB_SCAN_PROFILE", "") not in ("", "0")
+
+
+class ScanMetrics:
+    """Phase durations and named counters of one scan."""
+
+    def __init__(self, platform=None):
+        self.platform = platform
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        with self._lock:
+            return {
+                "platform": self.platform,
+                "started": round(self.started, 3),
+                "wall_s": round(time.perf_counter() - self._start, 4),
+                "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+
+# Outside of run_scan (e.g. the artwork backfill) everything records into this default
+_current = ContextVar("scan_metrics", default=ScanMetrics())
+
+
+def current():
+    return _current.get()
+
+
+def phase(name):
+    return current().phase(name)
+
+
+def count(name, amount=1):
+    current().count(name, amount)
+
+
+def bind(target):
+    """Wraps a worker thread's target so it records into the metrics of the scan that started it."""
+    metrics = current()
+
+    def run(*args, **kwargs):
+        token = _current.set(metrics)
+        try:
+            return target(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def metrics_path_for(output_filename, suffix='.metrics.json'):
+    """The summary lives next to the scanner's output JSON. Output to stdout ('-') has none."""
+    if not output_filename or output_filename == '-':
+        return None
+    return os.path.splitext(output_filename)[0] + suffix
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def run_scan(platform, output_filename, scan, profile=False, metrics=None):
+    """
+    Runs scan() with fresh metrics (metrics, if the caller wants to read them
+    afterwards) and under cProfile if asked to, then logs the summary and writes
+    it next to the output. Returns what scan() returned.
+    """
+    metrics = metrics or ScanMetrics(platform)
+    token = _current.set(metrics)
+    profiler = None
+    if profile or PROFILE_FROM_ENV:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    try:
+        if profiler is not None:
+            return profiler.runcall(scan)
+        return scan()
+    except Exception:
+        metrics.count("errors")
+        raise
+    finally:
+        _current.reset(token)
+        summary = metrics.summary()
+        logging.info(f"Scan metrics: {json.dumps(summary)}")
+        summary_path = metrics_path_for(output_filename)
+        try:
+            if summary_path:
+                _write_json(summary_path, summary)
+            if profiler is not None:
+                profile_path = metrics_path_for(output_filename, '.prof') or os.path.join(SCRIPT_DIR, f"scan_{platform}.prof")
+                profiler.dump_stats(profile_path)
+                logging.info(f"Profile written to '{profile_path}'")
+        except OSError as e:
+            logging.warning(f"Could not write scan metrics: {e}")
\ No newline at end of file
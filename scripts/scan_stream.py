@@ -0,0 +1,80 @@
+# In res://scripts/scan_stream.py
+#
+# Streaming scan output. Instead of one JSON document written at the end, every
+# game is emitted as its own record the moment it is discovered, and artwork
+# follows later as separate records:
+#
+#   {"type": "game", "platform": "Wii", "root": "F:/wii", "game": {"filename": "a.rvz", "icon_path": null}}
+#   {"type": "artwork", "platform": "Wii", "root": "F:/wii", "key": {"filename": "a.rvz"}, "icon_path": "C:/.../a.png"}
+#   {"type": "removed", "platform": "Wii", "root": "F:/wii", "key": {"filename": "old.iso"}}
+#   {"type": "duplicate", "platform": "Wii", "root": "D:/dl", "key": {"filename": "a.rvz"}, "of": {"root": "F:/wii", "filename": "a.rvz"}}
+#   {"type": "done", "platform": "Wii", "count": 1}
+#
+# "key" identifies the game inside its root: {"filename": ...} for Switch/Wii,
+# {"id": ...} for PS3.
+#
+# The scanners' --format ndjson writes the records to '<output>.ndjson' (or to
+# stdout when the output is '-'), never to the output JSON itself: that file is
+# still written as one document at the end of the scan, since the artwork
+# backfill, library_merge.py and XMB.gd read it.
+
+import os
+import sys
+import json
+
+
+class ScanStream:
+    """Hands every scan record (a dict) to write_record as soon as it is produced."""
+
+    def __init__(self, platform, write_record):
+        self.platform = platform
+        self.write_record = write_record
+        self.count = 0
+
+    def _emit(self, record):
+        self.write_record({"type": record.pop("type"), "platform": self.platform, **record})
+
+    def game(self, root, game):
+        self.count += 1
+        self._emit({"type": "game", "root": root, "game": game})
+
+    def artwork(self, root, key, icon_path):
+        self._emit({"type": "artwork", "root": root, "key": key, "icon_path": icon_path})
+
+    def removed(self, root, key):
+        self._emit({"type": "removed", "root": root, "key": key})
+
+    def duplicate(self, root, key, of):
+        self._emit({"type": "duplicate", "root": root, "key": key, "of": of})
+
+    def done(self):
+        self._emit({"type": "done", "count": self.count})
+
+
+def ndjson_path_for(output_filename):
+    """Where the stream of a scan writing output_filename goes; '-' is stdout."""
+    if output_filename == '-':
+        return '-'
+    return os.path.splitext(output_filename)[0] + '.ndjson'
+
+
+def open_ndjson_stream(platform, output_filename):
+    """
+    Returns (stream, close) writing NDJSON next to output_filename (see ndjson_path_for),
+    or to stdout for '-'. Every line is flushed immediately so a reader can follow the
+    file while it grows. Open it while holding the output file's lock (see file_lock.py).
+    """
+    path = ndjson_path_for(output_filename)
+    if path == '-':
+        out = sys.stdout
+        close = out.flush
+    else:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        out = open(path, 'w', encoding='utf-8')
+        close = out.close
+
+    def write_record(record):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    return ScanStream(platform, write_record), close
\ No newline at end of file
@@ -0,0 +1,417 @@
+# In res://scripts/scan_watch.py
+#
+# Watch mode. Keeps the scan outputs (and, with --library, the launcher's
+# library) up to date while the launcher runs: the emulator config files
+# (qt-config.ini, Dolphin.ini, games.yml) and every folder the last scan
+# walked are watched, and a change rescans just the platform it belongs to.
+#
+# Changes are noticed through inotify on Linux and by polling everywhere else
+# (or with --backend poll, or when a library needs more inotify watches than
+# XMB_WATCH_MAX_INOTIFY). Polling compares folder mtimes, which catch games
+# being added, removed or renamed, and the size and mtime of every game file,
+# which catch a game replaced or modified in place. Events are debounced: a rescan
+# starts once nothing changed for --debounce seconds (or --max-delay after the
+# first change), and everything that changed meanwhile is handled by that one
+# rescan. Rescans run in delta mode on the scan manifest, so only the folders
+# that changed are listed again and only new or changed games are processed;
+# each one is reported as one JSON line on stdout:
+#
+#   {"type": "ready", "backend": "inotify", "watched": 412}
+#   {"type": "update", "platform": "Wii", "changed": ["F:/wii"], "data": {"added": {...}, "changed": {...},
+#    "removed": {...}}, "metrics": {...}}
+#
+# Like --delta, the output file keeps the full listing (artwork_backfill.py
+# writes icons into it) and '<output>.delta.json' the latest delta. Between
+# rescans inotify only keeps watch handles in memory and an idle watch costs
+# nothing; polling keeps folder mtimes and game file signatures and costs one
+# stat per folder and per game file each poll.
+#
+# Usage: python scan_watch.py --platform Wii <config_dir> <output_file> [--platform ...] [--library MENU_DATA]
+
+import os
+import sys
+import json
+import time
+import select
+import struct
+import logging
+import argparse
+
+import scan_manifest
+from scan_manifest import manifest_path_for
+from scanner_daemon import ScannerDaemon, RpcError, DIRECTORY_SCANNERS, load_scanners
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEBOUNCE_SECONDS = 1.0
+MAX_DELAY_SECONDS = 10.0
+POLL_INTERVAL = float(os.getenv("XMB_WATCH_POLL_INTERVAL", "2.0"))
+MAX_INOTIFY_WATCHES = int(os.getenv("XMB_WATCH_MAX_INOTIFY", "8192"))
+
+# Reported by a backend when it lost track of events; every platform is rescanned
+OVERFLOW = "*"
+
+
+def setup_logging():
+    """Configures logging to write to a file."""
+    log_file_path = os.path.join(SCRIPT_DIR, 'python_scanner.log')
+    logging.basicConfig(
+        filename=log_file_path,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size) if not os.path.isdir(path) else stat.st_mtime
+
+
+def _game_signature(path):
+    """A game file's [size, mtime], the signature the scan manifest stores for it."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+class PollBackend:
+    """
+    Notices changes by stat-ing every watched folder and file once per interval. A game
+    file that changed in place is reported as its folder, which the rescan then lists again.
+    """
+
+    name = "poll"
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.known = {}
+        self.games = {}
+        self.next_poll = time.monotonic()
+
+    def update(self, folders, files, games=None):
+        """
+        folders maps each folder to the mtime the last scan saw; files are watched for any change;
+        games maps each game file to the [size, mtime] the last scan saw.
+        """
+        known = {}
+        for folder, mtime in folders.items():
+            known[folder] = self.known.get(folder, mtime)
+        for path in files:
+            known[path] = self.known.get(path, _stat_signature(path))
+        self.known = known
+        self.games = {path: self.games.get(path, signature) for path, signature in (games or {}).items()}
+
+    def wait(self, timeout):
+        """Returns the watched paths that changed, after at most timeout seconds (None waits for one)."""
+        now = time.monotonic()
+        if timeout is not None and self.next_poll - now > timeout:
+            time.sleep(max(timeout, 0))
+            return set()
+        time.sleep(max(self.next_poll - now, 0))
+        self.next_poll = time.monotonic() + self.interval
+
+        changed = set()
+        for path, signature in self.known.items():
+            current = _stat_signature(path)
+            if current != signature:
+                self.known[path] = current
+                changed.add(path)
+        for path, signature in self.games.items():
+            current = _game_signature(path)
+            if current != signature:
+                self.games[path] = current
+                changed.add(os.path.dirname(path))
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Linux inotify through ctypes: one watch per folder, files are watched through their folder."""
+
+    name = "inotify"
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+                  | IN_MOVE_SELF | IN_ATTRIB)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {} # folder -> watch descriptor
+        self.paths = {} # watch descriptor -> folder
+        self.watched_folders = set()
+        self.files = set()
+
+    def _add(self, folder):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(folder), self.WATCH_MASK)
+        if wd < 0:
+            error = self._ctypes.get_errno()
+            if error == 28: # ENOSPC: out of watches
+                raise OSError(error, "inotify watch limit reached")
+            return False # Gone already; the rescan will notice
+        self.folders[folder] = wd
+        self.paths[wd] = folder
+        return True
+
+    def update(self, folders, files, games=None):
+        # A game written in place raises IN_CLOSE_WRITE or IN_ATTRIB on its folder's watch
+        self.watched_folders = set(folders)
+        self.files = set(files)
+        wanted = self.watched_folders | {os.path.dirname(path) for path in self.files}
+        for folder in list(self.folders):
+            if folder not in wanted:
+                wd = self.folders.pop(folder)
+                self.paths.pop(wd, None)
+                self._libc.inotify_rm_watch(self.fd, wd)
+        changed = set()
+        for folder in wanted - set(self.folders):
+            if self._add(folder) and folder in folders and _stat_signature(folder) != folders[folder]:
+                # Changed between the scan and the watch being added
+                changed.add(folder)
+        return changed
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + self.EVENT_HEADER.size:offset + self.EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += self.EVENT_HEADER.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                changed.add(OVERFLOW)
+                continue
+            folder = self.paths.get(wd)
+            if folder is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self.folders.pop(folder, None)
+                self.paths.pop(wd, None)
+                continue
+            path = os.path.join(folder, os.fsdecode(name)) if name else folder
+            if path in self.files:
+                changed.add(path)
+            if folder in self.watched_folders:
+                changed.add(folder)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_backend(kind, folder_count):
+    """The backend to use: inotify where it is available and the library fits its watch budget, else polling."""
+    if kind == "poll" or not sys.platform.startswith("linux"):
+        return PollBackend()
+    if folder_count > MAX_INOTIFY_WATCHES:
+        logging.info(f"{folder_count} folders to watch is more than {MAX_INOTIFY_WATCHES} inotify watches, polling.")
+        return PollBackend()
+    try:
+        return InotifyBackend()
+    except (OSError, AttributeError) as e:
+        logging.warning(f"inotify is not available ({e}), polling instead.")
+        return PollBackend()
+
+
+def watch_targets(platform, config_path, output_file):
+    """
+    ({folder: mtime the last scan saw}, [files], {game file: [size, mtime] the last scan saw})
+    to watch for one platform, from its scan manifest.
+    """
+    folders, games = {}, {}
+    manifest = scan_manifest.ScanManifest(manifest_path_for(output_file))
+    for root, known in manifest.roots.items():
+        if platform in DIRECTORY_SCANNERS:
+            for rel_dir, mtime in (known.get("mtime") or {}).get("dirs", {}).items():
+                folders[os.path.normpath(os.path.join(root, rel_dir) if rel_dir else root)] = mtime
+            for name, entry in known.get("entries", {}).items():
+                games[os.path.normpath(os.path.join(root, name))] = entry["sig"]
+        else:
+            # PS3: every game folder listed in games.yml, with the mtime the scan compared
+            for entry in known.get("entries", {}).values():
+                game_path, mtime = entry["sig"]
+                folders[os.path.normpath(game_path)] = mtime
+    return folders, [os.path.normpath(config_path)], games
+
+
+class LibraryWatcher:
+    """Rescans a platform whenever its config file or one of its game folders changes."""
+
+    def __init__(self, scanners, platforms, library=None, backend="auto", debounce=DEBOUNCE_SECONDS,
+                 max_delay=MAX_DELAY_SECONDS, defer_artwork=False, emit=None):
+        self.scanners = scanners
+        self.daemon = ScannerDaemon(self.scanners)
+        self.platforms = platforms # {platform: (config_dir, output_file)}
+        self.library = library
+        self.backend_kind = backend
+        self.backend = None
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.defer_artwork = defer_artwork
+        self.emit = emit or (lambda record: print(json.dumps(record), flush=True))
+        self.owners = {}
+
+    def _config_path(self, platform):
+        config_dir, _ = self.platforms[platform]
+        return os.path.join(config_dir, self.scanners[platform][1])
+
+    def rescan(self, platform, changed=()):
+        config_dir, output_file = self.platforms[platform]
+        if platform in DIRECTORY_SCANNERS:
+            for path in changed:
+                if os.path.isdir(path):
+                    scan_manifest.invalidate(path)
+        try:
+            result = self.daemon.scan(platform=platform, config_dir=config_dir, output_file=output_file, delta=True,
+                                      library=self.library, defer_artwork=self.defer_artwork)
+        except RpcError as e:
+            logging.error(f"Watch rescan of {platform} failed: {e.message}")
+            return
+        finally:
+            scan_manifest.clear_invalidated()
+        self.emit({"type": "update", "platform": platform, "changed": sorted(p.replace('\\', '/') for p in changed),
+                   "data": result["data"], "metrics": result["metrics"]})
+
+    def refresh_targets(self):
+        """Points the backend at what the last scans saw. Returns paths that changed since."""
+        folders, files, games = {}, [], {}
+        self.owners = {}
+        for platform, (_, output_file) in self.platforms.items():
+            platform_folders, platform_files, platform_games = watch_targets(platform, self._config_path(platform),
+                                                                             output_file)
+            folders.update(platform_folders)
+            files.extend(platform_files)
+            games.update(platform_games)
+            for path in list(platform_folders) + platform_files:
+                self.owners.setdefault(path, set()).add(platform)
+
+        if self.backend is None:
+            self.backend = open_backend(self.backend_kind, len(folders))
+        try:
+            changed = self.backend.update(folders, files, games) or set()
+        except OSError as e:
+            logging.warning(f"Switching to polling: {e}")
+            self.backend.close()
+            self.backend = PollBackend()
+            changed = self.backend.update(folders, files, games) or set()
+        logging.info(f"Watching {len(folders)} folders, {len(games)} game files and {len(files)} config files "
+                     f"({self.backend.name}).")
+        return changed, len(folders) + len(files)
+
+    def run(self, stop=None):
+        """Scans every platform once, then rescans on changes until stop() returns True."""
+        for platform in self.platforms:
+            self.rescan(platform)
+        changed, watched = self.refresh_targets()
+        self.emit({"type": "ready", "backend": self.backend.name, "watched": watched})
+
+        pending = {}
+        first_change = last_change = None
+        while stop is None or not stop():
+            if pending:
+                now = time.monotonic()
+                timeout = max(min(last_change + self.debounce, first_change + self.max_delay) - now, 0)
+            else:
+                timeout = 1.0 if stop is not None else None
+            if not changed:
+                changed = self.backend.wait(timeout)
+
+            now = time.monotonic()
+            for path in changed:
+                owners = set(self.platforms) if path == OVERFLOW else self.owners.get(path, ())
+                for platform in owners:
+                    pending.setdefault(platform, set()).add(path)
+            if changed:
+                last_change = now
+                first_change = first_change or now
+            changed = set()
+
+            if pending and (now - last_change >= self.debounce or now - first_change >= self.max_delay):
+                for platform, paths in pending.items():
+                    self.rescan(platform, paths - {OVERFLOW})
+                pending = {}
+                first_change = last_change = None
+                changed, _ = self.refresh_targets()
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Rescans platforms whenever their games or configs change.")
+    parser.add_argument("--platform", nargs=3, action="append", required=True,
+                        metavar=("NAME", "CONFIG_DIR", "OUTPUT_FILE"), help="A platform to watch (can be repeated).")
+    parser.add_argument("--library", metavar="MENU_DATA",
+                        help="Also merge every update into this menu_data.json (or sharded library).")
+    parser.add_argument("--backend", choices=("auto", "poll"), default="auto",
+                        help="'auto' uses inotify on Linux and polling elsewhere.")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help="Seconds without changes before a rescan starts.")
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY_SECONDS,
+                        help="Rescan at the latest this many seconds after the first change.")
+    parser.add_argument("--defer-artwork", action="store_true",
+                        help="Queue missing artwork for artwork_backfill.py instead of downloading it.")
+    args = parser.parse_args()
+
+    logging.info("--- Scan Watch Starting ---")
+    # stdout carries the updates, so anything the scanners print goes to stderr instead
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    def emit(record):
+        protocol_out.write(json.dumps(record) + "\n")
+        protocol_out.flush()
+
+    scanners = load_scanners()
+    platforms = {}
+    for name, config_dir, output_file in args.platform:
+        if name not in scanners:
+            parser.error(f"unknown platform '{name}' (one of: {', '.join(scanners)})")
+        platforms[name] = (config_dir, output_file)
+
+    watcher = LibraryWatcher(scanners, platforms, args.library, args.backend, args.debounce, args.max_delay,
+                             args.defer_artwork, emit)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    logging.info("--- Scan Watch Finished ---")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
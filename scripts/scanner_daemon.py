@@ -0,0 +1,226 @@
+# In res://scripts/scanner_daemon.py
+#
+# A resident scanner service. Start it once and send it one JSON-RPC 2.0
+# request per line on stdin; every response is written as one line on stdout.
+#
+#   {"jsonrpc": "2.0", "id": 1, "method": "scan",
+#    "params": {"platform": "Wii", "config_dir": "C:/Dolphin/User/Config",
+#               "output_file": "C:/.../gamedir_contents_wii.json"}}
+#
+# Methods:
+#   scan      - params: platform, config_dir, output_file, delta (opt.), full (opt.), stream (opt.),
+#               profile (opt.), library (opt., a menu_data.json to merge the result into),
+#               defer_artwork (opt., queue missing artwork for artwork_backfill.py instead of downloading it),
+#               and for Switch/Wii recursive, max_depth, exclude, dedup (opt., see the scanners' flags)
+#               result: {"platform", "output_file", "data", "metrics"}
+#               With "delta": true, "data" is only what changed; the output file still
+#               gets the full listing and the delta also goes to '<output>.delta.json'.
+#               "metrics" is the scan's phase timings and counters, also written
+#               to '<output>.metrics.json' (see scan_metrics.py).
+#               With "stream": true, every game and icon is first sent as a
+#               "scan.record" notification (see scan_stream.py for the records)
+#               and the result's "data" is null.
+#   platforms - result: list of supported platform names
+#   ping      - result: "pong"
+#   shutdown  - result: null, then the daemon exits
+#
+# The daemon logs to python_scanner.log (XMB_SCANNER_LOG overrides it) and
+# keeps its caches and downloaded icons in scripts/media (XMB_MEDIA_DIR), so a
+# test or a second launcher install can point both somewhere else.
+
+import os
+import sys
+import json
+import time
+import logging
+
+from scan_stream import ScanStream
+from dedup import DEDUP_MODES
+import scan_metrics
+from file_lock import locked
+from library_merge import merge_into_library
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SCAN_FAILED = -32000
+
+# Platforms whose scanner walks game directories and takes the walk options
+DIRECTORY_SCANNERS = ("Switch", "Wii")
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def setup_logging():
+    """Configures logging to write to a file."""
+    log_file_path = os.getenv("XMB_SCANNER_LOG", os.path.join(SCRIPT_DIR, 'python_scanner.log'))
+    logging.basicConfig(
+        filename=log_file_path,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
+
+def load_scanners():
+    """
+    Imports every platform scanner (and their dependencies) once. The names match the category keys used in
+    menu_data.json; each entry is (scan function, emulator config file name).
+    """
+    import read_config_switch
+    import read_config_wii
+    import read_config_ps3
+
+    # The scanners import their heavy dependencies lazily to keep one-shot runs
+    # fast. The daemon pays that cost once up front instead of on the first scan.
+    import artwork
+    artwork.get_api_key()
+    artwork.get_session()
+    import request_scheduler  # noqa: F401
+    try:
+        import yaml
+    except ImportError:
+        logging.warning("PyYAML is not installed, PS3 scans will fail.")
+
+    return {
+        "Switch": (read_config_switch.find_game_paths_from_config, "qt-config.ini"),
+        "Wii": (read_config_wii.find_game_paths_from_config, "Dolphin.ini"),
+        "Playstation 3": (read_config_ps3.find_games_from_yml, "games.yml"),
+    }
+
+
+class ScannerDaemon:
+    def __init__(self, scanners):
+        self.scanners = scanners
+        self.running = True
+        self.stdout = None
+
+    def notify(self, method, params):
+        self._write({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def scan(self, platform=None, config_dir=None, output_file=None, delta=False, full=False, stream=False,
+             recursive=None, max_depth=None, exclude=None, dedup=None, profile=False,
+             library=None, defer_artwork=False):
+        if platform not in self.scanners:
+            raise RpcError(INVALID_PARAMS, f"Unknown platform '{platform}'")
+        if not config_dir or not output_file:
+            raise RpcError(INVALID_PARAMS, "Both 'config_dir' and 'output_file' are required")
+
+        scan_function, config_file_name = self.scanners[platform]
+        logging.info(f"--- Daemon scan for {platform} ---")
+        start = time.perf_counter()
+        scan_stream = ScanStream(platform, lambda record: self.notify("scan.record", record)) if stream else None
+        walk_options = {}
+        if platform in DIRECTORY_SCANNERS:
+            walk_options = {"recursive": recursive, "max_depth": max_depth}
+            if exclude is not None:
+                walk_options["exclude"] = tuple(exclude)
+            if dedup is not None:
+                if dedup not in DEDUP_MODES:
+                    raise RpcError(INVALID_PARAMS, f"Unknown dedup mode '{dedup}'")
+                walk_options["dedup"] = dedup
+        try:
+            def run():
+                result = scan_function(config_dir, config_file_name, output_file, delta, full, scan_stream,
+                                       defer_artwork=defer_artwork, **walk_options)
+                if library:
+                    with scan_metrics.phase("library"):
+                        merge_into_library(library, platform, result)
+                return result
+
+            # One scan of an output file at a time, whichever process started it
+            metrics = scan_metrics.ScanMetrics(platform)
+            with locked(output_file):
+                data = scan_metrics.run_scan(platform, output_file, run, profile, metrics)
+        except Exception as e:
+            logging.error(f"Scan for {platform} failed", exc_info=True)
+            raise RpcError(SCAN_FAILED, f"Scan for {platform} failed: {e}")
+        logging.info(f"--- Daemon scan for {platform} finished in {time.perf_counter() - start:.2f}s ---")
+
+        return {"platform": platform, "output_file": output_file, "data": None if stream else data,
+                "metrics": metrics.summary()}
+
+    def handle(self, request):
+        """Handles one decoded request and returns the response dict (None for notifications)."""
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or "method" not in request:
+            return self._error(None, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+
+        try:
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "Params must be an object")
+            if method == "scan":
+                result = self.scan(**params)
+            elif method == "platforms":
+                result = list(self.scanners)
+            elif method == "ping":
+                result = "pong"
+            elif method == "shutdown":
+                self.running = False
+                result = None
+            else:
+                raise RpcError(METHOD_NOT_FOUND, f"Method '{method}' not found")
+        except RpcError as e:
+            return self._error(request_id, e.code, e.message)
+        except TypeError as e:
+            return self._error(request_id, INVALID_PARAMS, str(e))
+
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return self._error(None, PARSE_ERROR, f"Parse error: {e}")
+        return self.handle(request)
+
+    def serve(self, stdin, stdout):
+        """Reads requests line by line until shutdown or end of input."""
+        self.stdout = stdout
+        for line in stdin:
+            if not line.strip():
+                continue
+            response = self.handle_line(line)
+            if response is not None:
+                self._write(response)
+            if not self.running:
+                break
+
+    def _write(self, message):
+        self.stdout.write(json.dumps(message) + "\n")
+        self.stdout.flush()
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def main():
+    setup_logging()
+    logging.info("--- Scanner Daemon Starting ---")
+
+    # stdout carries the protocol, so anything the scanners print goes to stderr instead
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    daemon = ScannerDaemon(load_scanners())
+    daemon.serve(sys.stdin, protocol_out)
+    logging.info("--- Scanner Daemon Finished ---")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,260 @@
+# In res://scripts/title_db.py
+#
+# Offline title database. Maps game ids (Switch title ids, GameCube/Wii disc
+# ids, PS3 serials) to canonical names and SteamGridDB game ids, with an index
+# of normalised names for prefix and fuzzy lookups. With an entry that knows
+# the SteamGridDB id, artwork.py skips the /search/autocomplete request and
+# only asks for the icon itself.
+#
+# The database is filled by importing title lists once, offline:
+#
+#   python title_db.py import wiitdb.txt                 # GameTDB "RSBE01 = Super Smash Bros. Brawl" lines
+#   python title_db.py import titles.csv                 # columns: id, name[, sgdb_id][, platform]
+#   python title_db.py import titles.json                # {id: name}, {id: {"name", "sgdb_id"}} or [{"id", "name", ...}]
+#   python title_db.py lookup BLES01961 | "super smash"  # id, else prefix and fuzzy name matches
+#
+# and learns the SteamGridDB id of every game the API resolves during a scan.
+
+import os
+import re
+import csv
+import json
+import difflib
+import logging
+import argparse
+import threading
+import unicodedata
+
+from game_id import SWITCH_TITLE_ID_RE, PS3_SERIAL_RE
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.getenv("XMB_MEDIA_DIR", os.path.join(SCRIPT_DIR, 'media'))
+DB_PATH = os.path.join(MEDIA_DIR, 'titles.sqlite3')
+
+# A fuzzy name match needs at least this similarity (difflib ratio, 0..1)
+FUZZY_CUTOFF = 0.88
+# Fuzzy matching only compares names sharing this many leading characters
+FUZZY_PREFIX_LENGTH = 3
+FUZZY_CANDIDATES = 2000
+
+DISC_ID_RE = re.compile(r'^[0-9A-Z]{6}$')
+GAMETDB_LINE_RE = re.compile(r'^\s*([0-9A-Za-z]{4,16})\s*=\s*(.+?)\s*$')
+
+
+def normalize_name(name):
+    """Casefolded, accent-free and punctuation-free form of a title, for indexing and matching."""
+    name = re.sub(r'\[.*?\]|\(.*?\)', ' ', name)
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c)).casefold().replace('&', ' and ')
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', name).split())
+
+
+def platform_for_id(title_id):
+    """Guesses the platform from the shape of an id, or returns None."""
+    if SWITCH_TITLE_ID_RE.fullmatch(title_id):
+        return "switch"
+    if PS3_SERIAL_RE.fullmatch(title_id):
+        return "ps3"
+    if DISC_ID_RE.match(title_id):
+        return "gamecube" if title_id[0] in "GD" else "wii"
+    return None
+
+
+class TitleDatabase:
+    """
+    SQLite table of known titles: id -> (platform, name, normalised name, SteamGridDB id).
+    An id the API resolved without a canonical name to go by has no name.
+    """
+
+    def __init__(self, path=DB_PATH):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS titles (
+                title_id TEXT PRIMARY KEY,
+                platform TEXT,
+                name TEXT,
+                norm_name TEXT,
+                sgdb_id INTEGER
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS titles_norm_name ON titles (norm_name)")
+        self._conn.commit()
+
+    def _entries(self, query, params):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT title_id, platform, name, sgdb_id FROM titles WHERE {query}", params
+            ).fetchall()
+        return [dict(zip(("title_id", "platform", "name", "sgdb_id"), row)) for row in rows]
+
+    def lookup(self, title_id):
+        """The entry for an id, or None."""
+        entries = self._entries("title_id = ?", (title_id.upper(),))
+        return entries[0] if entries else None
+
+    def prefix(self, name, limit=10):
+        """Entries whose normalised name starts with the normalised name given (uses the index)."""
+        key = normalize_name(name)
+        if not key:
+            return []
+        return self._entries("norm_name >= ? AND norm_name < ? ORDER BY norm_name LIMIT ?",
+                             (key, key + '\uffff', limit))
+
+    def match_name(self, name):
+        """The entry with exactly this normalised name, else the closest fuzzy match above FUZZY_CUTOFF, or None."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        exact = self._entries("norm_name = ? LIMIT 1", (key,))
+        if exact:
+            return exact[0]
+
+        start = key[:FUZZY_PREFIX_LENGTH]
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT norm_name FROM titles WHERE norm_name >= ? AND norm_name < ? LIMIT ?",
+                (start, start + '\uffff', FUZZY_CANDIDATES)
+            ).fetchall()
+        close = difflib.get_close_matches(key, [row[0] for row in candidates], n=1, cutoff=FUZZY_CUTOFF)
+        if not close:
+            return None
+        return self._entries("norm_name = ? LIMIT 1", (close[0],))[0]
+
+    def resolve(self, identity=None, name=None):
+        """The entry for a game identity from game_id.py, falling back to its name; None if unknown."""
+        if identity:
+            entry = self.lookup(identity["id"])
+            if entry:
+                return entry
+        return self.match_name(name) if name else None
+
+    def store_many(self, entries):
+        """Imports (title_id, platform, name, sgdb_id) rows in one transaction. Known SteamGridDB ids are kept."""
+        rows = [(title_id.upper(), platform or platform_for_id(title_id.upper()), name, normalize_name(name), sgdb_id)
+                for title_id, platform, name, sgdb_id in entries if title_id and name]
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO titles VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(title_id) DO UPDATE SET platform = excluded.platform, name = excluded.name,
+                   norm_name = excluded.norm_name, sgdb_id = COALESCE(excluded.sgdb_id, titles.sgdb_id)""",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def remember_sgdb_id(self, identity, name, sgdb_id):
+        """
+        Records the SteamGridDB id the API resolved an identified game to; an imported name is kept.
+        name is the game's canonical name, or None to record the id alone.
+        """
+        title_id = identity["id"].upper()
+        with self._lock:
+            updated = self._conn.execute("UPDATE titles SET sgdb_id = ? WHERE title_id = ?", (sgdb_id, title_id))
+            if not updated.rowcount:
+                self._conn.execute("INSERT INTO titles VALUES (?, ?, ?, ?, ?)",
+                                   (title_id, identity.get("platform"), name, normalize_name(name) if name else None,
+                                    sgdb_id))
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_title_db():
+    """Returns the shared title database, opening it on first use."""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = TitleDatabase()
+    return _db
+
+
+def title_for(title_id):
+    """The canonical name of a game id, or None. Nothing is opened while no database was imported."""
+    if not title_id or not os.path.isfile(DB_PATH):
+        return None
+    entry = get_title_db().lookup(title_id)
+    return entry["name"] if entry else None
+
+
+def fill_titles(identities):
+    """Sets the canonical name on identities ({name: identity or None}) whose header carried no title, in place."""
+    for identity in identities.values():
+        if identity and not identity.get("title"):
+            identity["title"] = title_for(identity["id"])
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def read_title_list(path, platform=None):
+    """Yields (title_id, platform, name, sgdb_id) from a GameTDB .txt, a .csv or a .json title list."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if extension == '.json':
+            data = json.load(f)
+            items = data.items() if isinstance(data, dict) else ((None, item) for item in data)
+            for title_id, value in items:
+                if isinstance(value, dict):
+                    yield (value.get("id") or title_id, value.get("platform", platform), value.get("name"),
+                           _int_or_none(value.get("sgdb_id")))
+                elif isinstance(value, str):
+                    yield title_id, platform, value, None
+        elif extension == '.csv':
+            for row in csv.DictReader(f):
+                yield row.get("id"), row.get("platform") or platform, row.get("name"), _int_or_none(row.get("sgdb_id"))
+        else:
+            for line in f:
+                match = GAMETDB_LINE_RE.match(line)
+                # GameTDB lists start with a "TITLES = ..." header line
+                if match and match.group(1).upper() != "TITLES":
+                    yield match.group(1), platform, match.group(2), None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename=os.path.join(SCRIPT_DIR, 'python_scanner.log'),
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+    parser = argparse.ArgumentParser(description="Manages the offline title database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import a GameTDB .txt, .csv or .json title list.")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--platform", choices=("switch", "wii", "gamecube", "ps3"),
+                               help="Platform of every entry (default: guessed from each id).")
+    lookup_parser = commands.add_parser("lookup", help="Look up an id or a name.")
+    lookup_parser.add_argument("query")
+    args = parser.parse_args()
+
+    db = get_title_db()
+    if args.command == "import":
+        imported = db.store_many(read_title_list(args.path, args.platform))
+        logging.info(f"Imported {imported} titles from '{args.path}'.")
+        print(f"Imported {imported} titles, {db.count()} in the database.")
+    else:
+        entry = db.lookup(args.query)
+        matches = [entry] if entry else db.prefix(args.query) or [match for match in [db.match_name(args.query)] if match]
+        for match in matches:
+            print(f"{match['title_id']:16}  {match['platform'] or '?':8}  {match['sgdb_id'] or '-':>8}  {match['name'] or ''}")
+        if not matches:
+            print("No match.")
\ No newline at end of file
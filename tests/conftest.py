@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The scripts import each other by module name, the way XMB.gd runs them
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
\ No newline at end of file
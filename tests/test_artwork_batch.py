@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+import artwork
+import artwork_cache
+from artwork import fetch_artwork_batch
+from artwork_cache import ArtworkCache
+from artwork_priority import PriorityHints
+
+
+@pytest.fixture
+def lookups(tmp_path, monkeypatch):
+    """Replaces the SteamGridDB lookup; returns the (game, icon name, thread) of every call."""
+    cache = ArtworkCache(str(tmp_path / "artwork_cache.sqlite3"))
+    monkeypatch.setattr(artwork_cache, "_cache", cache)
+    calls = []
+    lock = threading.Lock()
+
+    def get_game_artwork(game_filename, icon_name, session, cache, identity):
+        with lock:
+            calls.append((game_filename, icon_name, threading.current_thread()))
+        if game_filename.startswith("broken"):
+            raise RuntimeError("lookup failed")
+        return f"media/icon/{icon_name}.png"
+
+    monkeypatch.setattr(artwork, "get_game_artwork", get_game_artwork)
+    yield calls
+    cache.close()
+
+
+def no_hint(tmp_path):
+    return PriorityHints(str(tmp_path / "no_hint.json"))
+
+
+def test_games_are_looked_up_concurrently(tmp_path, lookups, monkeypatch):
+    all_running = threading.Barrier(3, timeout=5)
+    lookup = artwork.get_game_artwork
+
+    def waiting_lookup(*args):
+        # Only returns once three lookups run at the same time
+        all_running.wait()
+        return lookup(*args)
+
+    monkeypatch.setattr(artwork, "get_game_artwork", waiting_lookup)
+    results = fetch_artwork_batch(["a.nsp", "b.nsp", "c.nsp"], max_workers=3, hints=no_hint(tmp_path))
+    assert results == {name: f"media/icon/{name[0]}.png" for name in ("a.nsp", "b.nsp", "c.nsp")}
+    assert len({thread for _, _, thread in lookups}) == 3
+
+
+def test_games_sharing_an_icon_name_are_looked_up_once(tmp_path, lookups):
+    reported = []
+    results = fetch_artwork_batch(["Game.nsp", "Game.xci", "Other.nsp"], max_workers=4,
+                                  on_result=lambda name, path: reported.append((name, path, threading.current_thread())),
+                                  hints=no_hint(tmp_path))
+    assert sorted(icon_name for _, icon_name, _ in lookups) == ["Game", "Other"]
+    assert results["Game.nsp"] == results["Game.xci"] == "media/icon/Game.png"
+    # Every game is reported, from the calling thread
+    assert sorted(name for name, _, _ in reported) == ["Game.nsp", "Game.xci", "Other.nsp"]
+    assert {thread for _, _, thread in reported} == {threading.current_thread()}
+
+
+def test_failed_lookup_only_costs_its_own_game(tmp_path, lookups):
+    results = fetch_artwork_batch(["broken.nsp", "fine.nsp"], max_workers=1, hints=no_hint(tmp_path))
+    assert results == {"broken.nsp": None, "fine.nsp": "media/icon/fine.png"}
\ No newline at end of file
@@ -0,0 +1,50 @@
+import pytest
+
+import artwork
+from artwork import get_game_artwork
+from artwork_cache import ArtworkCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ArtworkCache(str(tmp_path / "artwork_cache.sqlite3"), miss_ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses_are_remembered(cache):
+    cache.store_hit("Mario Kart 8", 12, "https://cdn.example/1.png", "media/icon/mk8.png")
+    cache.store_miss("Homebrew Thing")
+    assert cache.lookup("Mario Kart 8") == {"found": True, "game_id": 12, "icon_url": "https://cdn.example/1.png",
+                                            "icon_path": "media/icon/mk8.png"}
+    assert cache.lookup("Homebrew Thing") == {"found": False, "game_id": None, "icon_url": None, "icon_path": None}
+    assert cache.lookup("Never Seen") is None
+
+
+def test_misses_expire_and_hits_do_not(cache, monkeypatch):
+    import artwork_cache
+
+    cache.store_hit("Hit", 1, "https://cdn.example/1.png", "media/icon/hit.png")
+    cache.store_miss("Miss")
+    now = artwork_cache.time.time()
+    monkeypatch.setattr(artwork_cache.time, "time", lambda: now + 61)
+    assert cache.lookup("Miss") is None
+    assert cache.lookup("Hit")["found"]
+
+
+def test_cached_icon_and_cached_miss_need_no_request(tmp_path, cache, monkeypatch):
+    monkeypatch.setattr(artwork, "ICON_SAVE_DIR", str(tmp_path / "icon"))
+    icon = tmp_path / "icon" / "Mario Kart 8.png"
+    icon.parent.mkdir()
+    icon.write_bytes(b"png")
+    cache.store_hit("Mario Kart 8", 12, "https://cdn.example/1.png", str(icon))
+    cache.store_miss("Homebrew Thing")
+
+    # No API key and no session: any lookup past the cache would come back empty
+    monkeypatch.setattr(artwork, "_api_key", "")
+    assert get_game_artwork("Mario Kart 8 [v0].nsp", "Mario Kart 8", cache=cache) == str(icon).replace('\\', '/')
+    assert get_game_artwork("Homebrew Thing.nsp", cache=cache) is None
+
+    # A second game with the same search name gets its own copy of the icon
+    copy = get_game_artwork("Mario Kart 8.xci", "Mario Kart 8 (xci)", cache=cache)
+    assert copy.endswith("Mario Kart 8 (xci).png") and open(copy, 'rb').read() == b"png"
\ No newline at end of file
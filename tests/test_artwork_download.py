@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import artwork
+from artwork import _download_icon
+from artwork_cache import ArtworkCache
+
+ICON_URL = "https://cdn.example/icon/1.png"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeCdn:
+    """Serves one icon and answers conditional requests the way a CDN does."""
+
+    def __init__(self, body, etag='"v1"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT"):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+        self.content_length = None
+
+    def get(self, url, stream=False, headers=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        if headers.get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {'ETag': self.etag, 'Last-Modified': self.last_modified,
+                                             'Content-Length': str(self.content_length or len(self.body))})
+
+
+@pytest.fixture
+def icon_dir(tmp_path, monkeypatch):
+    icon_dir = str(tmp_path / "icon")
+    monkeypatch.setattr(artwork, "ICON_SAVE_DIR", icon_dir)
+    return icon_dir
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ArtworkCache(str(tmp_path / "artwork_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_unchanged_icon_is_revalidated_not_downloaded(icon_dir, cache):
+    cdn = FakeCdn(b"icon v1")
+    target = os.path.join(icon_dir, "game.png")
+    assert _download_icon(cdn, ICON_URL, target, cache) == target.replace('\\', '/')
+    assert cdn.requests[0] == {}
+
+    mtime = os.path.getmtime(target)
+    _download_icon(cdn, ICON_URL, target, cache)
+    assert cdn.requests[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert open(target, 'rb').read() == b"icon v1" and os.path.getmtime(target) == mtime
+
+
+def test_changed_icon_replaces_the_old_one(icon_dir, cache):
+    cdn = FakeCdn(b"icon v1")
+    target = os.path.join(icon_dir, "game.png")
+    _download_icon(cdn, ICON_URL, target, cache)
+    cdn.body, cdn.etag = b"icon v2", '"v2"'
+    _download_icon(cdn, ICON_URL, target, cache)
+    assert open(target, 'rb').read() == b"icon v2"
+    assert cache.download_info(target)["etag"] == '"v2"'
+
+
+def test_damaged_or_moved_icon_is_downloaded_unconditionally(icon_dir, cache):
+    cdn = FakeCdn(b"icon v1")
+    target = os.path.join(icon_dir, "game.png")
+    _download_icon(cdn, ICON_URL, target, cache)
+    with open(target, 'wb') as f:
+        f.write(b"icon v")
+    _download_icon(cdn, ICON_URL, target, cache)
+    # A different URL for the same file is a different icon
+    _download_icon(cdn, ICON_URL + "?new", target, cache)
+    assert cdn.requests[1:] == [{}, {}]
+    assert open(target, 'rb').read() == b"icon v1"
+
+
+def test_truncated_download_keeps_the_old_icon(icon_dir, cache):
+    cdn = FakeCdn(b"icon v1")
+    target = os.path.join(icon_dir, "game.png")
+    _download_icon(cdn, ICON_URL, target, cache)
+    cdn.body, cdn.etag, cdn.content_length = b"icon", '"v2"', 7
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        _download_icon(cdn, ICON_URL, target, cache)
+    assert open(target, 'rb').read() == b"icon v1"
+    assert os.listdir(icon_dir) == ["game.png"]
\ No newline at end of file
@@ -0,0 +1,52 @@
+import os
+import json
+
+from artwork_priority import PriorityHints, ArtworkWorkQueue, VISIBLE, RECENT, FOCUSED_PLATFORM, game_key
+
+
+def write_hint(path, mtime, **hint):
+    path.write_text(json.dumps(hint), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_games_are_matched_by_file_name():
+    assert game_key("F:\\wii\\Mario Kart Wii.RVZ") == game_key("mario kart wii.rvz") == "mario kart wii.rvz"
+    assert game_key("F:/ps3/Demon's Souls/") == "demon's souls"
+
+
+def test_scores_rank_visible_recent_focused_then_the_rest(tmp_path):
+    write_hint(tmp_path / "hint.json", 1000, platform="Wii", visible=[{"name": "a.rvz", "path": "F:/wii/a.rvz"}],
+               recent=[{"path": "F:/switch/b.nsp"}])
+    hints = PriorityHints(str(tmp_path / "hint.json"))
+    hints.refresh()
+    assert hints.score("Wii", ["a.rvz"]) == VISIBLE
+    assert hints.score("Switch", ["B.NSP"]) == RECENT
+    assert hints.score("Wii", ["c.rvz"]) == FOCUSED_PLATFORM
+    assert hints.score("Switch", ["c.nsp"]) == 0
+
+
+def test_work_queue_reorders_when_the_hint_changes(tmp_path):
+    hint_path = tmp_path / "hint.json"
+    write_hint(hint_path, 1000, platform="Wii", visible=["c.rvz"])
+    items = {name: ("Wii", [name]) for name in ("a.rvz", "b.rvz", "c.rvz", "d.rvz", "e.rvz")}
+    work = ArtworkWorkQueue(items, PriorityHints(str(hint_path), interval=0))
+    assert work.prioritized() == 5
+    assert work.pop() == "c.rvz"
+    assert work.pop() == "a.rvz"
+
+    # The user scrolled: e is on screen now, d was just played
+    write_hint(hint_path, 2000, platform="Switch", visible=["e.rvz"], recent=["d.rvz"])
+    assert [work.pop() for _ in range(3)] == ["e.rvz", "d.rvz", "b.rvz"]
+    assert work.pop() is None and len(work) == 0
+
+
+def test_unreadable_hint_keeps_the_last_order(tmp_path):
+    hint_path = tmp_path / "hint.json"
+    write_hint(hint_path, 1000, platform="Wii", visible=["b.rvz"])
+    items = {name: ("Wii", [name]) for name in ("a.rvz", "b.rvz", "c.rvz")}
+    work = ArtworkWorkQueue(items, PriorityHints(str(hint_path), interval=0))
+    assert work.pop() == "b.rvz"
+
+    hint_path.write_text('{"platform": "Wii", "visi', encoding='utf-8')
+    os.utime(hint_path, (2000, 2000))
+    assert [work.pop(), work.pop()] == ["a.rvz", "c.rvz"]
\ No newline at end of file
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import artwork
+import artwork_queue
+from artwork_backfill import backfill
+from artwork_priority import PriorityHints
+from artwork_queue import ArtworkQueue, MAX_ATTEMPTS, retry_delay
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = ArtworkQueue(str(tmp_path / "artwork_queue.sqlite3"))
+    yield queue
+    queue.close()
+
+
+def enqueue(queue, platform, names, output_file="out.json"):
+    queue.enqueue_many(platform, output_file, [(name, name, "filename", None) for name in names])
+
+
+def write_hint(path, **hint):
+    path.write_text(json.dumps(hint), encoding='utf-8')
+    return PriorityHints(str(path), interval=0)
+
+
+def test_claims_in_queue_order_without_a_hint(queue):
+    enqueue(queue, "Wii", ["a.rvz", "b.rvz", "c.rvz"])
+    assert [job["game_name"] for job in queue.claim(2)] == ["a.rvz", "b.rvz"]
+    assert [job["game_name"] for job in queue.claim(2)] == ["c.rvz"]
+    assert queue.claim(2) == []
+
+
+def test_claims_visible_then_recent_then_focused_platform(tmp_path, queue):
+    enqueue(queue, "Switch", ["s1.nsp", "s2.nsp"])
+    enqueue(queue, "Wii", ["w1.rvz", "w2.rvz", "w3.rvz"])
+    hints = write_hint(tmp_path / "hint.json", platform="Wii", visible=[{"name": "w3.rvz", "path": "F:/wii/w3.rvz"}],
+                       recent=["S2.NSP"])
+    claimed = [job["game_name"] for job in queue.claim(4, hints)]
+    assert claimed == ["w3.rvz", "s2.nsp", "w1.rvz", "w2.rvz"]
+    assert [job["game_name"] for job in queue.claim(4, hints)] == ["s1.nsp"]
+
+
+def test_failed_lookup_waits_and_gives_up_after_max_attempts(queue, monkeypatch):
+    enqueue(queue, "Wii", ["a.rvz"])
+    now = 1000.0
+    monkeypatch.setattr(artwork_queue.time, "time", lambda: now)
+    for attempt in range(1, MAX_ATTEMPTS):
+        job, = queue.claim(1)
+        assert job["attempts"] == attempt - 1
+        assert queue.retry_later(job, "lookup failed")
+        # Not handed out again before its delay has passed
+        now += retry_delay(attempt) - 1
+        assert queue.claim(1) == []
+        now += 1
+
+    job, = queue.claim(1)
+    assert not queue.retry_later(job, "lookup failed")
+    now += 10 * artwork_queue.RETRY_MAX_SECONDS
+    assert queue.claim(1) == [] and queue.counts() == {"failed": 1}
+
+    # A rescan that still misses the icon queues the game again
+    enqueue(queue, "Wii", ["a.rvz"])
+    assert queue.counts() == {"pending": 1}
+
+
+def test_retry_delay_doubles_up_to_the_maximum():
+    assert retry_delay(1) == artwork_queue.RETRY_BASE_SECONDS
+    assert retry_delay(2) == 2 * artwork_queue.RETRY_BASE_SECONDS
+    assert retry_delay(100) == artwork_queue.RETRY_MAX_SECONDS
+
+
+def test_backfill_without_an_api_key_claims_nothing(queue, monkeypatch):
+    monkeypatch.setattr(artwork, "_api_key", "")
+    enqueue(queue, "Wii", ["a.rvz"])
+    summary = backfill(queue)
+    assert summary["done"] == summary["retry"] == summary["failed"] == 0
+    assert queue.counts() == {"pending": 1}
+    assert queue.claim(1)[0]["attempts"] == 0
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import dedup
+from dedup import FINGERPRINT_CHUNK, FingerprintCache, find_duplicates, full_hash, quick_fingerprint
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = FingerprintCache(str(tmp_path / "fingerprints.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def write(path, data):
+    path.write_bytes(data)
+    stat = os.stat(path)
+    return (path.name, str(path), stat.st_size, stat.st_mtime)
+
+
+def big(middle):
+    """A file larger than two chunks whose middle byte differs between copies."""
+    return b"h" * FINGERPRINT_CHUNK + middle + b"t" * FINGERPRINT_CHUNK
+
+
+def test_quick_fingerprint_only_reads_the_head_and_tail(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    a.write_bytes(big(b"1"))
+    b.write_bytes(big(b"2"))
+    c.write_bytes(b"H" + big(b"1")[1:])
+    size = len(big(b"1"))
+    assert quick_fingerprint(str(a), size) == quick_fingerprint(str(b), size)
+    assert quick_fingerprint(str(a), size) != quick_fingerprint(str(c), size)
+    assert full_hash(str(a)) != full_hash(str(b))
+
+
+def test_quick_fingerprint_of_a_small_file_covers_all_of_it(tmp_path):
+    (tmp_path / "a").write_bytes(b"x" * 100 + b"1" + b"x" * 100)
+    (tmp_path / "b").write_bytes(b"x" * 100 + b"2" + b"x" * 100)
+    assert quick_fingerprint(str(tmp_path / "a"), 201) != quick_fingerprint(str(tmp_path / "b"), 201)
+
+
+def test_copies_are_grouped_in_the_order_given(tmp_path, cache):
+    files = [write(tmp_path / "first.iso", b"game"), write(tmp_path / "other.iso", b"gamf"),
+             write(tmp_path / "copy.iso", b"game"), write(tmp_path / "empty1.iso", b""),
+             write(tmp_path / "empty2.iso", b""), write(tmp_path / "alone.iso", b"longer game")]
+    groups = find_duplicates(list(reversed(files)), cache=cache)
+    assert groups == [["copy.iso", "first.iso"]]
+    # Empty files are never taken for copies of each other
+    assert find_duplicates(files[3:5], cache=cache) == []
+
+
+def test_full_mode_tells_apart_files_that_differ_in_the_middle(tmp_path, cache):
+    files = [write(tmp_path / "a.iso", big(b"1")), write(tmp_path / "b.iso", big(b"2")),
+             write(tmp_path / "c.iso", big(b"1"))]
+    assert find_duplicates(files, cache=cache) == [["a.iso", "b.iso", "c.iso"]]
+    assert find_duplicates(files, full=True, cache=cache) == [["a.iso", "c.iso"]]
+
+
+def test_fingerprints_are_cached_until_the_file_changes(tmp_path, cache, monkeypatch):
+    files = [write(tmp_path / "a.iso", b"game"), write(tmp_path / "b.iso", b"game")]
+    assert find_duplicates(files, cache=cache) == [["a.iso", "b.iso"]]
+
+    hashed = []
+    monkeypatch.setattr(dedup, "quick_fingerprint", lambda path, size: hashed.append(path) or "same")
+    assert find_duplicates(files, cache=cache) == [["a.iso", "b.iso"]]
+    assert hashed == []
+
+    # Rewritten with the same size; only the new mtime tells
+    (tmp_path / "b.iso").write_bytes(b"gamf")
+    os.utime(tmp_path / "b.iso", (1000, 1000))
+    files[1] = ("b.iso", str(tmp_path / "b.iso"), 4, 1000.0)
+    find_duplicates(files, cache=cache)
+    assert hashed == [str(tmp_path / "b.iso")]
\ No newline at end of file
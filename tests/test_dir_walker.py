@@ -0,0 +1,66 @@
+import dir_walker
+from dir_walker import FILE, DIR, ERROR, DONE, walk_root, walk_roots
+
+
+def walk(root, **kwargs):
+    items = list(walk_root(str(root), ('.iso',), **kwargs))
+    return (sorted(item[1] for item in items if item[0] == FILE),
+            sorted(item[1] for item in items if item[0] == DIR))
+
+
+def test_folder_that_cannot_be_listed_is_not_recorded(tmp_path, monkeypatch):
+    (tmp_path / "good").mkdir()
+    (tmp_path / "good" / "a.iso").write_bytes(b"")
+    (tmp_path / "bad").mkdir()
+    (tmp_path / "bad" / "b.iso").write_bytes(b"")
+    scan_dir = dir_walker.scan_dir
+
+    def failing_scan_dir(abs_dir, *args):
+        if abs_dir.endswith("bad"):
+            raise PermissionError("denied")
+        return scan_dir(abs_dir, *args)
+
+    monkeypatch.setattr(dir_walker, "scan_dir", failing_scan_dir)
+    # Otherwise a rescan would see 'bad' with its old mtime and never list it again
+    assert walk(tmp_path, max_depth=None) == (["good/a.iso"], ["", "good"])
+
+def make_tree(root):
+    for rel in ("top.iso", "skip.txt", "a/one.iso", "a/b/two.iso", "a/b/c/three.ISO", "$RECYCLE.BIN/old.iso",
+                "backup/copy.iso", "a/backup.iso"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+
+def test_depth_limits_the_walk(tmp_path):
+    make_tree(tmp_path)
+    assert walk(tmp_path, max_depth=0) == (["top.iso"], [""])
+    assert walk(tmp_path, max_depth=2, exclude=()) == (
+        ["$RECYCLE.BIN/old.iso", "a/b/two.iso", "a/backup.iso", "a/one.iso", "backup/copy.iso", "top.iso"],
+        ["", "$RECYCLE.BIN", "a", "a/b", "backup"])
+    files, dirs = walk(tmp_path, max_depth=None)
+    assert "a/b/c/three.ISO" in files and "a/b/c" in dirs
+
+
+def test_exclude_patterns_skip_files_and_folders(tmp_path):
+    make_tree(tmp_path)
+    # The defaults skip the recycle bin
+    assert "$RECYCLE.BIN/old.iso" not in walk(tmp_path, max_depth=None)[0]
+    files, dirs = walk(tmp_path, max_depth=None, exclude=("backup*", "c"))
+    assert files == ["$RECYCLE.BIN/old.iso", "a/b/two.iso", "a/one.iso", "top.iso"]
+    assert "backup" not in dirs and "a/b/c" not in dirs
+
+
+def test_roots_are_walked_in_parallel_and_each_reports_done(tmp_path):
+    for name in ("one", "two"):
+        make_tree(tmp_path / name)
+    roots = [(str(tmp_path / "one"), 0), (str(tmp_path / "two"), None), (str(tmp_path / "missing"), 0)]
+    items = list(walk_roots(roots, ('.iso',)))
+
+    files = {root: sorted(item[1] for r, item in items if r == root and item[0] == FILE) for root, _ in roots}
+    assert files[str(tmp_path / "one")] == ["top.iso"]
+    assert len(files[str(tmp_path / "two")]) == 6
+    assert [item[0] for r, item in items if r == str(tmp_path / "missing")] == [ERROR, DONE]
+    # DONE comes last for every root
+    for root, _ in roots:
+        assert [item[0] for r, item in items if r == root][-1] == DONE
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+
+from emulator_config import read_eden_gamedirs, read_dolphin_iso_paths, is_filesystem_path
+
+
+def write(path, text, mtime=None):
+    path.write_text(text, encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_every_eden_game_directory_in_index_order(tmp_path):
+    lines = ["[UI]"]
+    for index in (12, 1, 7, 3, 9, 5, 2):
+        lines += [f"Paths\\gamedirs\\{index}\\path=C:/Games/Switch{index}",
+                  f"Paths\\gamedirs\\{index}\\deep_scan={'true' if index == 7 else 'false'}",
+                  f"Paths\\gamedirs\\{index}\\deep_scan\\default=true"]
+    lines += ["Paths\\gamedirs\\size=12", "Paths\\gamedirs\\4\\deep_scan=true"]
+    gamedirs = read_eden_gamedirs(write(tmp_path / "qt-config.ini", "\n".join(lines)))
+
+    assert [entry["index"] for entry in gamedirs] == [1, 2, 3, 5, 7, 9, 12]
+    assert gamedirs[-1] == {"index": 12, "path": "C:/Games/Switch12", "deep_scan": False}
+    assert [entry["index"] for entry in gamedirs if entry["deep_scan"]] == [7]
+
+
+def test_every_dolphin_iso_path_with_the_recursive_flag(tmp_path):
+    paths = "\n".join(f"ISOPath{index} = D:/Wii/{index}" for index in range(12))
+    config = write(tmp_path / "Dolphin.ini", f"[General]\nISOPaths = 12\n{paths}\nISOPath12 = \nRecursiveISOPaths = True\n")
+    iso_paths = read_dolphin_iso_paths(config)
+
+    assert len(iso_paths) == 12
+    assert iso_paths[10] == {"index": 10, "path": "D:/Wii/10", "recursive": True}
+
+
+def test_parsed_config_is_reused_until_the_file_changes(tmp_path):
+    config = write(tmp_path / "Dolphin.ini", "ISOPath0 = D:/Wii\n", mtime=1000)
+    first = read_dolphin_iso_paths(config)
+    assert read_dolphin_iso_paths(config) is first
+
+    write(tmp_path / "Dolphin.ini", "ISOPath0 = E:/Wii\n", mtime=2000)
+    assert read_dolphin_iso_paths(config)[0]["path"] == "E:/Wii"
+
+
+def test_virtual_eden_storages_are_not_folders():
+    assert is_filesystem_path("C:/Games/Switch") and is_filesystem_path("/mnt/roms")
+    assert not is_filesystem_path("SDMC") and not is_filesystem_path("relative/path")
\ No newline at end of file
@@ -0,0 +1,64 @@
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+from library_merge import merge_into_library
+from library_store import load_platform
+
+WRITERS = 6
+MERGES = 10
+
+# One process merging its own games one at a time, like the watcher or the backfill does
+MERGER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from library_merge import merge_into_library
+for i in range(int(sys.argv[4])):
+    delta = {"added": {"D:/roms": [{"filename": f"{sys.argv[3]}-{i}.nsp", "icon_path": None}]}, "changed": {},
+             "removed": {}}
+    merge_into_library(sys.argv[2], "Switch", delta)
+"""
+
+
+def added(name):
+    return {"added": {"D:/roms": [{"filename": name, "icon_path": None}]}, "changed": {}, "removed": {}}
+
+
+@pytest.mark.parametrize("library_name", ["menu_data.json", "library"])
+def test_concurrent_processes_lose_no_merge(tmp_path, library_name):
+    library = str(tmp_path / library_name)
+    writers = [subprocess.Popen([sys.executable, "-c", MERGER, SCRIPTS_DIR, library, f"w{n}", str(MERGES)])
+               for n in range(WRITERS)]
+    for writer in writers:
+        assert writer.wait(timeout=60) == 0
+
+    if library_name == "library":
+        items = load_platform(library, "Switch")["items"]
+    else:
+        with open(library, 'r', encoding='utf-8') as f:
+            items = json.load(f)["Switch"]["items"]
+    assert len(items) == WRITERS * MERGES
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_concurrent_threads_lose_no_merge(tmp_path):
+    library = str(tmp_path / "menu_data.json")
+    start = threading.Barrier(WRITERS)
+
+    def merge(n):
+        start.wait()
+        for i in range(MERGES):
+            merge_into_library(library, "Switch", added(f"t{n}-{i}.nsp"))
+
+    threads = [threading.Thread(target=merge, args=(n,)) for n in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(library, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)["Switch"]["items"]) == WRITERS * MERGES
\ No newline at end of file
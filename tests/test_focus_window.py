@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+from focus_window import FakeWindowBackend, wait_for_window, force_focus, FOUND_AND_FOCUSED, NOT_FOUND, FOCUS_REFUSED
+
+
+def run_focus_window(tmp_path, *args):
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, 'focus_window.py'), *args, "--backend", "fake"]
+    env = dict(os.environ, XMB_SCANNER_LOG=str(tmp_path / "python_scanner.log"))
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=30, env=env)
+    return completed.returncode, json.loads(completed.stdout)
+
+
+def test_window_that_appears_late_is_waited_for():
+    backend = FakeWindowBackend([("yuzu | Mario Kart 8", 0.4)])
+    handle, waited, checks = wait_for_window(backend, "yuzu", timeout=5)
+    assert handle == 1
+    # Checked at 0, 0.05, 0.15 and 0.35s, then woken up when the window appears
+    # rather than at the next backoff step (0.75s) or the deadline
+    assert waited == pytest.approx(0.4)
+    assert checks == 5 and backend.wakeups == 1
+
+
+def test_enumeration_stops_at_the_first_match():
+    backend = FakeWindowBackend([("Dolphin", 0), ("yuzu | A", 0), ("yuzu | B", 0)])
+    handle, _, checks = wait_for_window(backend, "yuzu")
+    assert backend.title(handle) == "yuzu | A" and checks == 1
+
+
+def test_gives_up_at_the_deadline():
+    backend = FakeWindowBackend([("yuzu | Game", 10)])
+    handle, waited, _ = wait_for_window(backend, "yuzu", timeout=0.3)
+    assert handle is None
+    assert waited == pytest.approx(0.3)
+    assert backend.wakeups == 0
+
+
+def test_force_focus_reports_the_outcome():
+    result = force_focus("yuzu", 2, FakeWindowBackend([("yuzu | Game", 0.2)]))
+    assert result["found"] and result["focused"] and result["title"] == "yuzu | Game"
+    assert result["waited_s"] == 0.2
+    assert force_focus("yuzu", 0, FakeWindowBackend([("yuzu | Game", 0)], refuse_focus=True))["focused"] is False
+
+
+def test_exit_codes(tmp_path):
+    code, outcome = run_focus_window(tmp_path, "yuzu", "--wait", "5", "--fake-window", "yuzu | Game=0.3")
+    assert code == FOUND_AND_FOCUSED and outcome["waited_s"] == 0.3
+
+    code, outcome = run_focus_window(tmp_path, "yuzu", "--wait", "0.2", "--fake-window", "yuzu | Game=5")
+    assert code == NOT_FOUND and outcome["found"] is False and outcome["waited_s"] == 0.2
+
+    code, outcome = run_focus_window(tmp_path, "yuzu", "--fake-window", "yuzu | Game", "--fake-refuse-focus")
+    assert code == FOCUS_REFUSED and outcome["found"] and not outcome["focused"]
\ No newline at end of file
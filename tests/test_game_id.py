@@ -0,0 +1,76 @@
+import struct
+
+from game_id import (WII_MAGIC, GAMECUBE_MAGIC, identify_game, identify_games, identify_ps3_game,
+                     parse_disc_header)
+
+
+def disc_header(disc_id, title, magic_offset=0x18, magic=WII_MAGIC):
+    header = bytearray(0x400)
+    header[0:6] = disc_id
+    struct.pack_into(">I", header, magic_offset, magic)
+    header[0x20:0x20 + len(title)] = title
+    return bytes(header)
+
+
+def test_plain_wii_and_gamecube_images(tmp_path):
+    (tmp_path / "brawl.iso").write_bytes(disc_header(b"RSBE01", b"Super Smash Bros. Brawl") + b"\0" * 4096)
+    (tmp_path / "melee.gcm").write_bytes(disc_header(b"GALE01", b"Super Smash Bros. Melee", 0x1C, GAMECUBE_MAGIC))
+    assert identify_game(str(tmp_path / "brawl.iso")) == {
+        "key": "wii:RSBE01", "platform": "wii", "id": "RSBE01", "title": "Super Smash Bros. Brawl"}
+    assert identify_game(str(tmp_path / "melee.gcm"))["key"] == "gamecube:GALE01"
+
+
+def test_disc_header_needs_a_magic_and_a_valid_id():
+    assert parse_disc_header(disc_header(b"RSBE01", b"Brawl", magic=0)) is None
+    assert parse_disc_header(disc_header(b"rsbe01", b"Brawl")) is None
+    assert parse_disc_header(b"RSBE01") is None
+
+
+def test_wbfs_disc_header_is_in_the_second_sector(tmp_path):
+    for shift in (9, 12):
+        sector_size = 1 << shift
+        container = bytearray(sector_size)
+        container[0:4] = b"WBFS"
+        struct.pack_into(">I", container, 4, 1234)
+        container[8] = shift
+        if sector_size > 0x200:
+            # Only found by a parser that ignores the sector size
+            container[0x200:0x600] = disc_header(b"RSBE01", b"Decoy")
+        path = tmp_path / f"game{shift}.wbfs"
+        path.write_bytes(bytes(container) + disc_header(b"RMCP01", b"Mario Kart Wii"))
+        assert identify_game(str(path))["id"] == "RMCP01"
+
+
+def test_rvz_copies_the_disc_header_at_0x58(tmp_path):
+    header = bytearray(0x400)
+    header[0:4] = b"RVZ\x01"
+    header[0x58:0x58 + 0x80] = disc_header(b"SOUE01", b"The Legend of Zelda: Skyward Sword")[:0x80]
+    (tmp_path / "zelda.rvz").write_bytes(bytes(header))
+    identity = identify_game(str(tmp_path / "zelda.rvz"))
+    assert identity["key"] == "wii:SOUE01"
+    # Only the first 0x80 bytes of the disc header are copied, so long titles come back cut
+    assert identity["title"] == "The Legend of Zelda: Skyward Sword"[:0x60]
+
+
+def test_switch_title_id_from_the_name_or_the_nsp_ticket(tmp_path):
+    named = tmp_path / "Mario Kart 8 [010075100E8EC000][v0].xci"
+    named.write_bytes(b"\0" * 16)
+    names = b"010075100e8ec0000000000000000000.tik\0game.nca\0"
+    nsp = struct.pack("<4sII4x", b"PFS0", 2, len(names)) + b"\0" * (2 * 0x18) + names
+    (tmp_path / "mk8.nsp").write_bytes(nsp)
+    (tmp_path / "unknown.xci").write_bytes(b"\0" * 16)
+    identities = identify_games({name: str(tmp_path / name) for name in (named.name, "mk8.nsp", "unknown.xci")})
+    assert identities[named.name]["key"] == "switch:010075100E8EC000"
+    assert identities["mk8.nsp"]["id"] == "010075100E8EC000"
+    assert identities["unknown.xci"] is None
+
+
+def test_ps3_serial_from_games_yml_or_the_folder_name():
+    assert identify_ps3_game("BLES01961")["key"] == "ps3:BLES01961"
+    assert identify_ps3_game("NPUB30024")["key"] == "ps3:NPUB30024"
+    assert identify_ps3_game("not-a-serial", "F:/ps3/Game [BLUS30443]/")["id"] == "BLUS30443"
+    assert identify_ps3_game("not-a-serial", "F:/ps3/Game") is None
+
+
+def test_unreadable_file_is_not_identified(tmp_path):
+    assert identify_game(str(tmp_path / "missing.iso")) is None
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+import icon_pipeline
+from icon_pipeline import add_tile_paths, build_atlas, make_tiles
+
+
+@pytest.fixture(autouse=True)
+def tile_dir(tmp_path, monkeypatch):
+    tile_dir = str(tmp_path / "tiles")
+    monkeypatch.setattr(icon_pipeline, "TILE_DIR", tile_dir)
+    return tile_dir
+
+
+def icon(path, size, color=(255, 0, 0, 255)):
+    Image.new("RGBA", size, color).save(path)
+    return str(path)
+
+
+def test_icons_are_fitted_into_centred_tiles(tmp_path):
+    wide = icon(tmp_path / "wide.png", (400, 200))
+    tiles = make_tiles([wide, wide, None], size=100)
+    assert list(tiles) == [wide]
+    with Image.open(tiles[wide]) as tile:
+        assert tile.size == (100, 100)
+        # 100x50 in the middle, transparent above and below
+        assert tile.getpixel((50, 10))[3] == 0 and tile.getpixel((50, 50)) == (255, 0, 0, 255)
+
+
+def test_fresh_tiles_are_reused_and_stale_ones_rebuilt(tmp_path):
+    path = icon(tmp_path / "game.png", (256, 256))
+    tile_path = make_tiles([path])[path]
+    os.utime(tile_path, (2000, 2000))
+    os.utime(path, (1000, 1000))
+    assert make_tiles([path])[path] == tile_path and os.path.getmtime(tile_path) == 2000
+
+    os.utime(path, (3000, 3000))
+    make_tiles([path])
+    assert os.path.getmtime(tile_path) > 2000
+
+
+def test_broken_icon_keeps_its_record_without_a_tile(tmp_path):
+    good = icon(tmp_path / "good.png", (64, 64))
+    (tmp_path / "broken.png").write_bytes(b"not a png")
+    records = [{"icon_path": good}, {"icon_path": str(tmp_path / "broken.png"), "icon_tile_path": "old.png"},
+               {"icon_path": None}]
+    add_tile_paths(records, fmt="webp")
+    assert records[0]["icon_tile_path"].endswith("/100/good.webp")
+    assert "icon_tile_path" not in records[1] and "icon_tile_path" not in records[2]
+
+
+def test_atlas_index_places_every_tile(tmp_path):
+    paths = [icon(tmp_path / f"{name}.png", (100, 100)) for name in "abcde"]
+    tiles = make_tiles(paths)
+    index_path = build_atlas(list(tiles.values()), str(tmp_path / "atlas.png"))
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    # Five tiles fill a 3x2 grid
+    assert index["icons"]["e.png"] == [100, 100, 100, 100]
+    with Image.open(tmp_path / "atlas.png") as atlas:
+        assert atlas.size == (300, 200)
\ No newline at end of file
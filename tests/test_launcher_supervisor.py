@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+from launcher_supervisor import LauncherSupervisor, NOT_AUTHORIZED, LAUNCH_FAILED, read_emulator_paths
+from scanner_daemon import INVALID_PARAMS
+
+FAKE_EMULATOR = os.path.join(SCRIPTS_DIR, 'bench', 'fake_emulator.py')
+# The fake emulator is a Python script, so it is started through the interpreter running the tests
+TEMPLATES = {"Switch": [sys.executable, "{emulator}", "-f", "-g", "{game_path}"]}
+
+
+def write_emulator_config(path, **executables):
+    lines = ["[paths]", ""]
+    for platform, executable in executables.items():
+        lines.append(f'"{platform}_EXEC"={json.dumps(executable)}')
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+class Notifications:
+    def __init__(self):
+        self.messages = []
+        self.changed = threading.Condition()
+
+    def __call__(self, method, params):
+        with self.changed:
+            self.messages.append((method, params))
+            self.changed.notify_all()
+
+    def wait_for(self, method, timeout=10):
+        with self.changed:
+            self.changed.wait_for(lambda: any(m == method for m, _ in self.messages), timeout)
+        return [params for m, params in self.messages if m == method]
+
+
+@pytest.fixture
+def fake_emulator(tmp_path, monkeypatch):
+    """Settings for bench/fake_emulator.py: how long it runs and its exit code; it logs its arguments."""
+    log_path = tmp_path / "fake_emulator.log"
+    monkeypatch.setenv("FAKE_EMULATOR_LOG", str(log_path))
+    monkeypatch.setenv("FAKE_EMULATOR_SECONDS", "0.2")
+    monkeypatch.setenv("FAKE_EMULATOR_EXIT_CODE", "0")
+    return log_path
+
+
+def launch(supervisor, **params):
+    return supervisor.handle({"jsonrpc": "2.0", "id": 1, "method": "launch", "params": params})
+
+
+def test_launch_reports_start_and_exit(tmp_path, fake_emulator):
+    notifications = Notifications()
+    supervisor = LauncherSupervisor(TEMPLATES, notifications,
+                                    write_emulator_config(tmp_path / "emu.cfg", Switch=FAKE_EMULATOR))
+    result = launch(supervisor, platform="Switch", game_path="/games/zelda.nsp", requested_at=time.time())["result"]
+    assert result["command"] == [sys.executable, FAKE_EMULATOR, "-f", "-g", "/games/zelda.nsp"]
+    assert result["start_ms"] >= 0 and result["request_ms"] >= result["start_ms"]
+    assert [launch["pid"] for launch in supervisor.list_running()] == [result["pid"]]
+
+    started = notifications.wait_for("launch.started")
+    assert started[0]["pid"] == result["pid"]
+    exited = notifications.wait_for("launch.exited")
+    assert exited[0]["exit_code"] == 0 and exited[0]["runtime_s"] >= 0.2
+    assert supervisor.list_running() == []
+    assert json.loads(fake_emulator.read_text())["argv"] == ["-f", "-g", "/games/zelda.nsp"]
+
+
+def test_crash_is_reported_with_its_exit_code(tmp_path, fake_emulator, monkeypatch):
+    monkeypatch.setenv("FAKE_EMULATOR_EXIT_CODE", "3")
+    notifications = Notifications()
+    supervisor = LauncherSupervisor(TEMPLATES, notifications,
+                                    write_emulator_config(tmp_path / "emu.cfg", Switch=FAKE_EMULATOR))
+    launch(supervisor, platform="Switch", game_path="/games/zelda.nsp")
+    assert notifications.wait_for("launch.exited")[0]["exit_code"] == 3
+
+
+def test_stop_terminates_the_emulator(tmp_path, fake_emulator, monkeypatch):
+    monkeypatch.setenv("FAKE_EMULATOR_SECONDS", "30")
+    notifications = Notifications()
+    supervisor = LauncherSupervisor(TEMPLATES, notifications,
+                                    write_emulator_config(tmp_path / "emu.cfg", Switch=FAKE_EMULATOR))
+    launch_id = launch(supervisor, platform="Switch", game_path="/games/zelda.nsp")["result"]["launch_id"]
+    assert supervisor.stop(launch_id) is True
+    assert notifications.wait_for("launch.exited")[0]["exit_code"] != 0
+    assert supervisor.stop(launch_id) is False
+
+
+def test_emulator_comes_from_the_settings_not_the_request(tmp_path, fake_emulator):
+    supervisor = LauncherSupervisor(TEMPLATES, Notifications(), write_emulator_config(tmp_path / "emu.cfg"))
+    # Not configured: nothing is started
+    assert launch(supervisor, platform="Switch", game_path="/g.nsp")["error"]["code"] == LAUNCH_FAILED
+    # A client can't name the executable
+    assert launch(supervisor, platform="Switch", game_path="/g.nsp", emulator="/bin/sh")["error"]["code"] \
+        == INVALID_PARAMS
+    assert launch(supervisor, platform="Amiga", game_path="/g.adf")["error"]["code"] == INVALID_PARAMS
+    assert not fake_emulator.exists()
+
+
+def test_reads_godot_config_file(tmp_path):
+    config = tmp_path / "emulator_paths.cfg"
+    config.write_text('[other]\n\nWii_EXEC="/nope"\n\n[paths]\n\nSwitch="/roms"\nSwitch_EXEC="C:/Eden/eden.exe"\n'
+                      '"Playstation 3_EXEC"="C:/RPCS3/rpcs3.exe"\npython_executable_path="python"\n')
+    assert read_emulator_paths(str(config)) == {"Switch": "C:/Eden/eden.exe", "Playstation 3": "C:/RPCS3/rpcs3.exe"}
+    assert read_emulator_paths(str(tmp_path / "missing.cfg")) == {}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def tcp_supervisor(tmp_path, fake_emulator, monkeypatch):
+    monkeypatch.setenv("XMB_SCANNER_LOG", str(tmp_path / "python_scanner.log"))
+    token_path = tmp_path / "token"
+    token_path.write_text("s3cret")
+    port = free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, 'launcher_supervisor.py'),
+                                "--port", str(port), "--token-file", str(token_path), "--emulator-config",
+                                write_emulator_config(tmp_path / "emu.cfg", Switch=FAKE_EMULATOR)])
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            assert time.monotonic() < deadline, "launcher supervisor did not start"
+            time.sleep(0.05)
+    yield port
+    process.kill()
+    process.wait()
+
+
+def connect(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=10)
+    return sock, sock.makefile('rwb')
+
+
+def call(stream, method, params=None, request_id=1):
+    stream.write((json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}) + "\n")
+                 .encode())
+    stream.flush()
+
+
+def read_until_response(stream):
+    while True:
+        message = json.loads(stream.readline())
+        if "method" not in message:
+            return message
+
+
+def test_tcp_client_must_authenticate(tcp_supervisor, fake_emulator):
+    sock, stream = connect(tcp_supervisor)
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "launch",
+                       "params": {"platform": "Switch", "game_path": "/g.nsp"}})
+    # What a web page's no-cors POST looks like on the wire
+    stream.write(f"POST / HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: text/plain\r\n\r\n{body}\n".encode())
+    stream.flush()
+    assert json.loads(stream.readline())["error"]["code"] == NOT_AUTHORIZED
+    assert stream.readline() == b""
+    sock.close()
+
+    sock, stream = connect(tcp_supervisor)
+    call(stream, "auth", {"token": "wrong"})
+    assert json.loads(stream.readline())["error"]["code"] == NOT_AUTHORIZED
+    sock.close()
+    time.sleep(0.5)
+    assert not fake_emulator.exists()
+
+
+def test_tcp_launch_after_auth(tcp_supervisor, fake_emulator):
+    sock, stream = connect(tcp_supervisor)
+    call(stream, "auth", {"token": "s3cret"})
+    assert read_until_response(stream)["result"] is True
+    call(stream, "launch", {"platform": "Switch", "game_path": "/g.nsp"}, 2)
+    result = read_until_response(stream)["result"]
+    while True:
+        message = json.loads(stream.readline())
+        if message.get("method") == "launch.exited":
+            break
+    assert message["params"]["pid"] == result["pid"] and message["params"]["exit_code"] == 0
+    sock.close()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import json
+import os
+
+from library_store import load_platform, write_platform
+
+
+def items(*entries):
+    return [{"name": path.rsplit('/', 1)[-1], "path": path, "icon_path": icon} for path, icon in entries]
+
+
+def test_round_trip_keeps_order_and_icon_paths(tmp_path):
+    """Games from two roots interleaved by a delta merge, plus icons outside the common icon folder."""
+    games = items(("D:/a/A.nsp", "C:/m/icon/A.png"), ("D:/b/B.nsp", "C:/m/icon/B.png"),
+                  ("D:/a/C.nsp", "rel.png"), ("D:/b/D.nsp", "E:/other/D.png"), ("D:/a/E.nsp", None))
+    section = {"icon_path": "switch.png", "items": games}
+    write_platform(str(tmp_path), "Switch", section)
+
+    loaded = load_platform(str(tmp_path), "Switch")
+
+    assert loaded["items"] == games
+    assert loaded["icon_path"] == "switch.png"
+
+
+def test_unchanged_shard_is_not_rewritten(tmp_path):
+    games = items(("D:/a/A.nsp", "C:/m/icon/A.png"), ("D:/b/B.nsp", "C:/m/icon/B.png"))
+    index = write_platform(str(tmp_path), "Switch", {"items": games})
+    for shard in index["platforms"]["Switch"]["shards"]:
+        os.utime(tmp_path / shard["file"], (1, 1))
+
+    games.append({"name": "F.nsp", "path": "D:/b/F.nsp", "icon_path": "C:/m/icon/F.png"})
+    index = write_platform(str(tmp_path), "Switch", {"items": games})
+
+    mtimes = {shard["root"]: shard["mtime"] for shard in index["platforms"]["Switch"]["shards"]}
+    assert mtimes["D:/a/"] == 1
+    assert mtimes["D:/b/"] != 1
+    assert load_platform(str(tmp_path), "Switch")["items"] == games
+
+
+def test_version_1_shards_still_load(tmp_path):
+    shard = {"platform": "Wii", "root": "F:/wii/", "icon_dir": "C:/m/icon/",
+             "items": [{"name": "MKW", "path": "mkw.rvz", "icon_path": "mkw.png"}]}
+    (tmp_path / "wii.json").write_text(json.dumps(shard), encoding='utf-8')
+    index = {"version": 1, "platforms": {"Wii": {"section": {}, "shards": [{"file": "wii.json"}]}}}
+    (tmp_path / "index.json").write_text(json.dumps(index), encoding='utf-8')
+
+    assert load_platform(str(tmp_path), "Wii")["items"] == [
+        {"name": "MKW", "path": "F:/wii/mkw.rvz", "icon_path": "C:/m/icon/mkw.png"}]
\ No newline at end of file
@@ -0,0 +1,87 @@
+import struct
+
+import pytest
+
+import artwork
+import local_artwork
+from game_id import GAMECUBE_MAGIC
+from local_artwork import SFO_FORMAT_INT32, read_param_sfo, ps3_local_info, harvest_local_files
+
+
+@pytest.fixture(autouse=True)
+def icon_dir(tmp_path, monkeypatch):
+    icon_dir = str(tmp_path / "icon")
+    monkeypatch.setattr(artwork, "ICON_SAVE_DIR", icon_dir)
+    monkeypatch.setattr(local_artwork, "ICON_SAVE_DIR", icon_dir)
+    return icon_dir
+
+
+def param_sfo(entries):
+    """Builds a PARAM.SFO from {key: str or int}."""
+    keys, data, index = b"", b"", b""
+    for key, value in entries.items():
+        if isinstance(value, int):
+            fmt, raw = SFO_FORMAT_INT32, struct.pack("<I", value)
+        else:
+            fmt, raw = 0x0204, value.encode("utf-8") + b"\0"
+        index += struct.pack("<HHIII", len(keys), fmt, len(raw), len(raw), len(data))
+        keys += key.encode("ascii") + b"\0"
+        data += raw
+    key_table = 0x14 + len(index)
+    data_table = key_table + len(keys)
+    return struct.pack("<4sIIII", b"\0PSF", 0x101, key_table, data_table, len(entries)) + index + keys + data
+
+
+def test_param_sfo_strings_and_integers(tmp_path):
+    (tmp_path / "PARAM.SFO").write_bytes(param_sfo({"TITLE": "Demon's Souls", "TITLE_ID": "BLUS30443",
+                                                    "PARENTAL_LEVEL": 5}))
+    assert read_param_sfo(str(tmp_path / "PARAM.SFO")) == {"TITLE": "Demon's Souls", "TITLE_ID": "BLUS30443",
+                                                           "PARENTAL_LEVEL": 5}
+    (tmp_path / "bad.SFO").write_bytes(b"\0PSX" + b"\0" * 16)
+    assert read_param_sfo(str(tmp_path / "bad.SFO")) is None
+    assert read_param_sfo(str(tmp_path / "missing.SFO")) is None
+
+
+@pytest.mark.parametrize("layout", ["PS3_GAME", ""])
+def test_ps3_folder_title_and_icon(tmp_path, icon_dir, layout):
+    folder = tmp_path / "game" / layout if layout else tmp_path / "game"
+    folder.mkdir(parents=True)
+    (folder / "PARAM.SFO").write_bytes(param_sfo({"TITLE": "Ratchet & Clank\nA Crack in Time"}))
+    (folder / "ICON0.PNG").write_bytes(b"\x89PNG icon")
+    title, icon_path = ps3_local_info(str(tmp_path / "game"), "BLUS30352")
+    assert title == "Ratchet & Clank A Crack in Time"
+    assert icon_path == f"{icon_dir}/BLUS30352.png".replace('\\', '/')
+    assert open(icon_path, 'rb').read() == b"\x89PNG icon"
+
+
+def gamecube_image(long_name, region=b"E"):
+    """A GameCube image holding just a disc header, an FST and opening.bnr."""
+    image = bytearray(0x2000)
+    image[0:6] = b"GAL" + region + b"01"
+    struct.pack_into(">I", image, 0x1C, GAMECUBE_MAGIC)
+    fst_offset, banner_offset = 0x500, 0x600
+    fst = struct.pack(">III", 0x01000000, 0, 2) + struct.pack(">III", 0, banner_offset, 0x1960) + b"opening.bnr\0"
+    struct.pack_into(">II", image, 0x424, fst_offset, len(fst))
+    image[fst_offset:fst_offset + len(fst)] = fst
+    banner = bytearray(0x1960)
+    banner[0:4] = b"BNR1"
+    banner[0x20:0x1820] = b"\xff\xff" * (96 * 32) # opaque white
+    banner[0x1820:0x1820 + 5] = b"Melee"
+    banner[0x1860:0x1860 + len(long_name)] = long_name
+    image[banner_offset:banner_offset + len(banner)] = banner
+    return bytes(image)
+
+
+def test_gamecube_banner_is_harvested(tmp_path, icon_dir):
+    (tmp_path / "melee.iso").write_bytes(gamecube_image(b"Super Smash Bros.  Melee"))
+    (tmp_path / "brawl.iso").write_bytes(b"\0" * 0x2000)
+    paths = {name: str(tmp_path / name) for name in ("melee.iso", "brawl.iso")}
+    identities = {"melee.iso": {"platform": "gamecube"}, "brawl.iso": {"platform": "wii"}}
+    found = harvest_local_files(paths, identities, lambda name: name[:-4])
+
+    title, icon_path = found["melee.iso"]
+    assert set(found) == {"melee.iso"}
+    assert title == "Super Smash Bros. Melee"
+    with open(icon_path, 'rb') as f:
+        png = f.read()
+    assert png.startswith(b"\x89PNG\r\n\x1a\n") and struct.unpack(">II", png[16:24]) == (96, 32)
\ No newline at end of file
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+pytest.importorskip("yaml")
+
+import read_config_ps3
+from read_config_ps3 import find_games_from_yml
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    """Runs an incremental PS3 scan of tmp_path/config/games.yml, without artwork lookups."""
+    monkeypatch.setattr(read_config_ps3, "fetch_artwork_batch",
+                        lambda names, **kwargs: {name: None for name in names})
+    monkeypatch.setattr(read_config_ps3, "title_for", lambda game_id: None)
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    output_file = str(tmp_path / "out" / "gamedir_contents_ps3.json")
+
+    def run(games):
+        if games is not None:
+            (config_dir / "games.yml").write_text("".join(f"{game_id}: {path}\n" for game_id, path in games.items()),
+                                                  encoding='utf-8')
+        data = find_games_from_yml(str(config_dir), "games.yml", output_file)
+        return sorted(game["id"] for records in data.values() for game in records)
+
+    return run
+
+
+def test_game_whose_folder_comes_back_is_found_without_touching_games_yml(tmp_path, scan):
+    (tmp_path / "games" / "A").mkdir(parents=True)
+    games = {"BLES00001": (tmp_path / "games" / "A").as_posix(), "BLES00002": (tmp_path / "games" / "B").as_posix()}
+    assert scan(games) == ["BLES00001"]
+
+    # The drive holding B is plugged back in; games.yml itself is left alone
+    yml_mtime = os.stat(tmp_path / "config" / "games.yml").st_mtime
+    (tmp_path / "games" / "B").mkdir()
+    assert os.stat(tmp_path / "config" / "games.yml").st_mtime == yml_mtime
+
+    assert scan(None) == ["BLES00001", "BLES00002"]
+
+
+def test_game_whose_folder_goes_away_is_dropped(tmp_path, scan):
+    for name in ("A", "B"):
+        (tmp_path / "games" / name).mkdir(parents=True)
+    games = {"BLES00001": (tmp_path / "games" / "A").as_posix(), "BLES00002": (tmp_path / "games" / "B").as_posix()}
+    assert scan(games) == ["BLES00001", "BLES00002"]
+
+    os.rmdir(tmp_path / "games" / "B")
+    assert scan(None) == ["BLES00001"]
\ No newline at end of file
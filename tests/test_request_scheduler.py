@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+import requests
+
+import request_scheduler
+from request_scheduler import RequestScheduler, TokenBucket, BudgetExceeded, retry_after_seconds
+from conftest import SCRIPTS_DIR
+
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, 'bench'))
+from sgdb_stub import start_stub, stub_url  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server = start_stub(latency_ms=0, **options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def search(scheduler, server, term="Zelda"):
+    return scheduler.get(f"{stub_url(server)}/search/autocomplete/{term}")
+
+
+def test_token_bucket_paces_requests(stub):
+    server = stub()
+    scheduler = RequestScheduler(requests.Session(), bucket=TokenBucket(rate=10, burst=1), budget=0)
+    start = time.monotonic()
+    for _ in range(5):
+        assert search(scheduler, server).status_code == 200
+    # The first request uses the burst, the other four wait 0.1s each
+    assert time.monotonic() - start >= 0.38
+    assert server.counts["total"] == 5
+
+
+def test_burst_is_not_delayed():
+    bucket = TokenBucket(rate=1, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_retry_after_is_honoured(stub):
+    server = stub(throttle_every=2)
+    bucket = TokenBucket(rate=0)
+    scheduler = RequestScheduler(requests.Session(), bucket=bucket, budget=0)
+    assert search(scheduler, server).status_code == 200
+
+    start = time.monotonic()
+    # The second request is answered with a 429 and Retry-After: 1
+    assert search(scheduler, server).status_code == 200
+    assert time.monotonic() - start >= 0.95
+    assert scheduler.retried == 1
+    assert server.counts["throttled"] == 1
+
+
+def test_429_pauses_every_worker(stub):
+    server = stub(throttle_every=2)
+    bucket = TokenBucket(rate=100, burst=1)
+    throttled = RequestScheduler(requests.Session(), bucket=bucket, budget=0)
+    other = RequestScheduler(requests.Session(), bucket=bucket, budget=0)
+    assert search(throttled, server).status_code == 200
+
+    worker = threading.Thread(target=search, args=(throttled, server))
+    worker.start()
+    while not server.counts.get("throttled"):
+        time.sleep(0.01)
+    time.sleep(0.05)
+    # A scheduler that was never throttled itself waits out the pause too
+    assert bucket.remaining_pause() > 0.5
+    start = time.monotonic()
+    assert search(other, server).status_code == 200
+    assert time.monotonic() - start >= 0.5
+    worker.join()
+
+
+def test_server_errors_back_off_exponentially(stub, monkeypatch):
+    server = stub(error_every=1)
+    delays = []
+
+    def recording_backoff(attempt, base=request_scheduler.BACKOFF_BASE, cap=request_scheduler.BACKOFF_MAX):
+        delays.append((attempt, min(cap, base * (2 ** attempt))))
+        return 0.01
+
+    monkeypatch.setattr(request_scheduler, "backoff_delay", recording_backoff)
+    scheduler = RequestScheduler(requests.Session(), bucket=TokenBucket(rate=0), budget=0, max_retries=3)
+    response = search(scheduler, server)
+    # Gives up after the retries and hands back the last answer
+    assert response.status_code == 503
+    assert [attempt for attempt, _ in delays] == [0, 1, 2]
+    assert [cap for _, cap in delays] == [0.5, 1.0, 2.0]
+    assert server.counts["total"] == 4
+
+
+def test_transient_error_is_retried(stub, monkeypatch):
+    server = stub(error_every=2)
+    monkeypatch.setattr(request_scheduler, "backoff_delay", lambda attempt: 0.01)
+    scheduler = RequestScheduler(requests.Session(), bucket=TokenBucket(rate=0), budget=0)
+    assert search(scheduler, server).status_code == 200
+    assert search(scheduler, server).status_code == 200
+    assert scheduler.retried == 1
+
+
+def test_budget_stops_the_scan(stub):
+    server = stub()
+    scheduler = RequestScheduler(requests.Session(), bucket=TokenBucket(rate=0), budget=3)
+    for _ in range(3):
+        assert search(scheduler, server).status_code == 200
+    with pytest.raises(BudgetExceeded):
+        search(scheduler, server)
+    with pytest.raises(BudgetExceeded):
+        search(scheduler, server)
+    assert server.counts["total"] == 3
+    assert scheduler.refused == 2
+
+
+def test_retries_count_against_the_budget(stub, monkeypatch):
+    server = stub(error_every=1)
+    monkeypatch.setattr(request_scheduler, "backoff_delay", lambda attempt: 0.01)
+    scheduler = RequestScheduler(requests.Session(), bucket=TokenBucket(rate=0), budget=2, max_retries=5)
+    with pytest.raises(BudgetExceeded):
+        search(scheduler, server)
+    assert server.counts["total"] == 2
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("-1") == 0.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
\ No newline at end of file
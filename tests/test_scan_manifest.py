@@ -0,0 +1,92 @@
+import os
+from functools import partial
+
+import pytest
+
+import scan_manifest
+from dedup import FingerprintCache
+from library_merge import merge_items, normalize_scan_output
+from scan_manifest import ScanManifest, incremental_file_scan, list_game_directories
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    """Runs a delta scan over the given roots like read_config_switch.py does, headers read from the file contents."""
+    cache = FingerprintCache(str(tmp_path / "fingerprints.sqlite3"))
+    monkeypatch.setattr(scan_manifest, "find_duplicates", partial(scan_manifest.find_duplicates, cache=cache))
+
+    def identify(paths):
+        identities = {}
+        for key, path in paths.items():
+            with open(path, 'r', encoding='utf-8') as f:
+                game_id = f.read().split()[0]
+            identities[key] = {"id": game_id, "title": f"Title {game_id}", "key": game_id, "platform": "switch"}
+        return identities
+
+    monkeypatch.setattr(scan_manifest, "identify_games", identify)
+    manifest_path = str(tmp_path / "out.manifest.json")
+    fetched = []
+
+    def fetch_artwork(names, on_result=None, identities=None):
+        fetched.append((sorted(names), identities))
+        return {name: None for name in names}
+
+    def run(*roots):
+        manifest = ScanManifest(manifest_path)
+        listings = list_game_directories(manifest, [(str(root), 0) for root in roots], (".nsp",))
+        contents, delta = incremental_file_scan(manifest, listings, fetch_artwork, dedup="quick")
+        manifest.save()
+        return contents, delta
+
+    run.fetched = fetched
+    yield run
+    cache.close()
+
+
+def write_game(path, game_id):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{game_id} " + "x" * 4096)
+
+
+def test_same_name_in_two_roots_keeps_both_identities(tmp_path, scan):
+    write_game(tmp_path / "a" / "Game.nsp", "0100A")
+    write_game(tmp_path / "b" / "Game.nsp", "0100BB")
+
+    contents, _ = scan(tmp_path / "a", tmp_path / "b")
+    assert contents[(tmp_path / "a").as_posix()][0]["id"] == "0100A"
+    assert contents[(tmp_path / "b").as_posix()][0]["id"] == "0100BB"
+    # Both share one icon file, so the name is looked up once
+    assert scan.fetched[0][0] == ["Game.nsp"]
+
+
+def test_copy_is_promoted_when_the_kept_one_goes_away(tmp_path, scan):
+    a, b = tmp_path / "a", tmp_path / "b"
+    write_game(a / "Game1.nsp", "0100A")
+    write_game(b / "Game1copy.nsp", "0100A")
+
+    contents, delta = scan(a, b)
+    assert contents[a.as_posix()][0]["alternate_paths"] == [(b / "Game1copy.nsp").as_posix()]
+    assert list(delta["added"]) == [a.as_posix()] and delta["changed"] == {}
+    library = merge_items([], normalize_scan_output(contents))
+
+    os.remove(a / "Game1.nsp")
+    contents, delta = scan(a, b)
+    assert delta["removed"] == {a.as_posix(): ["Game1.nsp"]}
+    assert [record["filename"] for record in delta["added"][b.as_posix()]] == ["Game1copy.nsp"]
+    library = merge_items(library, delta, delta=True)
+    assert [item["path"] for item in library] == [(b / "Game1copy.nsp").as_posix()]
+
+
+def test_new_copy_changes_the_kept_one(tmp_path, scan):
+    a, b = tmp_path / "a", tmp_path / "b"
+    write_game(a / "Game1.nsp", "0100A")
+    scan(a, b)
+
+    write_game(b / "Game1copy.nsp", "0100A")
+    _, delta = scan(a, b)
+    assert delta["added"] == {}
+    assert delta["changed"][a.as_posix()][0]["alternate_paths"] == [(b / "Game1copy.nsp").as_posix()]
+
+    os.remove(b / "Game1copy.nsp")
+    _, delta = scan(a, b)
+    assert "alternate_paths" not in delta["changed"][a.as_posix()][0]
\ No newline at end of file
@@ -0,0 +1,45 @@
+import threading
+
+import scan_metrics
+from scan_metrics import ScanMetrics, run_scan
+
+
+def test_concurrent_scans_keep_their_own_metrics():
+    both_started = threading.Barrier(2)
+    metrics = {"Wii": ScanMetrics("Wii"), "Switch": ScanMetrics("Switch")}
+
+    def scan(platform, files):
+        def run():
+            both_started.wait()
+            with scan_metrics.phase("listing"):
+                scan_metrics.count("files.listed", files)
+            both_started.wait()
+            scan_metrics.count("files.listed", files)
+        run_scan(platform, '-', run, metrics=metrics[platform])
+
+    threads = [threading.Thread(target=scan, args=("Wii", 3)), threading.Thread(target=scan, args=("Switch", 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics["Wii"].counters == {"files.listed": 6}
+    assert metrics["Switch"].counters == {"files.listed": 10}
+    assert set(metrics["Wii"].phases) == {"listing"}
+
+
+def test_bound_worker_threads_record_into_their_scan():
+    metrics = ScanMetrics("Wii")
+
+    def run():
+        workers = [threading.Thread(target=scan_metrics.bind(scan_metrics.count), args=("artwork.api_calls",))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    outside = scan_metrics.current().counters.get("artwork.api_calls", 0)
+    run_scan("Wii", '-', run, metrics=metrics)
+    assert metrics.counters == {"artwork.api_calls": 4}
+    assert scan_metrics.current().counters.get("artwork.api_calls", 0) == outside
\ No newline at end of file
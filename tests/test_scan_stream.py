@@ -0,0 +1,51 @@
+import json
+
+import read_config_switch
+from scan_stream import ScanStream, ndjson_path_for, open_ndjson_stream
+
+
+def test_records_carry_type_platform_and_key():
+    records = []
+    stream = ScanStream("Wii", records.append)
+    stream.game("F:/wii", {"filename": "a.rvz", "icon_path": None})
+    stream.artwork("F:/wii", {"filename": "a.rvz"}, "C:/icons/a.png")
+    stream.removed("F:/wii", {"filename": "old.iso"})
+    stream.duplicate("D:/dl", {"filename": "a.rvz"}, {"root": "F:/wii", "filename": "a.rvz"})
+    stream.done()
+
+    assert records == [
+        {"type": "game", "platform": "Wii", "root": "F:/wii", "game": {"filename": "a.rvz", "icon_path": None}},
+        {"type": "artwork", "platform": "Wii", "root": "F:/wii", "key": {"filename": "a.rvz"},
+         "icon_path": "C:/icons/a.png"},
+        {"type": "removed", "platform": "Wii", "root": "F:/wii", "key": {"filename": "old.iso"}},
+        {"type": "duplicate", "platform": "Wii", "root": "D:/dl", "key": {"filename": "a.rvz"},
+         "of": {"root": "F:/wii", "filename": "a.rvz"}},
+        {"type": "done", "platform": "Wii", "count": 1},
+    ]
+
+
+def test_stream_goes_next_to_the_output_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(read_config_switch, "fetch_artwork_batch", lambda names, **kwargs: {n: None for n in names})
+    roms = tmp_path / "roms"
+    roms.mkdir()
+    (roms / "Game.nsp").write_bytes(b"not a real header")
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "qt-config.ini").write_text(
+        f"[UI]\nPaths\\gamedirs\\1\\path={roms.as_posix()}\nPaths\\gamedirs\\size=1\n", encoding='utf-8')
+    output_file = str(tmp_path / "out" / "gamedir_contents_switch.json")
+
+    stream, close = open_ndjson_stream("Switch", output_file)
+    try:
+        read_config_switch.find_game_paths_from_config(str(config_dir), "qt-config.ini", output_file, stream=stream,
+                                                       dedup="off")
+    finally:
+        close()
+
+    with open(ndjson_path_for(output_file), 'r', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["type"] for line in lines] == ["game", "done"]
+    assert lines[0]["game"]["filename"] == "Game.nsp"
+    # The output file is still the JSON document the backfill and the library merge read
+    with open(output_file, 'r', encoding='utf-8') as f:
+        assert [record["filename"] for record in json.load(f)[roms.as_posix()]] == ["Game.nsp"]
\ No newline at end of file
@@ -0,0 +1,35 @@
+import os
+
+import scan_watch
+from scan_manifest import ScanManifest, incremental_file_scan, list_game_directories
+from scan_watch import PollBackend
+
+
+def scan_once(root, output_file):
+    """A Switch scan of root that only leaves its manifest behind, like the watcher's first rescan."""
+    manifest = ScanManifest(str(output_file.with_suffix('.manifest.json')))
+    listings = list_game_directories(manifest, [(str(root), 0)], (".nsp",))
+    incremental_file_scan(manifest, listings, lambda names, **kwargs: {name: None for name in names}, dedup="off")
+    manifest.save()
+
+
+def test_polling_notices_a_game_modified_in_place(tmp_path):
+    root = tmp_path / "roms"
+    root.mkdir()
+    game = root / "Game.nsp"
+    game.write_bytes(b"old")
+    output_file = tmp_path / "gamedir_contents_switch.json"
+    scan_once(root, output_file)
+
+    folders, files, games = scan_watch.watch_targets("Switch", str(tmp_path / "qt-config.ini"), str(output_file))
+    backend = PollBackend(interval=0)
+    backend.update(folders, files, games)
+    assert backend.wait(0) == set()
+
+    # Same name, so the folder's mtime stays put; only the file's size and mtime change
+    folder_mtime = os.stat(root).st_mtime
+    game.write_bytes(b"a new dump")
+    os.utime(root, (folder_mtime, folder_mtime))
+
+    assert backend.wait(0) == {os.path.normpath(str(root))}
+    assert backend.wait(0) == set()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import io
+import os
+import sys
+import json
+import subprocess
+
+from conftest import SCRIPTS_DIR
+from scanner_daemon import ScannerDaemon, PARSE_ERROR, METHOD_NOT_FOUND, INVALID_PARAMS, SCAN_FAILED
+
+
+class DaemonClient:
+    """Drives a scanner_daemon.py process the way XMB.gd does: one request line in, one response line out."""
+
+    def __init__(self, tmp_path):
+        # Logs and caches go to tmp_path, so a test run leaves the repository alone
+        env = dict(os.environ, XMB_STEAMGRIDDB_API_URL="http://127.0.0.1:9", STEAMGRIDDB_API_KEY="",
+                   XMB_SCANNER_LOG=str(tmp_path / "python_scanner.log"), XMB_MEDIA_DIR=str(tmp_path / "media"))
+        self.process = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, 'scanner_daemon.py')],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+        self.next_id = 0
+
+    def send_line(self, line):
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def call(self, method, params=None):
+        self.next_id += 1
+        response = self.send_line(json.dumps({"jsonrpc": "2.0", "id": self.next_id, "method": method,
+                                              "params": params or {}}))
+        assert response["id"] == self.next_id
+        return response
+
+    def close(self):
+        self.call("shutdown")
+        return self.process.wait(timeout=10)
+
+
+def test_daemon_serves_requests_until_shutdown(tmp_path):
+    config_dir = tmp_path / "cfg"
+    game_dir = tmp_path / "wii"
+    config_dir.mkdir()
+    game_dir.mkdir()
+    (config_dir / "Dolphin.ini").write_text(f"[General]\nISOPaths = 1\nISOPath0 = {game_dir.as_posix()}\n")
+    library = tmp_path / "menu_data.json"
+
+    client = DaemonClient(tmp_path)
+    try:
+        assert client.call("ping")["result"] == "pong"
+        assert client.call("platforms")["result"] == ["Switch", "Wii", "Playstation 3"]
+        assert client.send_line("not json")["error"]["code"] == PARSE_ERROR
+        assert client.call("frobnicate")["error"]["code"] == METHOD_NOT_FOUND
+        assert client.call("scan", {"platform": "GameCube", "config_dir": "x", "output_file": "y"})["error"]["code"] \
+            == INVALID_PARAMS
+
+        params = {"platform": "Wii", "config_dir": str(config_dir), "output_file": str(tmp_path / "out.json"),
+                  "library": str(library), "defer_artwork": True}
+        result = client.call("scan", params)["result"]
+        assert result["platform"] == "Wii"
+        assert result["metrics"]["counters"]["files.listed"] == 0
+        # A second scan is served by the same process
+        assert client.call("scan", params)["result"]["output_file"] == str(tmp_path / "out.json")
+        assert json.loads(library.read_text())["Wii"]["items"] == []
+    finally:
+        assert client.close() == 0
+
+
+def run_daemon(scanners, *requests):
+    daemon = ScannerDaemon(scanners)
+    stdout = io.StringIO()
+    daemon.serve(io.StringIO("".join(json.dumps(request) + "\n" for request in requests)), stdout)
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def test_scan_passes_options_to_the_scanner(tmp_path):
+    calls = []
+
+    def fake_scan(config_dir, config_file_name, output_file, delta, full, scan_stream, **options):
+        calls.append((config_dir, config_file_name, output_file, delta, options))
+        return {"/games": [{"filename": "a.rvz"}]}
+
+    responses = run_daemon({"Wii": (fake_scan, "Dolphin.ini")},
+                           {"jsonrpc": "2.0", "id": 1, "method": "scan",
+                            "params": {"platform": "Wii", "config_dir": "cfg", "output_file": str(tmp_path / "o.json"),
+                                       "delta": True, "max_depth": 2, "dedup": "quick"}})
+    assert responses[0]["result"]["data"] == {"/games": [{"filename": "a.rvz"}]}
+    config_dir, config_file_name, _, delta, options = calls[0]
+    assert (config_dir, config_file_name, delta) == ("cfg", "Dolphin.ini", True)
+    assert options["max_depth"] == 2 and options["dedup"] == "quick"
+
+
+def test_failed_scan_is_an_error_response(tmp_path):
+    def broken_scan(*args, **kwargs):
+        raise OSError("disk on fire")
+
+    responses = run_daemon({"Wii": (broken_scan, "Dolphin.ini")},
+                           {"jsonrpc": "2.0", "id": 1, "method": "scan",
+                            "params": {"platform": "Wii", "config_dir": "cfg", "output_file": str(tmp_path / "o.json")}},
+                           {"jsonrpc": "2.0", "id": 2, "method": "ping"})
+    assert responses[0]["error"]["code"] == SCAN_FAILED
+    assert "disk on fire" in responses[0]["error"]["message"]
+    # The daemon keeps serving after a failed scan
+    assert responses[1]["result"] == "pong"
\ No newline at end of file
@@ -0,0 +1,81 @@
+import pytest
+
+import artwork
+import title_db
+from artwork_cache import ArtworkCache
+from title_db import TitleDatabase
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSteamGridDB:
+    """Answers every search with one game and has no icons for it."""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.searches = []
+
+    def get(self, url, headers=None, **kwargs):
+        if "/search/autocomplete/" in url:
+            self.searches.append(url.rsplit("/", 1)[1])
+            return FakeResponse({"success": True, "data": [{"id": self.game_id, "name": "Some Game"}]})
+        return FakeResponse({"success": True, "data": []})
+
+
+@pytest.fixture
+def titles(tmp_path, monkeypatch):
+    db = TitleDatabase(str(tmp_path / "titles.sqlite3"))
+    monkeypatch.setattr(title_db, "_db", db)
+    monkeypatch.setattr(artwork, "_api_key", "key")
+    yield db
+    db.close()
+
+
+def resolve(tmp_path, filename, identity, api):
+    cache = ArtworkCache(str(tmp_path / "artwork_cache.sqlite3"))
+    try:
+        return artwork.get_game_artwork(filename, session=api, cache=cache, identity=identity)
+    finally:
+        cache.close()
+
+
+def test_file_name_is_not_recorded_as_the_canonical_title(tmp_path, titles):
+    identity = {"key": "switch:0100000000010000", "platform": "switch", "id": "0100000000010000", "title": None}
+    resolve(tmp_path, "mario odyssey [v0].nsp", identity, FakeSteamGridDB(42))
+
+    assert titles.lookup("0100000000010000") == {"title_id": "0100000000010000", "platform": "switch",
+                                                 "name": None, "sgdb_id": 42}
+    assert titles.match_name("mario odyssey") is None and titles.prefix("mario") == []
+    assert title_db.title_for("0100000000010000") is None
+
+    # A title list imported later names the game and keeps the id the API found
+    titles.store_many([("0100000000010000", "switch", "Super Mario Odyssey", None)])
+    assert titles.lookup("0100000000010000")["name"] == "Super Mario Odyssey"
+    assert titles.lookup("0100000000010000")["sgdb_id"] == 42
+
+
+def test_header_title_is_recorded(tmp_path, titles):
+    identity = {"key": "wii:RSBE01", "platform": "wii", "id": "RSBE01", "title": "Super Smash Bros. Brawl"}
+    api = FakeSteamGridDB(7)
+    resolve(tmp_path, "ssbb.rvz", identity, api)
+
+    assert api.searches == ["Super%20Smash%20Bros.%20Brawl"]
+    assert titles.lookup("RSBE01")["name"] == "Super Smash Bros. Brawl"
+    assert titles.match_name("super smash bros brawl")["sgdb_id"] == 7
+
+
+def test_id_without_a_name_skips_the_search(tmp_path, titles):
+    titles.remember_sgdb_id({"id": "BLES01961", "platform": "ps3"}, None, 9)
+    api = FakeSteamGridDB(10)
+    identity = {"key": "ps3:BLES01961", "platform": "ps3", "id": "BLES01961", "title": None}
+    resolve(tmp_path, "BLES01961", identity, api)
+    assert api.searches == []
\ No newline at end of file